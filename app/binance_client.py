@@ -3,25 +3,65 @@ import asyncio
 from binance import AsyncClient
 from binance.exceptions import BinanceAPIException
 import time
-from typing import Optional, Dict, Any
+import uuid
+from typing import Optional, Dict, Any, List
 import math
 
+from .rate_limiter import (
+    BinanceRateLimiter, PRIORITY_BACKGROUND, PRIORITY_CRITICAL, PRIORITY_NORMAL
+)
+from .order_book import OrderBook
+from .order_builder import build_order_plan
+from .symbol_metadata import SymbolMetadataIndex
+from .user_data_stream import UserDataStream
+
 class FixedBinanceClient:
+    BATCH_ORDER_LIMIT = 5  # batchOrders istek başına max emir
+    SYMBOL_CONFIG_RETRY_SECONDS = 30       # positionRisk hatasından sonra ilk bekleme
+    SYMBOL_CONFIG_RETRY_MAX_SECONDS = 600  # Her hatada ikiye katlanır, en fazla bu kadar
+    
     def __init__(self, settings):
+        self.settings = settings
         self.api_key = settings.API_KEY
         self.api_secret = settings.API_SECRET
         self.is_testnet = settings.ENVIRONMENT == "TEST"
         self.client: AsyncClient | None = None
-        self.exchange_info = None
+        self.symbols = SymbolMetadataIndex(settings, self)
+        self.order_book = OrderBook(settings, self)
         self._last_balance_check = 0
         self._cached_balance = 0.0
-        self._rate_limit_delay_time = 0.2
+        self.rate_limiter = BinanceRateLimiter(settings)
+        self.user_stream: UserDataStream | None = None
+        
+        # Sembol başına kaldıraç / margin tipi ({'leverage': 10, 'margin_type': 'cross'})
+        self._symbol_config: Dict[str, Dict[str, Any]] = {}
+        self._symbol_config_loaded = False
+        self._symbol_config_lock = asyncio.Lock()
+        self._symbol_config_failures = 0
+        self._symbol_config_retry_at = 0.0  # Bu zamandan önce positionRisk tekrar denenmez
         
         print(f"🎯 Fixed Binance Client başlatılıyor. Ortam: {settings.ENVIRONMENT}")
         
-    async def _rate_limit_delay(self):
-        """Rate limit koruması"""
-        await asyncio.sleep(self._rate_limit_delay_time)
+    async def _call(self, method, *args, weight: int = 1, orders: int = 0,
+                    priority: int = PRIORITY_NORMAL, **kwargs):
+        """
+        Futures REST çağrısı - ağırlık bütçesi ayır, 429/418'de global geri çekil
+
+        Header senkronu sadece hata yanıtından yapılır: başarılı çağrıda
+        client.response paylaşılır, eşzamanlı çağrılarda başka isteğe ait olabilir.
+
+        priority: PRIORITY_CRITICAL (emirler) / NORMAL (okumalar) / BACKGROUND
+        """
+        await self.rate_limiter.acquire(weight, orders, priority)
+        try:
+            result = await method(*args, **kwargs)
+        except BinanceAPIException as e:
+            headers = getattr(e.response, 'headers', None)
+            self.rate_limiter.update_from_headers(headers)
+            if e.status_code in (429, 418):
+                self.rate_limiter.on_rate_limited(e.status_code, headers)
+            raise
+        return result
         
     async def initialize(self):
         """Bağlantıyı başlat"""
@@ -30,27 +70,36 @@ class FixedBinanceClient:
                 self.client = await AsyncClient.create(
                     self.api_key, self.api_secret, testnet=self.is_testnet
                 )
-                await self._rate_limit_delay()
-                
-                self.exchange_info = await self.client.get_exchange_info()
-                
-                if not self.exchange_info or 'symbols' not in self.exchange_info:
+                if not await self.symbols.load():
                     raise Exception("Exchange info alınamadı")
                     
                 print("✅ Binance AsyncClient başarıyla başlatıldı.")
                 await self._test_connection()
                 
+                if self.settings.USE_USER_DATA_STREAM:
+                    await self.start_user_stream()
+                    await self.order_book.start()
+                
             except Exception as e:
                 print(f"❌ Binance bağlantı hatası: {e}")
                 raise e
                 
         return self.client
 
+    async def start_user_stream(self):
+        """Fill/hesap olayları için user data stream'i başlat"""
+        if self.user_stream is None:
+            self.user_stream = UserDataStream(self.settings, self)
+            self.user_stream.add_listener('ACCOUNT_CONFIG_UPDATE', self._on_account_config_update)
+            self.user_stream.add_listener('ACCOUNT_UPDATE', self._on_account_update)
+        await self.user_stream.start()
+        return self.user_stream
+
     async def _test_connection(self):
         """Bağlantıyı test et"""
         try:
-            await self._rate_limit_delay()
-            account_info = await self.client.futures_account()
+            account_info = await self._call(self.client.futures_account, weight=5,
+                                            priority=PRIORITY_BACKGROUND)
             
             if account_info:
                 total_balance = 0.0
@@ -79,17 +128,26 @@ class FixedBinanceClient:
         tp_percent: float,
         sl_percent: float
     ) -> Optional[Dict]:
+        """🎯 POZİSYON AÇ + TP/SL EKLE"""
+        plan = build_order_plan(
+            symbol, side, quantity, entry_price, price_precision, tp_percent, sl_percent
+        )
+        return await self.execute_order_plan(plan)
+
+    async def execute_order_plan(self, plan: Dict) -> Optional[Dict]:
         """
-        🎯 POZİSYON AÇ + TP/SL EKLE (DÜZELTİLMİŞ)
+        🎯 HAZIR EMİR PLANINI GÖNDER (build_order_plan / OrderBuilder.build)
         
         DEĞİŞİKLİKLER:
-        1. Ana pozisyon açıldıktan sonra doğrulama
-        2. TP/SL için daha fazla bekleme
+        1. Ana pozisyon fill olayı ile doğrulanır (REST poll sadece yedek)
+        2. TP/SL fill gelir gelmez tek batch isteğiyle gönderilir
         3. GTC yerine GTE_GTC kullanımı
         4. Hata durumunda pozisyon kapatma
+        5. Emirler temizse giriş öncesi iptal çağrısı yapılmaz
         """
-        def format_price(price):
-            return f"{price:.{price_precision}f}"
+        symbol = plan['symbol']
+        side = plan['side']
+        quantity = plan['quantity']
             
         try:
             print(f"\n{'='*60}")
@@ -97,8 +155,8 @@ class FixedBinanceClient:
             print(f"{'='*60}")
             print(f"   Yön: {side}")
             print(f"   Miktar: {quantity}")
-            print(f"   Entry: {entry_price}")
-            print(f"   TP: %{tp_percent*100:.2f} | SL: %{sl_percent*100:.2f}")
+            print(f"   Entry: {plan['entry_price']}")
+            print(f"   TP: %{plan['tp_percent']*100:.2f} | SL: %{plan['sl_percent']*100:.2f}")
             
             # TEST MODU
             if hasattr(self, 'TEST_MODE') and self.TEST_MODE:
@@ -106,68 +164,63 @@ class FixedBinanceClient:
                 return {"orderId": "TEST_" + str(int(time.time())), "status": "FILLED"}
             
             # 1. Açık emirleri temizle
-            await self.cancel_all_orders_safe(symbol)
-            await asyncio.sleep(0.5)
+            if plan.get('cancel_existing', True):
+                await self.cancel_all_orders_safe(symbol)
             
-            # 2. Ana pozisyon aç
+            # 2. Ana pozisyon aç (fill olayı için bekleyici önceden kaydedilir)
             print(f"\n📈 Ana pozisyon açılıyor...")
-            await self._rate_limit_delay()
+            client_order_id = f"entry_{uuid.uuid4().hex[:24]}"
+            fill_waiter = None
+            if self.user_stream and self.user_stream.is_connected:
+                fill_waiter = self.user_stream.expect_order(client_order_id)
             
-            main_order = await self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type='MARKET',
-                quantity=quantity
-            )
+            try:
+                main_order = await self._call(
+                    self.client.futures_create_order, weight=0, orders=1, priority=PRIORITY_CRITICAL,
+                    symbol=symbol,
+                    side=side,
+                    type='MARKET',
+                    quantity=quantity,
+                    newClientOrderId=client_order_id,
+                    newOrderRespType='RESULT'
+                )
+            except Exception:
+                if fill_waiter:
+                    self.user_stream.discard_order(client_order_id)
+                raise
             
             if not main_order or 'orderId' not in main_order:
+                if fill_waiter:
+                    self.user_stream.discard_order(client_order_id)
                 print(f"❌ Ana emir oluşturulamadı")
                 return None
                 
             print(f"✅ Ana pozisyon AÇILDI: Order ID {main_order['orderId']}")
             
-            # 3. POZİSYON DOĞRULAMASI (ÖNEMLİ!)
-            print(f"\n🔍 Pozisyon doğrulanıyor...")
-            await asyncio.sleep(2.0)  # Pozisyonun açılması için bekle
-            
-            position = await self._verify_position(symbol, side)
-            if not position:
+            # 3. FILL DOĞRULAMASI (olay → anında, REST poll sadece yedek)
+            print(f"\n🔍 Fill doğrulanıyor...")
+            filled = await self._confirm_fill(symbol, side, client_order_id, main_order, fill_waiter)
+            if not filled:
                 print(f"⚠️ Pozisyon doğrulanamadı, TP/SL eklenemiyor")
                 return main_order
+            self.order_book.record_fill(symbol, side, float(quantity), plan['entry_price'])
             
-            print(f"✅ Pozisyon doğrulandı: {abs(float(position['positionAmt']))} {symbol}")
-            
-            # 4. TP/SL Hesapla
-            opposite_side = 'SELL' if side == 'BUY' else 'BUY'
-            
-            if side == 'BUY':  # Long
-                tp_price = entry_price * (1 + tp_percent)
-                sl_price = entry_price * (1 - sl_percent)
-            else:  # Short
-                tp_price = entry_price * (1 - tp_percent)
-                sl_price = entry_price * (1 + sl_percent)
-            
-            formatted_tp = format_price(tp_price)
-            formatted_sl = format_price(sl_price)
+            # 4. TP/SL (planda hazır)
+            opposite_side = plan['opposite_side']
+            formatted_tp = plan['tp_price']
+            formatted_sl = plan['sl_price']
             
             print(f"\n💹 TP/SL SEVİYELERİ:")
             print(f"   Take Profit: {formatted_tp}")
             print(f"   Stop Loss: {formatted_sl}")
             
-            # 5. STOP LOSS Ekle
-            await asyncio.sleep(0.5)
-            sl_success = await self._create_stop_loss_fixed(
-                symbol, opposite_side, quantity, formatted_sl
+            # 5. STOP LOSS + TAKE PROFIT tek batch isteğinde
+            protection = await self.place_protection_orders(
+                symbol, opposite_side, quantity, sl_price=formatted_sl, tp_price=formatted_tp
             )
             
-            # 6. TAKE PROFIT Ekle
-            await asyncio.sleep(0.5)
-            tp_success = await self._create_take_profit_fixed(
-                symbol, opposite_side, quantity, formatted_tp
-            )
-            
-            # 7. Sonuç raporu
-            success_count = sum([sl_success, tp_success])
+            # 6. Sonuç raporu
+            success_count = sum(protection.values())
             
             print(f"\n{'='*60}")
             if success_count == 2:
@@ -191,11 +244,58 @@ class FixedBinanceClient:
             await self.cancel_all_orders_safe(symbol)
             return None
 
+    async def _confirm_fill(
+        self,
+        symbol: str,
+        side: str,
+        client_order_id: str,
+        order_response: Dict,
+        fill_waiter: Optional[asyncio.Future]
+    ) -> bool:
+        """
+        Ana emrin dolduğunu doğrula
+        
+        1. RESULT yanıtı zaten FILLED ise bekleme yok
+        2. User data stream ORDER_TRADE_UPDATE olayı
+        3. Zaman aşımında REST pozisyon sorgusu (yedek)
+        """
+        if order_response.get('status') == 'FILLED':
+            if fill_waiter:
+                self.user_stream.discard_order(client_order_id)
+            print(f"✅ Fill yanıtta onaylandı: {order_response.get('executedQty')} {symbol}")
+            return True
+        
+        if fill_waiter:
+            started = time.monotonic()
+            order = await self.user_stream.wait_for_order(
+                client_order_id, fill_waiter, self.settings.FILL_CONFIRM_TIMEOUT
+            )
+            if order is not None:
+                if order.get('X') == 'FILLED':
+                    print(f"✅ Fill olayı alındı ({(time.monotonic() - started)*1000:.0f}ms): {order.get('z')} {symbol}")
+                    return True
+                print(f"❌ Ana emir dolmadı: {order.get('X')}")
+                return False
+            print(f"⚠️ Fill olayı gelmedi, REST ile doğrulanıyor...")
+            deadline = time.monotonic()
+        else:
+            # Stream yok: zaman aşımına kadar kısa aralıklarla REST poll
+            deadline = time.monotonic() + self.settings.FILL_CONFIRM_TIMEOUT
+        
+        while True:
+            position = await self._verify_position(symbol, side)
+            if position:
+                print(f"✅ Pozisyon doğrulandı: {abs(float(position['positionAmt']))} {symbol}")
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(0.25)
+
     async def _verify_position(self, symbol: str, expected_side: str) -> Optional[Dict]:
         """Pozisyonun açıldığını doğrula"""
         try:
-            await self._rate_limit_delay()
-            positions = await self.client.futures_position_information(symbol=symbol)
+            positions = await self._call(self.client.futures_position_information, symbol=symbol,
+                                         weight=5, priority=PRIORITY_CRITICAL)
             
             for pos in positions:
                 position_amt = float(pos['positionAmt'])
@@ -212,69 +312,99 @@ class FixedBinanceClient:
             print(f"❌ Pozisyon doğrulama hatası: {e}")
             return None
 
-    async def _create_stop_loss_fixed(
-        self, symbol: str, side: str, quantity: float, price: str
-    ) -> bool:
-        """STOP LOSS (DÜZELTİLMİŞ)"""
-        try:
-            print(f"🛑 Stop Loss oluşturuluyor: {price}")
-            await self._rate_limit_delay()
-            
-            sl_order = await self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type='STOP_MARKET',
-                quantity=quantity,
-                stopPrice=price,
-                timeInForce='GTE_GTC',  # Good Till Expire - Good Till Cancel
-                reduceOnly=True,
-                closePosition=False
-            )
-            
-            if sl_order and 'orderId' in sl_order:
-                print(f"✅ Stop Loss BAŞARILI: {price} (Order ID: {sl_order['orderId']})")
-                return True
-            
-            return False
-            
-        except BinanceAPIException as e:
-            print(f"❌ Stop Loss API hatası: {e.code} - {e.message}")
-            return False
-        except Exception as e:
-            print(f"❌ Stop Loss genel hatası: {e}")
-            return False
+    @staticmethod
+    def _protection_leg(symbol: str, side: str, order_type: str, quantity, price: str) -> Dict:
+        """batchOrders için TP/SL bacağı (batch parametreleri string olmalı)"""
+        return {
+            'symbol': symbol,
+            'side': side,
+            'type': order_type,
+            'quantity': quantity if isinstance(quantity, str) else f"{quantity:.8f}".rstrip('0').rstrip('.'),
+            'stopPrice': price,
+            'timeInForce': 'GTE_GTC',  # Good Till Expire - Good Till Cancel
+            'reduceOnly': 'true'
+        }
 
-    async def _create_take_profit_fixed(
-        self, symbol: str, side: str, quantity: float, price: str
-    ) -> bool:
-        """TAKE PROFIT (DÜZELTİLMİŞ)"""
-        try:
-            print(f"🎯 Take Profit oluşturuluyor: {price}")
-            await self._rate_limit_delay()
-            
-            tp_order = await self.client.futures_create_order(
-                symbol=symbol,
-                side=side,
-                type='TAKE_PROFIT_MARKET',
-                quantity=quantity,
-                stopPrice=price,
-                timeInForce='GTE_GTC',
-                reduceOnly=True,
-                closePosition=False
-            )
-            
-            if tp_order and 'orderId' in tp_order:
-                print(f"✅ Take Profit BAŞARILI: {price} (Order ID: {tp_order['orderId']})")
-                return True
-            
-            return False
-            
-        except BinanceAPIException as e:
-            print(f"❌ Take Profit API hatası: {e.code} - {e.message}")
-            return False
-        except Exception as e:
-            print(f"❌ Take Profit genel hatası: {e}")
-            return False
+    async def place_batch_orders(
+        self, orders: List[Dict], max_retries: int = 1, priority: int = PRIORITY_CRITICAL,
+        call_stats: Optional[Dict[str, int]] = None
+    ) -> List[Optional[Dict]]:
+        """
+        📦 batchOrders ile emir gönder (istek başına en fazla 5 bacak)
+        
+        Returns: her bacak için emir yanıtı veya başarısızsa None (girdi sırasıyla).
+        Sadece başarısız bacaklar max_retries kez tekrar gönderilir.
+        call_stats verilirse yapılan REST çağrısı sayısı 'rest_calls' anahtarına eklenir.
+        """
+        results: List[Optional[Dict]] = [None] * len(orders)
+        pending = list(range(len(orders)))
+        
+        for attempt in range(max_retries + 1):
+            if not pending:
+                break
+            failed = []
+            
+            for chunk_start in range(0, len(pending), self.BATCH_ORDER_LIMIT):
+                chunk = pending[chunk_start:chunk_start + self.BATCH_ORDER_LIMIT]
+                if call_stats is not None:
+                    call_stats['rest_calls'] = call_stats.get('rest_calls', 0) + 1
+                try:
+                    response = await self._call(
+                        self.client.futures_place_batch_order,
+                        batchOrders=[dict(orders[i]) for i in chunk],
+                        weight=5, orders=len(chunk), priority=priority
+                    )
+                except Exception as e:
+                    response = [{'code': getattr(e, 'code', None), 'msg': str(e)}] * len(chunk)
+                
+                for index, leg in zip(chunk, response or []):
+                    if isinstance(leg, dict) and 'orderId' in leg:
+                        results[index] = leg
+                    else:
+                        failed.append(index)
+                        error = leg if isinstance(leg, dict) else {}
+                        print(f"⚠️ {orders[index]['symbol']} {orders[index]['type']} bacağı başarısız "
+                              f"(deneme {attempt + 1}): {error.get('code')} - {error.get('msg')}")
+                # Yanıtta eksik bacak varsa başarısız say
+                failed.extend(chunk[len(response or []):])
+            
+            pending = failed
+        
+        return results
+
+    async def place_protection_orders(
+        self, symbol: str, side: str, quantity,
+        sl_price: Optional[str] = None, tp_price: Optional[str] = None,
+        call_stats: Optional[Dict[str, int]] = None
+    ) -> Dict[str, bool]:
+        """
+        🛡️ SL ve TP'yi tek batchOrders isteğiyle gönder
+        
+        Returns: {'SL': bool, 'TP': bool} (sadece istenen bacaklar)
+        """
+        legs = []
+        if sl_price is not None:
+            legs.append(('SL', self._protection_leg(symbol, side, 'STOP_MARKET', quantity, sl_price)))
+        if tp_price is not None:
+            legs.append(('TP', self._protection_leg(symbol, side, 'TAKE_PROFIT_MARKET', quantity, tp_price)))
+        if not legs:
+            return {}
+        
+        print(f"🛡️ {symbol} koruma gönderiliyor: " + ", ".join(f"{name} {leg['stopPrice']}" for name, leg in legs))
+        results = await self.place_batch_orders([leg for _, leg in legs], call_stats=call_stats)
+        
+        report = {}
+        for (name, leg), result in zip(legs, results):
+            report[name] = result is not None
+            if result is not None:
+                print(f"✅ {'Stop Loss' if name == 'SL' else 'Take Profit'} BAŞARILI: {leg['stopPrice']} (Order ID: {result['orderId']})")
+        
+        placed = [result for result in results if result is not None]
+        if len(placed) == 2:
+            self.order_book.link_siblings(placed[0], placed[1])
+        elif placed:
+            self.order_book.record_order(placed[0])
+        return report
 
     async def _emergency_close_position(
         self, symbol: str, side: str, quantity: float
@@ -282,9 +412,8 @@ class FixedBinanceClient:
         """Acil pozisyon kapatma (korumasız pozisyonlar için)"""
         try:
             print(f"🚨 {symbol} ACİL KAPATILIYOR (korumasız pozisyon)")
-            await self._rate_limit_delay()
-            
-            close_order = await self.client.futures_create_order(
+            close_order = await self._call(
+                self.client.futures_create_order, weight=0, orders=1, priority=PRIORITY_CRITICAL,
                 symbol=symbol,
                 side=side,
                 type='MARKET',
@@ -299,30 +428,32 @@ class FixedBinanceClient:
             print(f"❌ Acil kapatma hatası: {e}")
 
     async def get_symbol_info(self, symbol: str):
-        """Symbol bilgilerini al"""
-        try:
-            if not self.exchange_info:
-                await self._rate_limit_delay()
-                self.exchange_info = await self.client.get_exchange_info()
-                
-            if not self.exchange_info or 'symbols' not in self.exchange_info:
-                return None
-                
-            for s in self.exchange_info['symbols']:
-                if s['symbol'] == symbol:
-                    return s
-                    
-            return None
-            
-        except Exception as e:
-            print(f"❌ {symbol} sembol bilgisi hatası: {e}")
-            return None
+        """Symbol bilgilerini al (ham exchangeInfo kaydı)"""
+        if symbol not in self.symbols and self.symbols.age > 60:
+            await self.symbols.refresh(priority=PRIORITY_NORMAL)  # Yeni listelenmiş sembol
+        return self.symbols.get_raw(symbol)
+
+    async def get_symbol_metadata(self, symbol: str) -> Optional[Dict]:
+        """Önceden hesaplanmış tick/step/precision/min notional bilgisi"""
+        if symbol not in self.symbols and self.symbols.age > 60:
+            await self.symbols.refresh(priority=PRIORITY_NORMAL)  # Yeni listelenmiş sembol
+        return self.symbols.get(symbol)
+
+    def _format_quantity(self, symbol: str, quantity: float) -> float:
+        """Miktarı sembolün stepSize'ına aşağı yuvarla"""
+        return self.symbols.round_quantity(symbol, quantity)
+        
+    async def get_open_positions(self, symbol: Optional[str] = None):
+        """Açık pozisyonları getir - symbol verilmezse tüm hesap (emir defteri canlıysa REST çağrısı yok)"""
+        if self.order_book.is_live:
+            if symbol is None:
+                return self.order_book.get_open_positions()
+            position = self.order_book.get_position(symbol)
+            return [position] if position else []
         
-    async def get_open_positions(self, symbol: str):
-        """Açık pozisyonları getir"""
         try:
-            await self._rate_limit_delay()
-            positions = await self.client.futures_position_information(symbol=symbol)
+            params = {'symbol': symbol} if symbol else {}
+            positions = await self._call(self.client.futures_position_information, weight=5, **params)
             
             if not positions:
                 return []
@@ -331,16 +462,17 @@ class FixedBinanceClient:
             return open_positions
             
         except Exception as e:
-            print(f"❌ {symbol} pozisyon sorgusu hatası: {e}")
+            print(f"❌ {symbol or 'Hesap'} pozisyon sorgusu hatası: {e}")
             return []
 
     async def cancel_all_orders_safe(self, symbol: str):
         """Güvenli emir iptali"""
         try:
-            await self._rate_limit_delay()
-            result = await self.client.futures_cancel_all_open_orders(symbol=symbol)
+            result = await self._call(self.client.futures_cancel_all_open_orders, symbol=symbol,
+                                      weight=1, priority=PRIORITY_CRITICAL)
             if result:
                 print(f"🗑️ {symbol} açık emirler iptal edildi")
+            self.order_book.clear_orders(symbol)
             return True
                 
         except Exception as e:
@@ -349,11 +481,17 @@ class FixedBinanceClient:
                 print(f"⚠️ {symbol} emir iptali: {e}")
             return False
 
+    async def cancel_order(self, symbol: str, order_id: int):
+        """Tek emir iptali"""
+        result = await self._call(self.client.futures_cancel_order, symbol=symbol, orderId=order_id,
+                                  weight=1, priority=PRIORITY_CRITICAL)
+        self.order_book.clear_order(order_id)
+        return result
+
     async def get_market_price(self, symbol: str):
         """Market fiyatını al"""
         try:
-            await self._rate_limit_delay()
-            ticker = await self.client.futures_symbol_ticker(symbol=symbol)
+            ticker = await self._call(self.client.futures_symbol_ticker, symbol=symbol, weight=1)
             
             if not ticker or 'price' not in ticker:
                 return None
@@ -367,7 +505,7 @@ class FixedBinanceClient:
     async def get_historical_klines(self, symbol: str, interval: str, limit: int = 100):
         """Geçmiş veri al"""
         try:
-            await self._rate_limit_delay()
+            # Spot endpoint - futures ağırlık bütçesine sayılmaz
             klines = await self.client.get_historical_klines(symbol, interval, limit=limit)
             return klines if klines else []
             
@@ -375,9 +513,56 @@ class FixedBinanceClient:
             print(f"❌ {symbol} geçmiş veri hatası: {e}")
             return []
 
+    async def _load_symbol_config(self):
+        """Tüm sembollerin kaldıraç / margin tipini tek positionRisk çağrısıyla al"""
+        async with self._symbol_config_lock:
+            if self._symbol_config_loaded or time.time() < self._symbol_config_retry_at:
+                return
+            try:
+                positions = await self._call(self.client.futures_position_information, weight=5)
+                for pos in positions or []:
+                    self._symbol_config[pos['symbol']] = {
+                        'leverage': int(pos['leverage']),
+                        'margin_type': str(pos.get('marginType', '')).lower()
+                    }
+                self._symbol_config_loaded = True
+                self._symbol_config_failures = 0
+                print(f"⚙️ Kaldıraç/margin bilgisi yüklendi ({len(self._symbol_config)} sembol)")
+            except Exception as e:
+                # Her set_leverage'da weight-5 çağrıyı tekrarlamamak için geri çekil
+                delay = min(self.SYMBOL_CONFIG_RETRY_SECONDS * 2 ** self._symbol_config_failures,
+                            self.SYMBOL_CONFIG_RETRY_MAX_SECONDS)
+                self._symbol_config_failures += 1
+                self._symbol_config_retry_at = time.time() + delay
+                print(f"⚠️ Kaldıraç/margin bilgisi alınamadı ({delay}s sonra tekrar denenecek): {e}")
+
+    async def _on_account_config_update(self, event: dict):
+        """ACCOUNT_CONFIG_UPDATE → kaldıraç değişti"""
+        config = event.get('ac')
+        if config and config.get('s'):
+            self._symbol_config.setdefault(config['s'], {})['leverage'] = int(config['l'])
+
+    async def _on_account_update(self, event: dict):
+        """ACCOUNT_UPDATE → pozisyonların margin tipi"""
+        for pos in event.get('a', {}).get('P', []):
+            if pos.get('s') and pos.get('mt'):
+                self._symbol_config.setdefault(pos['s'], {})['margin_type'] = pos['mt'].lower()
+
+    def get_leverage(self, symbol: str) -> int:
+        """Önbellekteki kaldıraç (bilinmiyorsa ayarlardaki)"""
+        return self._symbol_config.get(symbol, {}).get('leverage') or self.settings.LEVERAGE
+
     async def set_leverage(self, symbol: str, leverage: int):
-        """Kaldıraç ayarla"""
+        """Kaldıraç ayarla (zaten ayarlıysa hiçbir çağrı yapılmaz)"""
         try:
+            await self._load_symbol_config()
+            config = self._symbol_config.get(symbol, {})
+            needs_margin = config.get('margin_type') != 'cross'
+            needs_leverage = config.get('leverage') != leverage
+            
+            if not needs_margin and not needs_leverage:
+                return True
+            
             # Açık pozisyon kontrolü
             open_positions = await self.get_open_positions(symbol)
             if open_positions:
@@ -385,18 +570,23 @@ class FixedBinanceClient:
                 return False
             
             # Margin tipini cross olarak ayarla
-            try:
-                await self._rate_limit_delay()
-                await self.client.futures_change_margin_type(symbol=symbol, marginType='CROSSED')
-            except BinanceAPIException as e:
-                if "No need to change margin type" in str(e):
-                    pass  # Zaten cross modunda
+            if needs_margin:
+                try:
+                    await self._call(self.client.futures_change_margin_type, symbol=symbol, marginType='CROSSED', weight=1)
+                    self._symbol_config.setdefault(symbol, {})['margin_type'] = 'cross'
+                except BinanceAPIException as e:
+                    if "No need to change margin type" in str(e):
+                        # Zaten cross modunda
+                        self._symbol_config.setdefault(symbol, {})['margin_type'] = 'cross'
+            
+            if not needs_leverage:
+                return True
             
             # Kaldıracı ayarla
-            await self._rate_limit_delay()
-            result = await self.client.futures_change_leverage(symbol=symbol, leverage=leverage)
+            result = await self._call(self.client.futures_change_leverage, symbol=symbol, leverage=leverage, weight=1)
             
             if result:
+                self._symbol_config.setdefault(symbol, {})['leverage'] = int(result.get('leverage', leverage))
                 print(f"✅ {symbol} kaldıracı {leverage}x")
                 return True
             return False
@@ -414,8 +604,8 @@ class FixedBinanceClient:
             if current_time - self._last_balance_check < 30:
                 return self._cached_balance
             
-            await self._rate_limit_delay()
-            account = await self.client.futures_account()
+            account = await self._call(self.client.futures_account, weight=5,
+                                       priority=PRIORITY_BACKGROUND)
             
             if not account or 'assets' not in account:
                 return self._cached_balance
@@ -435,20 +625,12 @@ class FixedBinanceClient:
             print(f"❌ Bakiye sorgusu hatası: {e}")
             return self._cached_balance
 
-    def _get_precision(self, symbol_info: dict, filter_type: str, key: str) -> int:
-        """Precision hesaplama"""
-        try:
-            for f in symbol_info.get('filters', []):
-                if f.get('filterType') == filter_type:
-                    size_str = f.get(key, "")
-                    if '.' in str(size_str):
-                        return len(str(size_str).split('.')[1].rstrip('0'))
-            return 0
-        except:
-            return 0
-
     async def close(self):
         """Bağlantıyı kapat"""
+        await self.symbols.stop()
+        await self.order_book.stop()
+        if self.user_stream:
+            await self.user_stream.stop()
         if self.client:
             try:
                 await self.client.close_connection()
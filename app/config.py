@@ -58,13 +58,79 @@ class OptimizedScalpingSettings:
     MIN_MOMENTUM_PERCENT: float = 0.001  # Min %0.1 momentum
     
     # --- 🚀 API Rate Limiting ---
-    API_CALL_DELAY: float = 0.2
-    MAX_REQUESTS_PER_SECOND: int = 8
+    RATE_LIMIT_WEIGHT_PER_MINUTE: int = 2400     # Futures IP request weight (1 dk)
+    RATE_LIMIT_ORDERS_PER_10S: int = 300         # Futures order count (10 sn)
+    RATE_LIMIT_ORDERS_PER_MINUTE: int = 1200     # Futures order count (1 dk)
+    RATE_LIMIT_SAFETY_MARGIN: float = 0.9        # Limitlerin bu kadarını kullan
+    RATE_LIMIT_CRITICAL_RESERVE: float = 0.10    # Sadece emirlerin kullanabileceği pay
+    RATE_LIMIT_BACKGROUND_RESERVE: float = 0.30  # Background bu pay kalınca durur
+    RATE_LIMIT_BACKGROUND_MAX_WAIT: float = 2.0  # Daha uzun beklemesi gereken background düşürülür
+    
+    # --- 📨 User Data Stream ---
+    USE_USER_DATA_STREAM: bool = True          # Fill onayı için ORDER_TRADE_UPDATE
+    FILL_CONFIRM_TIMEOUT: float = 3.0          # Olay gelmezse REST doğrulamaya düş
+    LISTEN_KEY_KEEPALIVE_SECONDS: int = 1800   # 30 dakikada bir keepalive
     
     # --- 🌐 WebSocket Ayarları ---
     WEBSOCKET_PING_INTERVAL: int = 30
     WEBSOCKET_PING_TIMEOUT: int = 15
     WEBSOCKET_CLOSE_TIMEOUT: int = 10
+    WEBSOCKET_MAX_STREAMS_PER_CONNECTION: int = 200  # Binance combined stream limiti
+    
+    # --- 🚦 Pipeline (alıcı → analiz → yürütme) ---
+    CANDLE_QUEUE_SIZE: int = 8           # Sembol başına bekleyen kapanmış mum
+    EXECUTION_QUEUE_SIZE: int = 16       # Yürütme bekleyen sinyal
+    SIGNAL_MAX_AGE_SECONDS: float = 20.0 # Bundan eski sinyal yürütülmez
+    STRATEGY_EXECUTOR: str = "thread"    # "thread" veya "inline" (ayrı süreç: USE_SHARDED_WORKERS)
+    STRATEGY_EXECUTOR_WORKERS: int = 4   # Analiz yürütücüsü işçi sayısı
+    ANALYSIS_DEADLINE_SECONDS: float = 2.0  # Mum başına analiz bütçesi, aşan sonuç düşürülür
+    LATENCY_WINDOW: int = 500            # p50/p99 için tutulan son ölçüm
+    
+    # --- 🤖 Gemini AI ---
+    GEMINI_CACHE_MAX_ENTRIES: int = 512      # Analiz cache'i max kayıt (LRU)
+    GEMINI_CACHE_TTL_SECONDS: float = 60.0   # Kayıt geçerlilik süresi
+    GEMINI_CACHE_FILE: str = "gemini_cache.json"  # Yeniden başlatmada korunur
+    GEMINI_CACHE_SAVE_SECONDS: float = 30.0  # Yeni kayıtlar en geç bu sürede diske yazılır
+    GEMINI_MAX_CONCURRENCY: int = 4          # Aynı anda uçuştaki Gemini çağrısı
+    GEMINI_CALL_TIMEOUT_SECONDS: float = 15.0  # Çağrı başına süre sınırı
+    GEMINI_SLOW_CALL_SECONDS: float = 8.0    # Bundan yavaş yanıt hata sayılır
+    GEMINI_BREAKER_FAILURES: int = 3         # Art arda hata → devre kesici açılır
+    GEMINI_BREAKER_COOLDOWN_SECONDS: int = 60  # Açık kalma süresi (fallback)
+    GEMINI_BATCH_SIZE: int = 8               # Tek prompt'taki max sembol
+    GEMINI_BATCH_WINDOW_SECONDS: float = 0.5 # Mum kapanışında istek toplama penceresi
+    
+    # --- 🔭 Sembol Tarayıcı ---
+    SCREENER_TOP_K: int = 3                  # AI onayına gönderilen aday sayısı
+    SCREENER_REFRESH_SECONDS: int = 60       # Toplu ticker REST yenilemesi (stream yoksa)
+    SCREENER_USE_STREAM: bool = True         # !miniTicker@arr ile canlı güncelleme
+    SCREENER_MIN_QUOTE_VOLUME: float = 50_000_000  # 24s min USDT hacim
+    SCREENER_MAX_RANGE_PERCENT: float = 30.0 # Üstü pump/dump sayılır, elenir
+    SCREENER_ACCEL_WINDOW_MINUTES: int = 5   # Hacim ivmesi: son N dakika / 24s ortalama
+    SCREENER_ACCEL_CANDIDATES: int = 20      # İvmesi ölçülen (1m mum çekilen) ön eleme adayı
+    SCREENER_WEIGHT_LIQUIDITY: float = 1.0
+    SCREENER_WEIGHT_VOLATILITY: float = 1.0
+    SCREENER_WEIGHT_ACCELERATION: float = 1.5
+    
+    # --- 🧩 Çoklu Sembol ---
+    MULTI_MAX_SYMBOLS: int = 10              # Aynı anda çalışan sembol işçisi
+    MULTI_MAX_OPEN_POSITIONS: int = 3        # Portföy genelinde eşzamanlı pozisyon
+    MULTI_MAX_MARGIN_PERCENT: float = 0.60   # Bakiyenin toplam marjin kullanım sınırı
+    MULTI_MAX_DAILY_TRADES: int = 60         # Tüm semboller için ortak günlük trade bütçesi
+    USE_SHARDED_WORKERS: bool = False        # True = semboller ayrı süreçlerde değerlendirilir
+    SHARD_PROCESSES: int = 0                 # İşçi süreç sayısı (0 = CPU çekirdeği - 1)
+    
+    # --- 🛡️ Pozisyon Koruma ---
+    PROTECTION_SWEEP_SECONDS: int = 300      # Tam uzlaştırma taraması (olaylar anında işlenir)
+    PROTECTION_SWEEP_CONCURRENCY: int = 4    # Taramada aynı anda kontrol edilen sembol
+    PROTECTION_GRACE_SECONDS: float = 5.0    # Yeni pozisyonun kendi TP/SL'si için bekleme
+    
+    # --- ⚡ Emir Hızlı Yolu ---
+    ORDER_BUILDER_REFRESH_SECONDS: int = 60  # Bakiye yedek REST yenilemesi
+    ORDER_BOOK_RECONCILE_SECONDS: int = 300  # Emir defteri REST uzlaştırma aralığı
+    
+    # --- 📇 Exchange Info ---
+    EXCHANGE_INFO_TTL_SECONDS: int = 3600                  # Arka planda yenileme aralığı
+    EXCHANGE_INFO_CACHE_FILE: str = "exchange_info_cache.json"  # Ortam eki alır (_live / _test)
     
     # --- 💾 Memory Management ---
     MAX_KLINES_PER_SYMBOL: int = 100
@@ -9,19 +9,34 @@ DEĞİŞİKLİKLER:
 """
 
 import asyncio
-import json
-import websockets
 from datetime import datetime, timezone
-import math
 import time
 
+from .kline_buffer import KlineRingBuffer
+from .latency import LatencyTracker
+from .market_data import MarketDataFeed
+from .order_builder import OrderBuilder
+from .pipeline import (CoalescingCandleQueue, SignalQueue, cancel_tasks,
+                       get_strategy_executor, run_strategy)
+from .timeframe_aggregator import timeframe_store
+
 class OptimizedScalpingBot:
-    def __init__(self, settings, binance_client, strategy, firebase_manager):
+    def __init__(self, settings, binance_client, strategy, firebase_manager, market_data=None,
+                 order_builder=None, portfolio=None):
         self.settings = settings
         self.binance_client = binance_client
         self.strategy = strategy
         self.firebase = firebase_manager
         
+        # Paylaşılan combined stream feed (verilmezse bota özel oluşturulur)
+        self._owns_market_data = market_data is None
+        self.market_data = market_data or MarketDataFeed(settings)
+        
+        # Orkestratör altında: emir şablonu, istemci ve portföy limitleri paylaşılır
+        self._owns_order_builder = order_builder is None
+        self.order_builder = order_builder or OrderBuilder(settings, binance_client)
+        self.portfolio = portfolio
+        
         self.status = {
             "is_running": False,
             "symbol": None,
@@ -31,18 +46,24 @@ class OptimizedScalpingBot:
             "failed_trades": 0,
             "total_trades": 0,
             "daily_trades": 0,
+            "last_signal": "HOLD",
             "websocket_connections": 0
         }
         
-        self.klines_1m = []
+        self.klines_1m = KlineRingBuffer(settings.MAX_KLINES_PER_SYMBOL)
+        self.timeframes = None  # start() sembolün TimeframeAggregator'ını bağlar
         self._stop_requested = False
-        self._websocket_1m = None
+        self._subscribed_symbol = None
+        self._candle_queue = None
+        self._signal_queue = None
+        self._stage_tasks = []
+        self._strategy_executor = get_strategy_executor(settings)
+        self.analysis_latency = LatencyTracker(settings.LATENCY_WINDOW)
+        self.late_analyses = 0
+        self._analysis_future = None  # Süresi aşılsa da biten analiz (tampon paylaşılır)
         self._last_trade_time = 0
         self._daily_reset_date = datetime.now(timezone.utc).date()
         
-        self.quantity_precision = 0
-        self.price_precision = 2
-        
         print("=" * 70)
         print("⚡ OPTİMİZE EDİLMİŞ SCALPING BOT")
         print("=" * 70)
@@ -95,24 +116,22 @@ class OptimizedScalpingBot:
             
             # 3. Symbol bilgileri
             print(f"3️⃣ {symbol} bilgileri...")
-            symbol_info = await self.binance_client.get_symbol_info(symbol)
-            if not symbol_info:
+            symbol_meta = await self.binance_client.get_symbol_metadata(symbol)
+            if not symbol_meta:
                 raise Exception(f"{symbol} bilgileri alınamadı")
             
-            self.quantity_precision = self.binance_client._get_precision(
-                symbol_info, 'LOT_SIZE', 'stepSize'
-            )
-            self.price_precision = self.binance_client._get_precision(
-                symbol_info, 'PRICE_FILTER', 'tickSize'
-            )
-            
             # 4. Geçmiş veri
             print(f"4️⃣ Geçmiş veriler...")
-            self.klines_1m = await self.binance_client.get_historical_klines(
+            history = await self.binance_client.get_historical_klines(
                 symbol, "1m", limit=50
             )
+            # 1m tamponu + yerel 3m/5m/15m/1h mumları (diğer bileşenler REST'siz okur)
+            self.timeframes = timeframe_store.get(symbol)
+            self.timeframes.clear()
+            self.timeframes.extend(history)
+            self.klines_1m = self.timeframes.buffer("1m")
             
-            if not self.klines_1m or len(self.klines_1m) < 15:
+            if len(self.klines_1m) < 15:
                 raise Exception("Yetersiz geçmiş veri")
             
             print(f"   ✅ {len(self.klines_1m)} mum yüklendi")
@@ -121,12 +140,15 @@ class OptimizedScalpingBot:
             print(f"5️⃣ Kaldıraç {self.settings.LEVERAGE}x...")
             await self.binance_client.set_leverage(symbol, self.settings.LEVERAGE)
             
+            # Emir şablonu (bakiye / pozisyon / filtreler arka planda güncel tutulur)
+            if not await self.order_builder.prepare(symbol):
+                raise Exception(f"{symbol} emir şablonu hazırlanamadı")
+            
             # 6. WebSocket başlat
             print(f"6️⃣ WebSocket başlatılıyor...")
             self.status["status_message"] = f"⚡ {symbol} AKTIF"
-            self.status["websocket_connections"] = 1
             
-            await self._start_websocket_1m(symbol)
+            await self._run_market_data(symbol)
             
         except Exception as e:
             error_msg = f"❌ Bot başlatma hatası: {e}"
@@ -137,117 +159,158 @@ class OptimizedScalpingBot:
             except:
                 pass
     
-    async def _start_websocket_1m(self, symbol: str):
-        """1 dakikalık WebSocket"""
-        ws_url = f"{self.settings.WEBSOCKET_URL}/ws/{symbol.lower()}@kline_1m"
-        reconnect_attempts = 0
-        max_attempts = 10
+    async def _run_market_data(self, symbol: str):
+        """
+        1 dakikalık kline aboneliği (combined stream) - bot durana kadar
+        
+        Aşamalar: alıcı (feed) → mum kuyruğu → analiz → sinyal kuyruğu → yürütme
+        """
+        self._candle_queue = CoalescingCandleQueue(self.settings.CANDLE_QUEUE_SIZE)
+        self._signal_queue = SignalQueue(
+            self.settings.EXECUTION_QUEUE_SIZE, self.settings.SIGNAL_MAX_AGE_SECONDS
+        )
+        self._stage_tasks = [
+            asyncio.create_task(self._evaluation_loop(symbol)),
+            asyncio.create_task(self._execution_loop())
+        ]
+        
+        await self.market_data.subscribe(symbol, self._handle_websocket_message)
+        self._subscribed_symbol = symbol
+        print(f"🔗 {symbol} kline_1m combined stream'e abone olundu")
+        
+        try:
+            while not self._stop_requested:
+                self.status["websocket_connections"] = self.market_data.connection_count
+                await asyncio.sleep(1)
+        finally:
+            await cancel_tasks(self._stage_tasks)
+        
+        print("🛑 Market data aboneliği kapatıldı")
+    
+    async def _handle_websocket_message(self, symbol: str, data: dict):
+        """WebSocket mesaj işleme - sadece kuyruğa ekler, asla beklemez"""
+        kline_data = data.get('k', {})
         
-        print(f"🔗 WebSocket (1m): {ws_url}")
+        # Sadece kapanan mumları işle
+        if not kline_data.get('x', False):
+            return
         
-        while not self._stop_requested and reconnect_attempts < max_attempts:
+        self._candle_queue.put_nowait(kline_data)
+    
+    async def _evaluation_loop(self, symbol: str):
+        """Analiz aşaması: bekleyen mumları tampona ekle, en sonuncuyu değerlendir"""
+        while not self._stop_requested:
             try:
-                async with websockets.connect(
-                    ws_url,
-                    ping_interval=self.settings.WEBSOCKET_PING_INTERVAL,
-                    ping_timeout=self.settings.WEBSOCKET_PING_TIMEOUT
-                ) as ws:
-                    print(f"✅ WebSocket bağlandı")
-                    reconnect_attempts = 0
-                    self._websocket_1m = ws
-                    
-                    while not self._stop_requested:
-                        try:
-                            message = await asyncio.wait_for(ws.recv(), timeout=65.0)
-                            await self._handle_websocket_message(symbol, message)
-                        except asyncio.TimeoutError:
-                            try:
-                                await ws.ping()
-                            except:
-                                pass
-                        except websockets.exceptions.ConnectionClosed:
-                            break
-                        except Exception as e:
-                            print(f"❌ WebSocket mesaj hatası: {e}")
-                            await asyncio.sleep(1)
+                batch = await self._candle_queue.get_batch()
+                await self._wait_previous_analysis()
+                
+                # Yeni kline'lar (sabit kapasiteli tamponlar, bellek ayırmaz) - üst zaman dilimleri de güncellenir
+                for kline_data in batch:
+                    self.timeframes.add_ws_kline(kline_data)
+                
+                if len(batch) > 1:
+                    print(f"⏩ {symbol}: {len(batch) - 1} mum birleştirildi, son mum analiz ediliyor")
                 
+                await self._evaluate(symbol)
+                
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                if not self._stop_requested:
-                    reconnect_attempts += 1
-                    backoff = min(5 * reconnect_attempts, 30)
-                    print(f"⏳ Yeniden bağlanılıyor... ({backoff}s)")
-                    await asyncio.sleep(backoff)
-        
-        print("🛑 WebSocket kapatıldı")
+                print(f"❌ Mesaj işleme hatası: {e}")
     
-    async def _handle_websocket_message(self, symbol: str, message: str):
-        """WebSocket mesaj işleme"""
+    async def _evaluate(self, symbol: str):
+        """Kapanan mum için strateji kararı ver, sinyali yürütme kuyruğuna at"""
+        print(f"\n🕐 {symbol} MUM KAPANDI - Analiz başlıyor...")
+        
+        # Günlük limit kontrolü
+        self._check_daily_reset()
+        if self.status["daily_trades"] >= self.settings.MAX_DAILY_TRADES:
+            print(f"⚠️ Günlük trade limiti aşıldı: {self.status['daily_trades']}/{self.settings.MAX_DAILY_TRADES}")
+            return
+        if self.portfolio and not self.portfolio.can_trade():
+            print(f"⚠️ {symbol}: Portföy günlük trade bütçesi doldu")
+            return
+        
+        # Cooldown kontrolü
+        current_time = time.time()
+        cooldown_remaining = self.settings.TRADE_COOLDOWN_SECONDS - (current_time - self._last_trade_time)
+        
+        if cooldown_remaining > 0:
+            print(f"⏳ Cooldown aktif: {int(cooldown_remaining)}s kaldı")
+            return
+        
+        # Strateji analizi (yürütücüde; tampon bu sırada değişmez)
+        started = time.perf_counter()
+        self._analysis_future = asyncio.ensure_future(
+            run_strategy(self._strategy_executor, self.strategy, self.klines_1m, symbol)
+        )
+        self._analysis_future.add_done_callback(
+            lambda _, started=started: self._record_analysis_latency(symbol, time.perf_counter() - started)
+        )
         try:
-            data = json.loads(message)
-            kline_data = data.get('k', {})
-            
-            # Sadece kapanan mumları işle
-            if not kline_data.get('x', False):
-                return
-            
-            print(f"\n🕐 {symbol} MUM KAPANDI - Analiz başlıyor...")
-            
-            # Günlük limit kontrolü
-            self._check_daily_reset()
-            if self.status["daily_trades"] >= self.settings.MAX_DAILY_TRADES:
-                print(f"⚠️ Günlük trade limiti aşıldı: {self.status['daily_trades']}/{self.settings.MAX_DAILY_TRADES}")
-                return
-            
-            # Yeni kline ekle
-            new_kline = [
-                int(kline_data['t']),
-                float(kline_data['o']),
-                float(kline_data['h']),
-                float(kline_data['l']),
-                float(kline_data['c']),
-                float(kline_data['v']),
-                int(kline_data['T']),
-                float(kline_data['q']),
-                int(kline_data['n']),
-                float(kline_data['V']),
-                float(kline_data['Q']),
-                '0'
-            ]
-            
-            # Memory management
-            if len(self.klines_1m) >= 100:
-                self.klines_1m.pop(0)
-            
-            self.klines_1m.append(new_kline)
-            
-            # Cooldown kontrolü
-            current_time = time.time()
-            cooldown_remaining = self.settings.TRADE_COOLDOWN_SECONDS - (current_time - self._last_trade_time)
-            
-            if cooldown_remaining > 0:
-                print(f"⏳ Cooldown aktif: {int(cooldown_remaining)}s kaldı")
-                return
-            
-            # Strateji analizi
-            analysis = self.strategy.analyze_and_calculate_levels(
-                self.klines_1m, symbol
+            # Bütçe dolunca beklemeyi bırak; analiz arka planda biter, sonucu kullanılmaz
+            analysis = await asyncio.wait_for(
+                asyncio.shield(self._analysis_future), timeout=self.settings.ANALYSIS_DEADLINE_SECONDS
             )
-            
-            if not analysis or not analysis.get('should_trade', False):
-                print(f"⚠️ {symbol}: Trade sinyali yok")
-                return
-            
-            # Momentum kontrolü
-            if analysis.get('momentum', 0) < self.settings.MIN_MOMENTUM_PERCENT:
-                print(f"⚠️ {symbol}: Yetersiz momentum (%{analysis.get('momentum', 0)*100:.3f})")
-                return
-            
-            # Pozisyon aç
-            await self._open_position(symbol, analysis)
-            self._last_trade_time = current_time
-            
-        except Exception as e:
-            print(f"❌ Mesaj işleme hatası: {e}")
+        except asyncio.TimeoutError:
+            self.late_analyses += 1
+            print(f"⌛ {symbol}: Analiz bütçeyi aştı ({self.settings.ANALYSIS_DEADLINE_SECONDS*1000:.0f}ms), sonuç düşürüldü")
+            return
+        
+        if not analysis or not analysis.get('should_trade', False):
+            self.status["last_signal"] = "HOLD"
+            print(f"⚠️ {symbol}: Trade sinyali yok")
+            return
+        self.status["last_signal"] = analysis['signal']
+        
+        # Momentum kontrolü
+        if analysis.get('momentum', 0) < self.settings.MIN_MOMENTUM_PERCENT:
+            print(f"⚠️ {symbol}: Yetersiz momentum (%{analysis.get('momentum', 0)*100:.3f})")
+            return
+        
+        # Yürütme aşamasına devret
+        if self._signal_queue.put_nowait(symbol, analysis):
+            self._last_trade_time = time.time()
+        else:
+            print(f"⚠️ {symbol}: Bekleyen emir var, sinyal atlandı")
+    
+    async def _execution_loop(self):
+        """Yürütme aşaması: sinyalleri sırayla pozisyona çevir"""
+        while not self._stop_requested:
+            symbol, analysis, waited = await self._signal_queue.get()
+            try:
+                await self.execute_signal(symbol, analysis)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ {symbol} yürütme hatası: {e}")
+            finally:
+                self._signal_queue.done(symbol)
+    
+    def _record_analysis_latency(self, symbol: str, elapsed: float):
+        self.analysis_latency.record(f"strategy:{type(self.strategy).__name__}", elapsed)
+        self.analysis_latency.record(f"symbol:{symbol}", elapsed)
+    
+    async def _wait_previous_analysis(self):
+        """Süresi aşılmış analiz hâlâ çalışıyorsa bitmesini bekle (tampon ve motorlar paylaşılır)"""
+        future = self._analysis_future
+        if future is not None and not future.done():
+            try:
+                await future
+            except Exception:
+                pass
+    
+    async def execute_signal(self, symbol: str, analysis: dict) -> bool:
+        """Sinyali yürüt - günlük limit / portföy bütçesi burada da kontrol edilir (shard geçidi de kullanır)"""
+        self._check_daily_reset()
+        if self.status["daily_trades"] >= self.settings.MAX_DAILY_TRADES:
+            print(f"⚠️ {symbol}: Günlük trade limiti aşıldı: {self.status['daily_trades']}/{self.settings.MAX_DAILY_TRADES}")
+            return False
+        if self.portfolio and not self.portfolio.can_trade():
+            print(f"⚠️ {symbol}: Portföy günlük trade bütçesi doldu")
+            return False
+        await self._open_position(symbol, analysis)
+        return True
     
     def _check_daily_reset(self):
         """Günlük sayacı resetle"""
@@ -278,19 +341,7 @@ class OptimizedScalpingBot:
                 self.status["daily_trades"] += 1
                 return
             
-            # Bakiye kontrolü ve pozisyon boyutu
-            balance = await self.binance_client.get_account_balance()
-            position_size = self.settings.calculate_position_size(balance)
-            
-            if position_size == 0:
-                print(f"❌ Yetersiz bakiye: {balance} USDT")
-                return
-            
-            print(f"💰 Bakiye: {balance:.2f} USDT")
-            print(f"💼 Pozisyon Boyutu: {position_size} USDT")
-            
-            # ÖNEMLİ: Açık pozisyon kontrolü
-            print(f"🔍 {symbol} açık pozisyon kontrolü...")
+            # ÖNEMLİ: Açık pozisyon kontrolü (emir defteri canlıysa REST çağrısı yok)
             open_positions = await self.binance_client.get_open_positions(symbol)
             if open_positions:
                 print(f"⚠️ {symbol} için zaten açık pozisyon var!")
@@ -299,38 +350,34 @@ class OptimizedScalpingBot:
                 print(f"   PnL: {float(open_positions[0]['unRealizedProfit']):.2f} USDT")
                 return
             
-            # Quantity hesapla
+            # Hazır emir planı (bakiye, filtre ve kaldıraç önceden yüklü)
+            signal = analysis['signal']
             entry_price = analysis['entry_price']
-            quantity = (position_size * self.settings.LEVERAGE) / entry_price
+            plan = self.order_builder.build(
+                symbol, signal, entry_price, analysis['tp_percent'], analysis['sl_percent']
+            )
+            if plan is None:
+                return
             
-            # Precision uygula
-            if self.quantity_precision == 0:
-                quantity = math.floor(quantity)
-            else:
-                factor = 10 ** self.quantity_precision
-                quantity = math.floor(quantity * factor) / factor
+            side = plan['side']
+            quantity = plan['quantity']
+            position_size = plan['position_size']
+            print(f"💼 Pozisyon Boyutu: {position_size} USDT | 📊 Quantity: {quantity} ({self.order_builder.last_build_us:.0f}µs)")
             
-            if quantity <= 0:
-                print(f"❌ Quantity çok düşük: {quantity}")
+            # Portföy limitleri (eşzamanlı pozisyon, toplam marjin, ortak günlük bütçe)
+            if self.portfolio and not await self.portfolio.reserve(symbol, position_size, self.order_builder.balance):
                 return
             
-            print(f"📊 Quantity: {quantity}")
-            
             # Pozisyon aç (TP/SL ile)
-            signal = analysis['signal']
-            side = 'BUY' if signal == 'LONG' else 'SELL'
-            
-            result = await self.binance_client.create_position_with_tpsl(
-                symbol=symbol,
-                side=side,
-                quantity=quantity,
-                entry_price=entry_price,
-                price_precision=self.price_precision,
-                tp_percent=analysis['tp_percent'],
-                sl_percent=analysis['sl_percent']
-            )
+            result = None
+            try:
+                result = await self.binance_client.execute_order_plan(plan)
+            finally:
+                if self.portfolio:
+                    self.portfolio.release(symbol, filled=bool(result and 'orderId' in result))
             
             if result and 'orderId' in result:
+                self.order_builder.mark_open(symbol)
                 self.status["successful_trades"] += 1
                 print(f"✅ {signal} POZİSYON BAŞARILI!")
                 
@@ -378,8 +425,21 @@ class OptimizedScalpingBot:
             "failed_trades": self.status["failed_trades"],
             "total_trades": self.status["total_trades"],
             "daily_trades": self.status["daily_trades"],
+            "last_signal": self.status["last_signal"],
             "win_rate": f"{(self.status['successful_trades']/max(self.status['total_trades'],1)*100):.1f}%",
             "websocket_connections": self.status["websocket_connections"],
+            "pipeline": {
+                "candles": self._candle_queue.get_stats() if self._candle_queue is not None else None,
+                "signals": self._signal_queue.get_stats() if self._signal_queue is not None else None
+            },
+            "analysis": {
+                "executor": self.settings.STRATEGY_EXECUTOR,
+                "deadline_ms": self.settings.ANALYSIS_DEADLINE_SECONDS * 1000,
+                "late_dropped": self.late_analyses,
+                "latency": self.analysis_latency.get_status()
+            },
+            "order_builder": self.order_builder.get_status(),
+            "order_book": self.binance_client.order_book.get_status(),
             "config": {
                 "timeframe": "1m",
                 "position_size": f"%{self.settings.BALANCE_USAGE_PERCENT*100:.0f} bakiye",
@@ -395,11 +455,25 @@ class OptimizedScalpingBot:
         """Bot durdurma"""
         self._stop_requested = True
         
-        if self._websocket_1m:
+        if self._subscribed_symbol:
             try:
-                await self._websocket_1m.close()
+                await self.market_data.unsubscribe(
+                    self._subscribed_symbol, self._handle_websocket_message
+                )
             except:
                 pass
+            self._subscribed_symbol = None
+        
+        if self._owns_market_data:
+            try:
+                await self.market_data.stop()
+            except:
+                pass
+        
+        if self._owns_order_builder:
+            await self.order_builder.stop()
+        elif self.status["symbol"]:
+            self.order_builder.forget(self.status["symbol"])
         
         self.status.update({
             "is_running": False,
@@ -409,6 +483,8 @@ class OptimizedScalpingBot:
         })
         
         print("🛑 Optimized Bot durduruldu")
+        if self.portfolio:
+            return  # Paylaşılan istemciyi orkestratör kapatır
         try:
             await self.binance_client.close()
         except:
@@ -420,8 +496,10 @@ class OptimizedScalpingBot:
 fast_scalping_bot = None  # Bot başlatıldığında doldurulacak
 
 
-def create_bot(settings, binance_client, strategy, firebase_manager):
+def create_bot(settings, binance_client, strategy, firebase_manager, market_data=None):
     """Bot instance'ı oluştur"""
     global fast_scalping_bot
-    fast_scalping_bot = OptimizedScalpingBot(settings, binance_client, strategy, firebase_manager)
+    fast_scalping_bot = OptimizedScalpingBot(
+        settings, binance_client, strategy, firebase_manager, market_data
+    )
     return fast_scalping_bot
@@ -1,11 +1,13 @@
 # app/fast_scalping_strategy.py - HIZLI SCALPING STRATEJİSİ
 # 30 saniye ve 1 dakika - Sürekli kar al-sat
 
-import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 from datetime import datetime
 
+from .indicators import EMA, IndicatorEngine, Lag
+from .kline_buffer import as_kline_buffer
+
 class FastScalpingStrategy:
     """
     ⚡ HIZLI SCALPING STRATEJİSİ
@@ -32,12 +34,15 @@ class FastScalpingStrategy:
         self.analysis_count = 0
         self.signal_count = 0
         
+        # Sembol başına artımlı indikatör motorları
+        self._engines: Dict[str, IndicatorEngine] = {}
+        
         print("⚡ HIZLI SCALPING STRATEJİSİ AKTIF")
         print(f"   EMA: {self.ema_fast}/{self.ema_slow}")
         print(f"   TP: %{self.tp_percent*100:.2f} | SL: %{self.sl_percent*100:.2f}")
         print("   FİLTRE: YOK - SÜREKLI TRADE!")
     
-    def analyze_and_calculate_levels(self, klines: list, symbol: str = "UNKNOWN") -> Optional[Dict]:
+    def analyze_and_calculate_levels(self, klines, symbol: str = "UNKNOWN") -> Optional[Dict]:
         """
         ⚡ Hızlı analiz ve seviye hesaplama
         
@@ -58,33 +63,23 @@ class FastScalpingStrategy:
             return None
         
         try:
-            # DataFrame hazırla
-            df = self._prepare_dataframe(klines)
-            if df is None or len(df) < 15:
-                return None
-            
-            # EMA hesapla
-            df['ema_fast'] = df['close'].ewm(span=self.ema_fast, adjust=False).mean()
-            df['ema_slow'] = df['close'].ewm(span=self.ema_slow, adjust=False).mean()
+            # Artımlı EMA'lar - sadece yeni mumlar işlenir
+            buffer = as_kline_buffer(klines)
+            engine = self._get_engine(symbol)
+            engine.sync(buffer)
             
-            # NaN temizle
-            df = df.dropna().copy()
-            if len(df) < 2:
+            if engine.count < 15 or engine.value('close_lag_4') is None:
                 return None
             
-            # Son değerler
-            last_row = df.iloc[-1]
-            prev_row = df.iloc[-2]
+            current_price = engine.last_bar['close']  # İndikatörlerle aynı mum
+            ema_fast_current = engine['ema_fast'].value
+            ema_slow_current = engine['ema_slow'].value
             
-            current_price = float(last_row['close'])
-            ema_fast_current = float(last_row['ema_fast'])
-            ema_slow_current = float(last_row['ema_slow'])
-            
-            ema_fast_prev = float(prev_row['ema_fast'])
-            ema_slow_prev = float(prev_row['ema_slow'])
+            ema_fast_prev = engine['ema_fast'].prev
+            ema_slow_prev = engine['ema_slow'].prev
             
             # Momentum hesapla
-            momentum = abs(current_price - float(df['close'].iloc[-5])) / current_price
+            momentum = abs(current_price - engine.value('close_lag_4')) / current_price
             
             # Sinyal belirleme - Basit EMA cross
             bullish = ema_fast_current > ema_slow_current
@@ -132,26 +127,17 @@ class FastScalpingStrategy:
             print(f"❌ {symbol} analiz hatası: {e}")
             return None
     
-    def _prepare_dataframe(self, klines: list) -> Optional[pd.DataFrame]:
-        """Kline verilerini DataFrame'e çevir"""
-        try:
-            klines_data = []
-            for kline in klines:
-                close_price = float(kline[4])
-                if close_price > 0 and not (np.isnan(close_price) or np.isinf(close_price)):
-                    klines_data.append({'close': close_price})
-            
-            if not klines_data or len(klines_data) < 10:
-                return None
-            
-            df = pd.DataFrame(klines_data)
-            df = df[df['close'] > 0].copy()
-            
-            return df if len(df) >= 10 else None
-            
-        except Exception as e:
-            print(f"❌ DataFrame hatası: {e}")
-            return None
+    def _get_engine(self, symbol: str) -> IndicatorEngine:
+        """Sembol için indikatör motoru"""
+        engine = self._engines.get(symbol)
+        if engine is None:
+            engine = IndicatorEngine({
+                'ema_fast': EMA(self.ema_fast),
+                'ema_slow': EMA(self.ema_slow),
+                'close_lag_4': Lag(4),
+            })
+            self._engines[symbol] = engine
+        return engine
     
     def get_status(self) -> Dict:
         """Strateji durumu"""
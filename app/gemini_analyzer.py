@@ -1,10 +1,39 @@
 import os
 import asyncio
 import google.generativeai as genai
-from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 import json
 
+from .config import settings
+from .gemini_guard import CircuitOpenError, gemini_guard
+from .prompt_compiler import SCALPING_SYSTEM_INSTRUCTION, compile_scalping_prompt
+from .ttl_cache import TTLCache, context_hash
+
+# Structured output: model yanıtı doğrudan bu şemaya uyan JSON olur
+DECISION_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "should_trade": {"type": "BOOLEAN"},
+        "signal": {"type": "STRING", "description": "LONG, SHORT veya HOLD"},
+        "confidence": {"type": "NUMBER"},
+        "stop_loss_percent": {"type": "NUMBER"},
+        "take_profit_percent": {"type": "NUMBER"},
+        "reasoning": {"type": "STRING"},
+        "risk_score": {"type": "NUMBER"}
+    },
+    "required": ["should_trade", "signal", "confidence", "stop_loss_percent",
+                 "take_profit_percent", "reasoning", "risk_score"]
+}
+
+BATCH_DECISION_SCHEMA = {
+    "type": "ARRAY",
+    "items": {
+        "type": "OBJECT",
+        "properties": {"symbol": {"type": "STRING"}, **DECISION_SCHEMA["properties"]},
+        "required": ["symbol"] + DECISION_SCHEMA["required"]
+    }
+}
+
 class GeminiAnalyzer:
     """
     🤖 Gemini 2.0 Flash AI Trading Analyzer
@@ -15,6 +44,22 @@ class GeminiAnalyzer:
     """
     
     def __init__(self):
+        # Piyasa bağlamı özetiyle anahtarlanan sınırlı cache (AI kapalıyken de mevcut)
+        self.cache = TTLCache(
+            settings.GEMINI_CACHE_MAX_ENTRIES,
+            settings.GEMINI_CACHE_TTL_SECONDS,
+            settings.GEMINI_CACHE_FILE
+        )
+        
+        # Mum kapanışında biriken istekler tek batch prompt'ta gönderilir
+        self._batch_pending: List[tuple] = []
+        self._batch_timer: Optional[asyncio.TimerHandle] = None
+        self.batches_sent = 0
+        self.batched_symbols = 0
+        
+        # Cache dosyası her yeni kayıtta değil, zamanlayıcıyla / kapanışta yazılır
+        self._cache_save_task: Optional[asyncio.Task] = None
+        
         self.api_key = os.getenv("GEMINI_API_KEY")
         if not self.api_key:
             print("⚠️ GEMINI_API_KEY bulunamadı. AI analizi devre dışı.")
@@ -24,13 +69,17 @@ class GeminiAnalyzer:
         genai.configure(api_key=self.api_key)
         
         # Gemini 2.0 Flash model - en hızlı ve uygun maliyetli
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        # Sabit kurallar system instruction'da, istekte sadece veri tablosu
+        self.model = genai.GenerativeModel(
+            'gemini-2.0-flash-exp', system_instruction=SCALPING_SYSTEM_INSTRUCTION
+        )
         
         self.enabled = True
-        self.cache = {}  # Response cache
-        self.cache_duration = 60  # 60 saniye cache
+        loaded = self.cache.load()
         
         print("🤖 Gemini 2.0 Flash AI Analyzer aktif")
+        if loaded:
+            print(f"🗃️ Gemini cache dosyadan yüklendi ({loaded} kayıt)")
     
     async def analyze_scalping_opportunity(
         self, 
@@ -59,13 +108,6 @@ class GeminiAnalyzer:
         if not self.enabled:
             return self._fallback_analysis(ema_signal)
         
-        # Cache kontrolü
-        cache_key = f"{symbol}_{int(datetime.now().timestamp() / 60)}"
-        if cache_key in self.cache:
-            cached = self.cache[cache_key]
-            if (datetime.now() - cached['timestamp']).seconds < self.cache_duration:
-                return cached['result']
-        
         try:
             # Market verilerini hazırla
             market_context = self._prepare_market_context(
@@ -73,28 +115,36 @@ class GeminiAnalyzer:
                 ema_signal, volume_data
             )
             
+            # Cache kontrolü (aynı bağlam → aynı yanıt, sembolden bağımsız)
+            cache_key = context_hash(self._cache_context(market_context))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return dict(cached)
+            
             # Gemini'ye sorgu gönder
             prompt = self._build_scalping_prompt(market_context)
             
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            # Sınırlı havuz + süre sınırı + devre kesici
+            response_text = await gemini_guard.generate(
+                self.model,
                 prompt,
-                generation_config={
+                {
                     "temperature": 0.3,  # Düşük temperature = daha tutarlı
                     "top_p": 0.8,
                     "top_k": 40,
                     "max_output_tokens": 1024,
-                }
+                    "response_mime_type": "application/json",
+                    "response_schema": DECISION_SCHEMA,
+                },
+                name="scalping"
             )
             
             # Response'u parse et
-            analysis = self._parse_gemini_response(response.text)
+            analysis = self._parse_gemini_response(response_text)
             
             # Cache'e kaydet
-            self.cache[cache_key] = {
-                'timestamp': datetime.now(),
-                'result': analysis
-            }
+            self.cache.set(cache_key, analysis)
+            self._schedule_cache_save()
             
             # Sonuçları logla
             if analysis['confidence'] > 70:
@@ -105,10 +155,142 @@ class GeminiAnalyzer:
             
             return analysis
             
+        except CircuitOpenError:
+            return self._fallback_analysis(ema_signal)
         except Exception as e:
             print(f"❌ Gemini analiz hatası: {e}")
             return self._fallback_analysis(ema_signal)
     
+    # ===================== BATCH ANALİZ =====================
+    async def analyze_batch(self, requests: List[Dict]) -> Dict[str, Dict]:
+        """
+        📦 Çok sembollü analiz - GEMINI_BATCH_SIZE sembol başına tek Gemini çağrısı
+        
+        requests: analyze_scalping_opportunity argümanlarıyla aynı anahtarlara sahip dict listesi
+        Returns: {symbol: analiz}
+        """
+        contexts = {}
+        for request in requests:
+            contexts[request['symbol']] = (
+                self._prepare_market_context(
+                    request['symbol'], request['current_price'], request['klines_1m'],
+                    request['klines_5m'], request['ema_signal'], request['volume_data']
+                ),
+                request['ema_signal']
+            )
+        return await self._analyze_contexts(contexts)
+    
+    async def analyze_scalping_batched(
+        self,
+        symbol: str,
+        current_price: float,
+        klines_1m: List,
+        klines_5m: List,
+        ema_signal: str,
+        volume_data: Dict
+    ) -> Dict:
+        """
+        analyze_scalping_opportunity ile aynı sonuç; aynı anda gelen çağrılar
+        GEMINI_BATCH_WINDOW_SECONDS içinde toplanıp tek prompt'ta gönderilir
+        """
+        if not self.enabled:
+            return self._fallback_analysis(ema_signal)
+        
+        context = self._prepare_market_context(
+            symbol, current_price, klines_1m, klines_5m, ema_signal, volume_data
+        )
+        future = asyncio.get_running_loop().create_future()
+        self._batch_pending.append((symbol, context, ema_signal, future))
+        
+        if len(self._batch_pending) >= settings.GEMINI_BATCH_SIZE:
+            self._flush_batch()
+        elif self._batch_timer is None:
+            self._batch_timer = asyncio.get_running_loop().call_later(
+                settings.GEMINI_BATCH_WINDOW_SECONDS, self._flush_batch
+            )
+        return await future
+    
+    def _flush_batch(self):
+        if self._batch_timer is not None:
+            self._batch_timer.cancel()
+            self._batch_timer = None
+        pending, self._batch_pending = self._batch_pending, []
+        if pending:
+            asyncio.create_task(self._run_batch(pending))
+    
+    async def _run_batch(self, pending: List[tuple]):
+        """Toplanan istekleri analiz et, sonuçları bekleyen çağıranlara dağıt"""
+        contexts = {symbol: (context, ema_signal) for symbol, context, ema_signal, _ in pending}
+        try:
+            results = await self._analyze_contexts(contexts)
+        except Exception as e:
+            print(f"❌ Gemini batch hatası: {e}")
+            results = {}
+        for symbol, _, ema_signal, future in pending:
+            if not future.done():
+                future.set_result(results.get(symbol) or self._fallback_analysis(ema_signal))
+    
+    async def _analyze_contexts(self, contexts: Dict[str, tuple]) -> Dict[str, Dict]:
+        """{symbol: (context, ema_signal)} → {symbol: analiz}; cache + GEMINI_BATCH_SIZE'lık parçalar"""
+        results = {}
+        misses = {}  # cache anahtarı → semboller (aynı bağlam bir kez sorulur)
+        for symbol, (context, ema_signal) in contexts.items():
+            if not self.enabled:
+                results[symbol] = self._fallback_analysis(ema_signal)
+                continue
+            cache_key = context_hash(self._cache_context(context))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                results[symbol] = dict(cached)
+            else:
+                misses.setdefault(cache_key, []).append(symbol)
+        
+        keys = list(misses)
+        chunks = [keys[i:i + settings.GEMINI_BATCH_SIZE] for i in range(0, len(keys), settings.GEMINI_BATCH_SIZE)]
+        
+        async def run_chunk(chunk_keys):
+            batch = {misses[key][0]: contexts[misses[key][0]][0] for key in chunk_keys}
+            try:
+                response_text = await gemini_guard.generate(
+                    self.model,
+                    self._build_batch_prompt(list(batch.values())),
+                    {
+                        "temperature": 0.3,
+                        "top_p": 0.8,
+                        "top_k": 40,
+                        "max_output_tokens": 256 * len(batch),
+                        "response_mime_type": "application/json",
+                        "response_schema": BATCH_DECISION_SCHEMA,
+                    },
+                    name="scalping_batch"
+                )
+                self.batches_sent += 1
+                self.batched_symbols += len(batch)
+                decisions = self._parse_batch_response(response_text, list(batch))
+            except CircuitOpenError:
+                decisions = None
+            except Exception as e:
+                print(f"❌ Gemini batch analiz hatası: {e}")
+                decisions = None
+            
+            for key in chunk_keys:
+                analysis = decisions.get(misses[key][0]) if decisions is not None else None
+                if analysis is not None:
+                    analysis.pop('symbol', None)
+                    self.cache.set(key, analysis)
+                for symbol in misses[key]:
+                    if analysis is not None:
+                        results[symbol] = dict(analysis)
+                    elif decisions is not None:
+                        results[symbol] = self._parse_error_analysis()  # Yanıtta yok / geçersiz
+                    else:
+                        results[symbol] = self._fallback_analysis(contexts[symbol][1])
+        
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        if chunks:
+            self._schedule_cache_save()
+        return results
+    
     def _prepare_market_context(
         self,
         symbol: str,
@@ -163,108 +345,102 @@ class GeminiAnalyzer:
             'trend_strength': abs(price_change_1m)
         }
     
+    def _cache_context(self, context: Dict) -> Dict:
+        """Cache anahtarı için yuvarlanmış bağlam (sembol ve mutlak fiyat hariç)"""
+        price = context['current_price'] or 1.0
+        return {
+            'timeframe': context['timeframe'],
+            'ema_signal': context['ema_signal'],
+            'price_change_1m': round(context['price_change_1m'], 2),
+            'volume_ratio': round(context['volume_ratio'], 1),
+            'volatility_percent': round(context['volatility_percent'], 2),
+            # Mumlar güncel fiyata göre yüzde olarak
+            'candles': [
+                [round((candle[field] - price) / price * 100, 2) for field in ('open', 'high', 'low', 'close')]
+                for candle in context['latest_candles']
+            ]
+        }
+    
     def _build_scalping_prompt(self, context: Dict) -> str:
-        """AI için optimized prompt oluştur"""
+        """Kompakt sayısal tablo - kurallar system instruction'da"""
+        return compile_scalping_prompt([context])
+    
+    def _extract_json(self, response_text: str) -> str:
+        """Yanıttan JSON metnini çıkar (markdown kod bloğu içinde olabilir)"""
+        if '```json' in response_text:
+            json_start = response_text.find('```json') + 7
+            json_end = response_text.find('```', json_start)
+            return response_text[json_start:json_end].strip()
+        elif '```' in response_text:
+            json_start = response_text.find('```') + 3
+            json_end = response_text.find('```', json_start)
+            return response_text[json_start:json_end].strip()
+        return response_text.strip()
+    
+    def _validate_analysis(self, analysis: Dict) -> Dict:
+        """Zorunlu alanlar + değer aralıkları (hatalıysa ValueError)"""
+        required_keys = ['should_trade', 'signal', 'confidence', 
+                       'stop_loss_percent', 'take_profit_percent',
+                       'reasoning', 'risk_score']
         
-        prompt = f"""
-Siz bir profesyonel cryptocurrency scalping uzmanısınız. 1 dakikalık mum verilerini analiz edip hızlı alım-satım kararı veriyorsunuz.
-
-## MARKET VERİLERİ
-Symbol: {context['symbol']}
-Güncel Fiyat: ${context['current_price']}
-Son 1dk Değişim: %{context['price_change_1m']:.2f}
-Volume Oranı: {context['volume_ratio']:.2f}x (1=normal, >1.5=yüksek)
-Volatilite: %{context['volatility_percent']:.3f}
-EMA Cross Sinyali: {context['ema_signal']}
-
-## SON 5 MUM (1 Dakikalık)
-"""
-        for i, candle in enumerate(context['latest_candles'], 1):
-            body_size = abs(candle['close'] - candle['open'])
-            body_pct = (body_size / candle['open'] * 100) if candle['open'] > 0 else 0
-            candle_type = "🟢 Bullish" if candle['close'] > candle['open'] else "🔴 Bearish"
-            
-            prompt += f"""
-{i}. {candle_type} | O:{candle['open']:.2f} H:{candle['high']:.2f} L:{candle['low']:.2f} C:{candle['close']:.2f} | Body:%{body_pct:.2f}
-"""
-
-        prompt += f"""
-
-## SCALPING KURALLARI
-1. **Güvenli Giriş**: Trend net olmalı, volume yüksek olmalı
-2. **Hızlı Çıkış**: TP: %0.3-0.5, SL: %0.2-0.3 (sıkı)
-3. **Risk Yönetimi**: Risk/Reward minimum 1:1.5
-4. **Volume Konfirmasyonu**: Volume ratio >1.3 olmalı
-5. **Volatilite**: %0.1-0.3 arası ideal (çok düşük veya yüksek riskli)
-
-## KARAR VERİN
-Aşağıdaki JSON formatında yanıt verin (sadece JSON, açıklama yok):
-
-{{
-  "should_trade": true/false,
-  "signal": "LONG" veya "SHORT" veya "HOLD",
-  "confidence": 0-100 arası güven skoru,
-  "stop_loss_percent": 0.2-0.5 arası,
-  "take_profit_percent": 0.3-0.8 arası,
-  "reasoning": "Kısa açıklama (max 100 karakter)",
-  "risk_score": 0-10 arası (0=çok güvenli, 10=çok riskli)
-}}
-
-ÖNEMLİ: 
-- Volume düşükse (ratio <1.2) HOLD deyin
-- Volatilite çok yüksekse (>0.5%) HOLD deyin
-- Trend belirsizse confidence <60 olmalı
-- should_trade sadece confidence >75 ise true olmalı
-"""
-        return prompt
+        for key in required_keys:
+            if key not in analysis:
+                raise ValueError(f"Missing key: {key}")
+        
+        # Değer kontrolü
+        analysis['confidence'] = max(0, min(100, float(analysis['confidence'])))
+        analysis['risk_score'] = max(0, min(10, float(analysis['risk_score'])))
+        analysis['stop_loss_percent'] = max(0.1, min(1.0, float(analysis['stop_loss_percent'])))
+        analysis['take_profit_percent'] = max(0.2, min(2.0, float(analysis['take_profit_percent'])))
+        
+        return analysis
+    
+    def _parse_error_analysis(self) -> Dict:
+        return {
+            'should_trade': False,
+            'signal': 'HOLD',
+            'confidence': 0,
+            'stop_loss_percent': 0.3,
+            'take_profit_percent': 0.5,
+            'reasoning': 'Parse error',
+            'risk_score': 10
+        }
+    
+    def _build_batch_prompt(self, contexts: List[Dict]) -> str:
+        """Birden çok sembol için tek tablo - JSON dizisi döner"""
+        return compile_scalping_prompt(contexts)
     
     def _parse_gemini_response(self, response_text: str) -> Dict:
         """Gemini yanıtını parse et"""
         try:
-            # JSON'ı bul (markdown kod bloğu içinde olabilir)
-            if '```json' in response_text:
-                json_start = response_text.find('```json') + 7
-                json_end = response_text.find('```', json_start)
-                json_str = response_text[json_start:json_end].strip()
-            elif '```' in response_text:
-                json_start = response_text.find('```') + 3
-                json_end = response_text.find('```', json_start)
-                json_str = response_text[json_start:json_end].strip()
-            else:
-                json_str = response_text.strip()
-            
-            # JSON parse
-            analysis = json.loads(json_str)
-            
-            # Validasyon
-            required_keys = ['should_trade', 'signal', 'confidence', 
-                           'stop_loss_percent', 'take_profit_percent',
-                           'reasoning', 'risk_score']
-            
-            for key in required_keys:
-                if key not in analysis:
-                    raise ValueError(f"Missing key: {key}")
-            
-            # Değer kontrolü
-            analysis['confidence'] = max(0, min(100, float(analysis['confidence'])))
-            analysis['risk_score'] = max(0, min(10, float(analysis['risk_score'])))
-            analysis['stop_loss_percent'] = max(0.1, min(1.0, float(analysis['stop_loss_percent'])))
-            analysis['take_profit_percent'] = max(0.2, min(2.0, float(analysis['take_profit_percent'])))
-            
-            return analysis
+            return self._validate_analysis(json.loads(self._extract_json(response_text)))
             
         except Exception as e:
             print(f"❌ Gemini response parse hatası: {e}")
             print(f"Response: {response_text[:200]}")
-            return {
-                'should_trade': False,
-                'signal': 'HOLD',
-                'confidence': 0,
-                'stop_loss_percent': 0.3,
-                'take_profit_percent': 0.5,
-                'reasoning': 'Parse error',
-                'risk_score': 10
-            }
+            return self._parse_error_analysis()
+    
+    def _parse_batch_response(self, response_text: str, symbols: List[str]) -> Dict[str, Dict]:
+        """JSON dizisini sembol bazlı kararlara ayır (her kayıt tekil kurallarla doğrulanır, geçersizler atlanır)"""
+        results = {}
+        try:
+            entries = json.loads(self._extract_json(response_text))
+            if not isinstance(entries, list):
+                raise ValueError("JSON array bekleniyordu")
+        except Exception as e:
+            print(f"❌ Gemini batch parse hatası: {e}")
+            print(f"Response: {response_text[:200]}")
+            entries = []
+        
+        for entry in entries:
+            symbol = entry.get('symbol') if isinstance(entry, dict) else None
+            if symbol not in symbols or symbol in results:
+                continue
+            try:
+                results[symbol] = self._validate_analysis(entry)
+            except Exception as e:
+                print(f"❌ {symbol} batch kaydı geçersiz: {e}")
+        return results
     
     def _fallback_analysis(self, ema_signal: str) -> Dict:
         """AI olmadan basit analiz"""
@@ -278,10 +454,51 @@ Aşağıdaki JSON formatında yanıt verin (sadece JSON, açıklama yok):
             'risk_score': 5
         }
     
-    def clear_cache(self):
+    def _schedule_cache_save(self):
+        """Bekleyen yazım yoksa GEMINI_CACHE_SAVE_SECONDS sonra tek yazım planla"""
+        if self._cache_save_task is None or self._cache_save_task.done():
+            self._cache_save_task = asyncio.create_task(self._save_cache_later())
+    
+    async def _save_cache_later(self):
+        await asyncio.sleep(settings.GEMINI_CACHE_SAVE_SECONDS)
+        await self.cache.save_async()
+    
+    async def flush_cache(self):
+        """Kapanışta bekleyen kayıtları hemen diske yaz"""
+        if self._cache_save_task and not self._cache_save_task.done():
+            self._cache_save_task.cancel()
+        self._cache_save_task = None
+        if self.cache.dirty:
+            await self.cache.save_async()
+    
+    async def clear_cache(self):
         """Cache temizle"""
-        self.cache.clear()
+        await self.cache.clear()
         print("🧹 Gemini cache temizlendi")
+    
+    def get_status(self) -> Dict:
+        """AI durumu + cache istatistikleri"""
+        status = {
+            'ai_enabled': self.enabled,
+            'provider': 'Gemini 2.0 Flash' if self.enabled else None,
+            'cache_size': len(self.cache),
+            'cache': self.cache.get_stats(),
+            'guard': gemini_guard.get_status(),
+            'batches': {
+                'sent': self.batches_sent,
+                'symbols': self.batched_symbols,
+                'pending': len(self._batch_pending)
+            },
+            'message': 'Gemini AI aktif' if self.enabled else 'Gemini AI devre dışı'
+        }
+        if not self.enabled:
+            status['setup_steps'] = [
+                '1. https://aistudio.google.com adresinden API key alın',
+                '2. .env dosyasına GEMINI_API_KEY=... ekleyin',
+                '3. Uygulamayı yeniden başlatın'
+            ]
+            status['help'] = 'GEMINI_API_KEY ortam değişkeni gerekli'
+        return status
 
 # Global instance
 gemini_analyzer = GeminiAnalyzer()
@@ -0,0 +1,322 @@
+# app/gemini_guard.py - GEMINI ÇAĞRI KORUMASI
+"""
+🧯 Gemini API çağrıları için koruma katmanı
+
+- SDK'nın async + streaming üretimi (thread yok), eşzamanlı çağrı sınırı
+- Yanıt akışı, ilk JSON değeri tamamlanınca kesilir
+- Çağrı başına süre sınırı (SDK timeout + asyncio deadline)
+- Aynı prompt için uçuştaki istek paylaşılır (coalescing)
+- Art arda hata / yavaş yanıtta devre kesici açılır, çağıran fallback kullanır
+- Gecikme (p50/p99) ve sonuç sayaçları
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Dict, List, Optional
+
+from .config import settings
+from .latency import LatencyTracker
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Devre kesici açık - Gemini çağrısı yapılmadı"""
+
+
+class JsonStreamScanner:
+    """
+    🔎 Parça parça gelen metinde ilk tam JSON nesnesini / dizisini bulur
+
+    Kullanım:
+        scanner = JsonStreamScanner()
+        for chunk in stream:
+            if scanner.feed(chunk):
+                break
+        json.loads(scanner.text)
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._start: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def complete(self) -> bool:
+        return self._end is not None
+
+    @property
+    def text(self) -> str:
+        joined = "".join(self._parts)
+        if self._start is None:
+            return joined
+        return joined[self._start:self._end]
+
+    def feed(self, chunk: str) -> bool:
+        """Parçayı ekle - JSON değeri tamamlandıysa True"""
+        if self.complete:
+            return True
+        offset = self._length
+        self._parts.append(chunk)
+        self._length += len(chunk)
+
+        for i, char in enumerate(chunk):
+            if self._start is None:
+                if char in '{[':
+                    self._start = offset + i
+                    self._depth = 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = offset + i + 1
+                    return True
+        return False
+
+
+class GeminiCallGuard:
+    """
+    🧯 Sınırlı, süreli ve devre kesicili Gemini çağrıları
+
+    Kullanım:
+        json_text = await gemini_guard.generate(model, prompt, config, name="analysis")
+        # TimeoutError / CircuitOpenError / API hatası → çağıran fallback'e geçer
+    """
+
+    def __init__(self, settings):
+        self.timeout = settings.GEMINI_CALL_TIMEOUT_SECONDS
+        self.slow_threshold = settings.GEMINI_SLOW_CALL_SECONDS
+        self.failure_threshold = settings.GEMINI_BREAKER_FAILURES
+        self.cooldown = settings.GEMINI_BREAKER_COOLDOWN_SECONDS
+
+        self._semaphore = None  # İlk çağrıda, çalışan event loop'ta oluşturulur
+        self.max_concurrency = settings.GEMINI_MAX_CONCURRENCY
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._probe_running = False
+
+        self.latency = LatencyTracker(settings.LATENCY_WINDOW)
+        self.outcomes = {"success": 0, "slow": 0, "timeout": 0, "error": 0, "rejected": 0, "coalesced": 0}
+        self.early_stops = 0  # JSON tamamlanınca kesilen akışlar
+        self.tokens: Dict[str, dict] = {}  # name → girdi / çıktı token sayaçları
+
+    # ===================== DEVRE KESİCİ =====================
+    def _allow(self) -> bool:
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN and time.time() - self.opened_at >= self.cooldown:
+            self.state = BREAKER_HALF_OPEN
+            print("🧯 Gemini devre kesici yarı açık - deneme çağrısı")
+        # Yarı açıkken tek deneme çağrısı
+        if self.state == BREAKER_HALF_OPEN and not self._probe_running:
+            self._probe_running = True
+            return True
+        return False
+
+    def _on_success(self):
+        if self.state != BREAKER_CLOSED:
+            print("✅ Gemini devre kesici kapandı")
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self._probe_running = False
+
+    def _on_failure(self, reason: str):
+        self.consecutive_failures += 1
+        self._probe_running = False
+        if self.state == BREAKER_HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != BREAKER_OPEN:
+                print(f"🧯 Gemini devre kesici açıldı ({reason}, {self.consecutive_failures} ardışık) "
+                      f"- {self.cooldown}s fallback")
+            self.state = BREAKER_OPEN
+            self.opened_at = time.time()
+
+    # ===================== ÇAĞRI =====================
+    @staticmethod
+    def _request_key(prompt: str, generation_config: dict) -> str:
+        payload = json.dumps(generation_config, sort_keys=True) + prompt
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def _record_tokens(self, name: str, usage, early_stop: bool = False):
+        """
+        Çağrı başına girdi / çıktı token sayısı (akıştaki son usage_metadata)
+
+        Erken kesilen akışta kullanımı taşıyan son parça okunmaz; toplamlar eksik
+        kalmasın diye bu çağrılar sayıya katılmaz, 'unknown' olarak sayılır.
+        """
+        stats = self.tokens.setdefault(name, {"calls": 0, "input": 0, "output": 0, "unknown": 0})
+        if early_stop or usage is None:
+            stats["unknown"] += 1
+            stats["last_input"] = None
+            stats["last_output"] = None
+            return
+        input_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+        output_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+        stats["calls"] += 1
+        stats["input"] += input_tokens
+        stats["output"] += output_tokens
+        stats["last_input"] = input_tokens
+        stats["last_output"] = output_tokens
+        print(f"🔢 Gemini {name}: {input_tokens} girdi / {output_tokens} çıktı token")
+
+    @staticmethod
+    async def _close_stream(response):
+        """Akışı kapat: async generator → aclose, gRPC çağrısı → cancel, yoksa kalanı tüket"""
+        try:
+            for target in (response, getattr(response, '_iterator', None)):
+                if target is None:
+                    continue
+                aclose = getattr(target, 'aclose', None)
+                if aclose is not None:
+                    await aclose()
+                    return
+                cancel = getattr(target, 'cancel', None)
+                if callable(cancel):
+                    cancel()
+                    return
+            await asyncio.wait_for(GeminiCallGuard._drain(response), timeout=1.0)
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_final_chunk(chunk) -> bool:
+        try:
+            return bool(chunk.candidates[0].finish_reason)
+        except (AttributeError, IndexError, TypeError):
+            return False
+
+    @staticmethod
+    async def _drain(response):
+        async for _ in response:
+            pass
+
+    async def _stream_json(self, model, prompt: str, generation_config: dict, name: str) -> str:
+        """Async streaming üretim - ilk tam JSON değeri gelince okumayı bırak"""
+        scanner = JsonStreamScanner()
+        usage = None
+        early_stop = False
+        response = await model.generate_content_async(
+            prompt, generation_config=generation_config, stream=True,
+            request_options={"timeout": self.timeout}
+        )
+        try:
+            async for chunk in response:
+                usage = getattr(chunk, 'usage_metadata', None) or usage
+                try:
+                    text = chunk.text
+                except ValueError:
+                    continue  # Metin içermeyen parça (finish_reason vb.)
+                if scanner.feed(text):
+                    # JSON'u kapatan parça akışın sonuncusuysa (finish_reason) usage zaten tam
+                    early_stop = not self._is_final_chunk(chunk)
+                    if early_stop:
+                        self.early_stops += 1
+                    break
+        finally:
+            # Erken kesilen / zaman aşımına uğrayan akışın bağlantısı açık kalmasın
+            await self._close_stream(response)
+
+        self._record_tokens(name, usage, early_stop)
+        if not scanner.complete:
+            raise ValueError(f"Tamamlanmamış JSON yanıtı: {scanner.text[:200]}")
+        return scanner.text
+
+    async def generate(self, model, prompt: str, generation_config: dict, name: str = "default") -> str:
+        """Korumalı async generate_content → ilk tam JSON metni"""
+        key = self._request_key(prompt, generation_config)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.outcomes["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        if not self._allow():
+            self.outcomes["rejected"] += 1
+            raise CircuitOpenError("Gemini devre kesici açık")
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await self._call(model, prompt, generation_config, name)
+            future.set_result(text)
+            return text
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Takipçi yoksa "never retrieved" uyarısını engelle
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _call(self, model, prompt: str, generation_config: dict, name: str) -> str:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # Slot beklemesi süre sınırına ve devre kesiciye sayılmaz - sadece Gemini'nin kendisi
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                text = await asyncio.wait_for(
+                    self._stream_json(model, prompt, generation_config, name), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.outcomes["timeout"] += 1
+                self._on_failure("timeout")
+                raise asyncio.TimeoutError(f"Gemini {name} çağrısı {self.timeout}s içinde yanıt vermedi")
+            except asyncio.CancelledError:
+                self._probe_running = False
+                raise
+            except Exception:
+                self.outcomes["error"] += 1
+                self._on_failure("hata")
+                raise
+            finally:
+                self.latency.record(name, time.perf_counter() - started)
+
+        if time.perf_counter() - started > self.slow_threshold:
+            self.outcomes["slow"] += 1
+            self._on_failure("yavaş yanıt")
+        else:
+            self.outcomes["success"] += 1
+            self._on_success()
+        return text
+
+    def get_status(self) -> dict:
+        return {
+            "breaker": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "open_remaining_seconds": max(0, int(self.cooldown - (time.time() - self.opened_at)))
+            if self.state == BREAKER_OPEN else 0,
+            "inflight": len(self._inflight),
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "outcomes": dict(self.outcomes),
+            "early_stops": self.early_stops,
+            "tokens": {name: dict(stats) for name, stats in self.tokens.items()},
+            "latency": self.latency.get_status()
+        }
+
+
+# Global instance - analyzer ve trading manager aynı havuzu / devre kesiciyi paylaşır
+gemini_guard = GeminiCallGuard(settings)
@@ -6,16 +6,40 @@ import google.generativeai as genai
 import json
 import os
 
-from .binance_client import binance_client
+from . import binance_client as binance_api
+from . import market_data
 from .firebase_manager import firebase_manager
 from .config import settings
+from .gemini_guard import gemini_guard
+from .latency import LatencyTracker
+from .order_builder import build_order_plan
+from .prompt_compiler import POSITION_SYSTEM_INSTRUCTION, compile_position_prompt
+from .screener import SymbolScreener
+from .timeframe_aggregator import timeframe_store
+
+# Structured output semalari - yanit dogrudan JSON gelir
+POSITION_ANALYSIS_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "should_trade": {"type": "BOOLEAN"},
+        "signal": {"type": "STRING", "description": "LONG, SHORT veya HOLD"},
+        "confidence": {"type": "NUMBER"},
+        "take_profit_percent": {"type": "NUMBER"},
+        "stop_loss_percent": {"type": "NUMBER"},
+        "position_size_usdt": {"type": "NUMBER"},
+        "reasoning": {"type": "STRING"},
+        "risk_score": {"type": "NUMBER"}
+    },
+    "required": ["should_trade", "signal", "confidence", "take_profit_percent",
+                 "stop_loss_percent", "reasoning", "risk_score"]
+}
 
 class GeminiTradingManager:
     """
     AI-Powered Autonomous Trading Manager
 
     Gemini AI tum trading kararlarini verir:
-    - Coin secimi (otomatik)
+    - Coin secimi (yerel screener adaylari + AI onayi)
     - Pozisyon acma/kapatma
     - TP/SL belirleme
     - Para yonetimi
@@ -23,16 +47,6 @@ class GeminiTradingManager:
     """
 
     def __init__(self):
-        self.api_key = os.getenv("GEMINI_API_KEY")
-        if not self.api_key:
-            print("GEMINI_API_KEY bulunamadi!")
-            self.enabled = False
-            return
-
-        genai.configure(api_key=self.api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        self.enabled = True
-
         # Trading state
         self.is_running = False
         self.active_positions = {}  # {symbol: position_data}
@@ -40,6 +54,12 @@ class GeminiTradingManager:
         self.daily_trade_count = 0
         self.daily_reset_date = datetime.now(timezone.utc).date()
 
+        # Client import aninda henuz olusturulmamis olabilir - start'ta canli client'tan alinir
+        self.binance_client = None
+        # Coin adaylari LLM yerine yerel, sayisal taramadan gelir (start'ta olusturulur)
+        self.screener: Optional[SymbolScreener] = None
+        self.cycle_latency = LatencyTracker(settings.LATENCY_WINDOW)  # data / gemini / open / cycle
+
         # Risk parameters
         self.max_positions = 2
         self.capital_per_position = 0.45  # %45 her pozisyon icin
@@ -51,6 +71,18 @@ class GeminiTradingManager:
         self.winning_trades = 0
         self.losing_trades = 0
 
+        self.api_key = os.getenv("GEMINI_API_KEY")
+        if not self.api_key:
+            print("GEMINI_API_KEY bulunamadi!")
+            self.enabled = False
+            return
+
+        genai.configure(api_key=self.api_key)
+        self.analysis_model = genai.GenerativeModel(
+            'gemini-2.0-flash-exp', system_instruction=POSITION_SYSTEM_INSTRUCTION
+        )
+        self.enabled = True
+
         print("AI Trading Manager initialized")
 
     async def start_autonomous_trading(self):
@@ -58,10 +90,22 @@ class GeminiTradingManager:
         if not self.enabled:
             print("Gemini API aktif degil!")
             return
+        if self.is_running:
+            print("Autonomous AI Trading zaten calisiyor")
+            return
+
+        self.binance_client = binance_api.binance_client
+        if self.binance_client is None:
+            print("Binance client olusturulmamis!")
+            return
+        if self.screener is None or self.screener.binance_client is not self.binance_client:
+            self.screener = SymbolScreener(settings, self.binance_client)
 
         self.is_running = True
         print("Autonomous AI Trading STARTED")
 
+        await self.screener.start(market_data.market_data_feed)
+
         try:
             while self.is_running:
                 await self._trading_cycle()
@@ -75,6 +119,8 @@ class GeminiTradingManager:
     async def stop_autonomous_trading(self):
         """Trading'i durdurur"""
         self.is_running = False
+        if self.screener is not None:
+            await self.screener.stop()
         print("Autonomous AI Trading STOPPED")
 
     async def _trading_cycle(self):
@@ -104,8 +150,11 @@ class GeminiTradingManager:
     async def _check_existing_positions(self):
         """Mevcut pozisyonlari kontrol eder"""
         try:
-            all_positions = await binance_client.client.futures_position_information()
-            open_positions = [p for p in all_positions if float(p['positionAmt']) != 0]
+            if self.binance_client.order_book.is_live:
+                open_positions = self.binance_client.order_book.get_open_positions()
+            else:
+                all_positions = await self.binance_client._call(self.binance_client.client.futures_position_information, weight=5)
+                open_positions = [p for p in all_positions if float(p['positionAmt']) != 0]
 
             current_symbols = {p['symbol'] for p in open_positions}
 
@@ -151,100 +200,94 @@ class GeminiTradingManager:
         except Exception as e:
             print(f"Handle position close error: {e}")
 
+    async def _fetch_market_data(self, symbol: str) -> Optional[tuple]:
+        """1m / 15m klines ve fiyat ayni anda istenir (websocket ile beslenen sembolde klines yerel)"""
+        local_1m = timeframe_store.get_klines(symbol, "1m", limit=10)
+        local_15m = timeframe_store.get_klines(symbol, "15m", limit=5)
+        if local_1m and local_15m:
+            klines_1m, klines_15m = local_1m, local_15m
+            current_price = await self.binance_client.get_market_price(symbol)
+        else:
+            klines_1m, klines_15m, current_price = await asyncio.gather(
+                self.binance_client.get_historical_klines(symbol, "1m", limit=100),
+                self.binance_client.get_historical_klines(symbol, "15m", limit=50),
+                self.binance_client.get_market_price(symbol)
+            )
+        if not klines_1m or not klines_15m or not current_price:
+            return None
+        return klines_1m, klines_15m, current_price
+
+    def _record_stage(self, stage: str, started: float) -> float:
+        """Asama suresini kaydet, simdiki zamani dondur"""
+        now = time.perf_counter()
+        self.cycle_latency.record(stage, now - started)
+        return now
+
     async def _find_and_open_position(self):
         """Gemini AI'ye yeni pozisyon sorgusu"""
+        cycle_started = time.perf_counter()
+        prefetch: Dict[str, asyncio.Task] = {}
         try:
-            # Bakiye kontrolu
-            balance = await binance_client.get_account_balance()
-            if balance < 50:
-                print(f"Insufficient balance: {balance} USDT")
+            # Yerel screener'dan ilk K aday - AI sadece onaylar
+            candidates = [
+                c for c in self.screener.top(exclude=set(self.active_positions))
+                if time.time() - self.last_analysis_time.get(c['symbol'], 0) >= 120  # 2 dakika cooldown
+            ]
+            if not candidates:
                 return
 
-            # AI'dan coin onerisi al
-            selected_coin = await self._ask_gemini_for_coin()
-            if not selected_coin:
-                return
-
-            symbol = selected_coin['symbol']
-
-            # Rate limit
-            last_time = self.last_analysis_time.get(symbol, 0)
-            if time.time() - last_time < 120:  # 2 dakika cooldown
-                return
-
-            self.last_analysis_time[symbol] = time.time()
-
-            # Market verilerini al
-            klines_1m = await binance_client.get_historical_klines(symbol, "1m", limit=100)
-            klines_15m = await binance_client.get_historical_klines(symbol, "15m", limit=50)
-
-            if not klines_1m or not klines_15m:
-                return
-
-            current_price = await binance_client.get_market_price(symbol)
-            if not current_price:
-                return
-
-            # AI analizini al
-            analysis = await self._analyze_with_gemini(
-                symbol, current_price, klines_1m, klines_15m, balance
-            )
-
-            if not analysis or not analysis['should_trade']:
+            # Bakiye ve ilk adayin verisi ayni anda
+            prefetch[candidates[0]['symbol']] = asyncio.create_task(
+                self._fetch_market_data(candidates[0]['symbol']))
+            balance = await self.binance_client.get_account_balance()
+            if balance < 50:
+                print(f"Insufficient balance: {balance} USDT")
                 return
 
-            if analysis['confidence'] < self.min_confidence:
-                print(f"{symbol} confidence too low: {analysis['confidence']}")
+            for index, candidate in enumerate(candidates):
+                symbol = candidate['symbol']
+                self.last_analysis_time[symbol] = time.time()
+                print(f"Screener candidate: {symbol} (score {candidate['score']}, "
+                      f"range {candidate['range_percent']}%, accel {candidate['acceleration'] or '-'}x)")
+
+                stage_started = time.perf_counter()
+                market_data_result = await prefetch.pop(symbol)
+                stage_started = self._record_stage("data", stage_started)
+
+                # Gemini cagrisi surerken siradaki adayin verisi cekilir
+                if index + 1 < len(candidates):
+                    next_symbol = candidates[index + 1]['symbol']
+                    prefetch[next_symbol] = asyncio.create_task(self._fetch_market_data(next_symbol))
+
+                if not market_data_result:
+                    continue
+                klines_1m, klines_15m, current_price = market_data_result
+
+                # AI onayi
+                analysis = await self._analyze_with_gemini(
+                    symbol, current_price, klines_1m, klines_15m, balance
+                )
+                stage_started = self._record_stage("gemini", stage_started)
+
+                if not analysis or not analysis['should_trade']:
+                    continue
+
+                if analysis['confidence'] < self.min_confidence:
+                    print(f"{symbol} confidence too low: {analysis['confidence']}")
+                    continue
+
+                # Pozisyon ac
+                await self._open_position(symbol, analysis, balance, current_price)
+                self._record_stage("open", stage_started)
                 return
 
-            # Pozisyon ac
-            await self._open_position(symbol, analysis, balance)
-
         except Exception as e:
             print(f"Find and open position error: {e}")
-
-    async def _ask_gemini_for_coin(self) -> Optional[Dict]:
-        """Gemini AI'dan coin onerisi alir"""
-        try:
-            prompt = """
-Sen bir profesyonel kripto trader'sin. BINANCE FUTURES'ta scalping yapiyorsun.
-
-GOREV: Simdi islem yapilabilecek EN IYI 1 coin onerisinde bulun.
-
-Kriterler:
-1. Yuksek likidite (BTC, ETH, BNB, SOL, ADA gibi major coinler)
-2. Iyi volatilite (scalping icin uygun)
-3. Aktif hacim
-4. Trend belirgin
-
-SADECE JSON dondur:
-{
-  "symbol": "BTCUSDT",
-  "reasoning": "Neden bu coin?"
-}
-
-NOT: Sadece USDT parity'leri oner (BTCUSDT, ETHUSDT gibi).
-"""
-
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                prompt,
-                generation_config={
-                    "temperature": 0.5,
-                    "max_output_tokens": 256,
-                }
-            )
-
-            result = self._parse_json_response(response.text)
-            if result and 'symbol' in result:
-                print(f"AI selected coin: {result['symbol']}")
-                return result
-
-            return None
-
-        except Exception as e:
-            print(f"Ask Gemini for coin error: {e}")
-            return None
+        finally:
+            for task in prefetch.values():
+                task.cancel()
+            decision_ms = self._record_stage("cycle", cycle_started) - cycle_started
+            print(f"Decision cycle: {decision_ms * 1000:.0f} ms")
 
     async def _analyze_with_gemini(
         self,
@@ -287,66 +330,26 @@ NOT: Sadece USDT parity'leri oner (BTCUSDT, ETHUSDT gibi).
             avg_range = sum(ranges) / len(ranges)
             volatility_pct = (avg_range / price * 100) if price > 0 else 0
 
-            prompt = f"""
-Sen bir profesyonel scalping trader'sin. MULTI-TIMEFRAME analiz yapiyorsun.
-
-COIN: {symbol}
-PRICE: ${price:.4f}
-BALANCE: {balance:.2f} USDT
-POSITION SIZE: %45 of balance = {balance * 0.45:.2f} USDT
-
-1 DAKiKA VERILER:
-"""
-            for i, c in enumerate(candles_1m[-5:], 1):
-                candle_type = "BULLISH" if c['close'] > c['open'] else "BEARISH"
-                prompt += f"{i}. {candle_type} | O:{c['open']:.2f} H:{c['high']:.2f} L:{c['low']:.2f} C:{c['close']:.2f}\n"
-
-            prompt += f"""
-15 DAKiKA VERILER:
-"""
-            for i, c in enumerate(candles_15m[-3:], 1):
-                candle_type = "BULLISH" if c['close'] > c['open'] else "BEARISH"
-                prompt += f"{i}. {candle_type} | O:{c['open']:.2f} H:{c['high']:.2f} L:{c['low']:.2f} C:{c['close']:.2f}\n"
-
-            prompt += f"""
-MARKET METRICS:
-- Volume Ratio: {volume_ratio:.2f}x (>1.3 = iyi)
-- Volatility: {volatility_pct:.3f}% (0.1-0.5% ideal)
-
-SCALPING KURALLARI:
-1. Multi-timeframe uyum ZORUNLU (1m ve 15m ayni yonde)
-2. Volume >1.3x olmali
-3. TP: %0.5-1.5, SL: %0.3-0.8
-4. Risk/Reward minimum 1:2
-5. Confidence >80% olmali
-
-KARAR VER (SADECE JSON):
-{{
-  "should_trade": true/false,
-  "signal": "LONG" | "SHORT" | "HOLD",
-  "confidence": 0-100,
-  "entry_price": {price},
-  "take_profit_percent": 0.5-1.5,
-  "stop_loss_percent": 0.3-0.8,
-  "position_size_usdt": bakiyenin %45'i,
-  "reasoning": "Aciklama (max 150 karakter)",
-  "risk_score": 0-10
-}}
-
-ONEMLI: Volume veya volatilite uygun degilse should_trade=false dondur!
-"""
-
-            response = await asyncio.to_thread(
-                self.model.generate_content,
+            # Kompakt tablo - kurallar analysis_model'in system instruction'inda
+            prompt = compile_position_prompt(
+                symbol, price, candles_1m, candles_15m, volume_ratio, volatility_pct,
+                balance, balance * self.capital_per_position
+            )
+
+            response_text = await gemini_guard.generate(
+                self.analysis_model,
                 prompt,
-                generation_config={
+                {
                     "temperature": 0.3,
                     "top_p": 0.8,
                     "max_output_tokens": 512,
-                }
+                    "response_mime_type": "application/json",
+                    "response_schema": POSITION_ANALYSIS_SCHEMA,
+                },
+                name="position_analysis"
             )
 
-            analysis = self._parse_json_response(response.text)
+            analysis = self._parse_json_response(response_text)
             if analysis:
                 print(f"{symbol} AI Analysis: {analysis['signal']} (Confidence: {analysis['confidence']}%)")
                 print(f"  Reasoning: {analysis.get('reasoning', 'N/A')}")
@@ -358,33 +361,27 @@ ONEMLI: Volume veya volatilite uygun degilse should_trade=false dondur!
             print(f"Analyze with Gemini error: {e}")
             return None
 
-    async def _open_position(self, symbol: str, analysis: Dict, balance: float):
-        """Pozisyon acar"""
+    async def _open_position(self, symbol: str, analysis: Dict, balance: float, entry_price: float):
+        """Pozisyon acar - fiyat modelden degil, analizden once cekilen piyasa fiyatindan"""
         try:
             print(f"Opening position: {symbol} {analysis['signal']}")
 
-            # Leverage ayarla
-            await binance_client.set_leverage(symbol, settings.LEVERAGE)
+            # Leverage ayari ve symbol metadata birbirinden bagimsiz - ayni anda
+            _, symbol_meta = await asyncio.gather(
+                self.binance_client.set_leverage(symbol, settings.LEVERAGE),
+                self.binance_client.get_symbol_metadata(symbol)
+            )
 
             # Position size hesapla
             position_size_usdt = balance * self.capital_per_position
-            entry_price = analysis['entry_price']
 
             # Quantity hesapla
-            symbol_info = await binance_client.get_symbol_info(symbol)
-            if not symbol_info:
+            if not symbol_meta:
                 print(f"Symbol info bulunamadi: {symbol}")
                 return
 
-            quantity_precision = binance_client._get_precision_from_filter(
-                symbol_info, 'LOT_SIZE', 'stepSize'
-            )
-            price_precision = binance_client._get_precision_from_filter(
-                symbol_info, 'PRICE_FILTER', 'tickSize'
-            )
-
             quantity = (position_size_usdt * settings.LEVERAGE) / entry_price
-            quantity = binance_client._format_quantity(symbol, quantity)
+            quantity = self.binance_client._format_quantity(symbol, quantity)
 
             if quantity <= 0:
                 print(f"Quantity too small: {quantity}")
@@ -397,19 +394,18 @@ ONEMLI: Volume veya volatilite uygun degilse should_trade=false dondur!
             tp_pct = analysis.get('take_profit_percent', 1.0) / 100
             sl_pct = analysis.get('stop_loss_percent', 0.5) / 100
 
-            if signal == 'LONG':
-                stop_loss = entry_price * (1 - sl_pct)
-                take_profit = entry_price * (1 + tp_pct)
-            else:
-                stop_loss = entry_price * (1 + sl_pct)
-                take_profit = entry_price * (1 - tp_pct)
+            # Bot ile ayni emir plani (tickSize'a yuvarlanmis TP/SL)
+            plan = build_order_plan(
+                symbol, side, quantity, entry_price, symbol_meta['price_precision'],
+                tp_pct, sl_pct, symbol_meta['tick_size']
+            )
+            take_profit = float(plan['tp_price'])
+            stop_loss = float(plan['sl_price'])
 
             # Pozisyon ac (TP/SL ile)
-            result = await binance_client.create_simple_position(
-                symbol, side, quantity, entry_price, price_precision
-            )
+            result = await self.binance_client.execute_order_plan(plan)
 
-            if result:
+            if result and 'orderId' in result:
                 self.active_positions[symbol] = {
                     'entry_time': datetime.now(timezone.utc),
                     'entry_price': entry_price,
@@ -477,7 +473,10 @@ ONEMLI: Volume veya volatilite uygun degilse should_trade=false dondur!
             'win_rate': f"{(self.winning_trades / max(self.total_trades, 1) * 100):.1f}%",
             'max_positions': self.max_positions,
             'min_confidence': self.min_confidence,
-            'analysis_interval': self.analysis_interval
+            'analysis_interval': self.analysis_interval,
+            'screener': self.screener.get_status() if self.screener else None,
+            'cycle_latency': self.cycle_latency.get_status(),
+            'gemini_guard': gemini_guard.get_status()
         }
 
 # Global instance
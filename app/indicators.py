@@ -0,0 +1,360 @@
+# app/indicators.py - ARTIMLI O(1) İNDİKATÖR MOTORU
+"""
+⚡ Durum tutan indikatörler - her yeni mumda sabit maliyet
+
+- EMA (pandas ewm adjust=False ile aynı)
+- VWAP (pencereli, kümülatif sürümle aynı sonucu verir)
+- Rolling mean / Welford rolling variance
+- Rolling max/min (monoton deque)
+- Lag (n mum önceki değer)
+
+IndicatorEngine geçmişten bir kez beslenir, sonra sadece yeni mumları işler.
+Son mum yerinde güncellenirse (açık mum → kapanmış hali) durum o mumdan
+önceki ana geri alınıp mum yeniden uygulanır.
+"""
+
+import math
+from collections import deque
+from typing import Dict, Optional
+
+from .kline_buffer import KlineRingBuffer
+
+
+class Indicator:
+    """Tüm indikatörler için temel sınıf"""
+
+    def __init__(self, source: str = 'close'):
+        self.source = source
+        self.value: Optional[float] = None
+        self.prev: Optional[float] = None
+
+    def push(self, bar: Dict[str, float]) -> Optional[float]:
+        return self.update(bar[self.source])
+
+    def update(self, x: float) -> Optional[float]:
+        raise NotImplementedError
+
+    def reset(self):
+        self.value = None
+        self.prev = None
+
+    def _set(self, value: Optional[float]) -> Optional[float]:
+        self.prev = self.value
+        self.value = value
+        return value
+
+
+class EMA(Indicator):
+    """Üstel hareketli ortalama (adjust=False)"""
+
+    def __init__(self, span: int, source: str = 'close'):
+        super().__init__(source)
+        self.span = span
+        self.alpha = 2.0 / (span + 1.0)
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            return self._set(x)
+        return self._set(self.value + self.alpha * (x - self.value))
+
+
+class RollingMean(Indicator):
+    """Sabit pencere ortalaması (pencere dolana kadar None)"""
+
+    RESYNC_EVERY = 1024  # Float birikim hatasını periyodik sıfırla
+
+    def __init__(self, window: int, source: str = 'close'):
+        super().__init__(source)
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+        self._updates = 0
+
+    def update(self, x: float) -> Optional[float]:
+        self._values.append(x)
+        self._sum += x
+        if len(self._values) > self.window:
+            self._sum -= self._values.popleft()
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._sum = math.fsum(self._values)
+
+        if len(self._values) < self.window:
+            return self._set(None)
+        return self._set(self._sum / self.window)
+
+    def reset(self):
+        super().reset()
+        self._values.clear()
+        self._sum = 0.0
+        self._updates = 0
+
+
+class RollingVariance(Indicator):
+    """Welford pencereli varyans (ddof=1, pandas rolling().var() ile aynı)"""
+
+    RESYNC_EVERY = 1024  # Float birikim hatasını periyodik sıfırla
+
+    def __init__(self, window: int, source: str = 'close'):
+        super().__init__(source)
+        self.window = window
+        self._values = deque()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+    def update(self, x: float) -> Optional[float]:
+        self._values.append(x)
+        n = len(self._values)
+
+        if n <= self.window:
+            delta = x - self._mean
+            self._mean += delta / n
+            self._m2 += delta * (x - self._mean)
+        else:
+            old = self._values.popleft()
+            old_mean = self._mean
+            self._mean += (x - old) / self.window
+            self._m2 += (x - old) * (x - self._mean + old - old_mean)
+            n = self.window
+
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._mean = math.fsum(self._values) / n
+            self._m2 = math.fsum((v - self._mean) ** 2 for v in self._values)
+
+        if n < self.window or n < 2:
+            return self._set(None)
+        return self._set(max(self._m2, 0.0) / (n - 1))
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self._mean if len(self._values) >= self.window else None
+
+    @property
+    def std(self) -> Optional[float]:
+        return math.sqrt(self.value) if self.value is not None else None
+
+    def reset(self):
+        super().reset()
+        self._values.clear()
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._updates = 0
+
+
+class _RollingExtreme(Indicator):
+    """Monoton deque ile pencere max/min"""
+
+    def __init__(self, window: int, source: str, is_max: bool):
+        super().__init__(source)
+        self.window = window
+        self._is_max = is_max
+        self._deque = deque()  # (index, value)
+        self._index = 0
+
+    def update(self, x: float) -> float:
+        dq = self._deque
+        if self._is_max:
+            while dq and dq[-1][1] <= x:
+                dq.pop()
+        else:
+            while dq and dq[-1][1] >= x:
+                dq.pop()
+        dq.append((self._index, x))
+
+        while dq[0][0] <= self._index - self.window:
+            dq.popleft()
+
+        self._index += 1
+        return self._set(dq[0][1])
+
+    def reset(self):
+        super().reset()
+        self._deque.clear()
+        self._index = 0
+
+
+class RollingMax(_RollingExtreme):
+    def __init__(self, window: int, source: str = 'high'):
+        super().__init__(window, source, is_max=True)
+
+
+class RollingMin(_RollingExtreme):
+    def __init__(self, window: int, source: str = 'low'):
+        super().__init__(window, source, is_max=False)
+
+
+class VWAP(Indicator):
+    """
+    Hacim ağırlıklı ortalama fiyat
+
+    window=None → kümülatif. Tampon kapasitesi verilirse, tampondaki tüm
+    mumlar üzerinden hesaplanan kümülatif VWAP ile aynı sonucu verir.
+    """
+
+    def __init__(self, window: Optional[int] = None, source: str = 'close'):
+        super().__init__(source)
+        self.window = window
+        self._pv = deque()
+        self._v = deque()
+        self._pv_sum = 0.0
+        self._v_sum = 0.0
+
+    def push(self, bar: Dict[str, float]) -> Optional[float]:
+        return self.update_bar(bar[self.source], bar['volume'])
+
+    def update(self, x: float) -> Optional[float]:
+        return self.update_bar(x, 1.0)
+
+    def update_bar(self, price: float, volume: float) -> Optional[float]:
+        pv = price * volume
+        self._pv_sum += pv
+        self._v_sum += volume
+
+        if self.window is not None:
+            self._pv.append(pv)
+            self._v.append(volume)
+            if len(self._v) > self.window:
+                self._pv_sum -= self._pv.popleft()
+                self._v_sum -= self._v.popleft()
+
+        if self._v_sum <= 0:
+            return self._set(None)
+        return self._set(self._pv_sum / self._v_sum)
+
+    def reset(self):
+        super().reset()
+        self._pv.clear()
+        self._v.clear()
+        self._pv_sum = 0.0
+        self._v_sum = 0.0
+
+
+class Lag(Indicator):
+    """n mum önceki değer"""
+
+    def __init__(self, periods: int, source: str = 'close'):
+        super().__init__(source)
+        self.periods = periods
+        self._values = deque(maxlen=periods + 1)
+
+    def update(self, x: float) -> Optional[float]:
+        self._values.append(x)
+        if len(self._values) <= self.periods:
+            return self._set(None)
+        return self._set(self._values[0])
+
+    def reset(self):
+        super().reset()
+        self._values.clear()
+
+
+class IndicatorEngine:
+    """
+    🧮 Sembol başına indikatör motoru
+
+    sync(buffer) tampondaki yeni mumları bulur ve sadece onları işler.
+    İlk çağrıda veya veri sürekliliği bozulduğunda geçmişten yeniden beslenir.
+    Son mumdan önceki durum saklanır; o mum sonradan değişirse geri alınıp
+    yeni değerleriyle tekrar uygulanır.
+    """
+
+    def __init__(self, indicators: Dict[str, Indicator], require_volume: bool = False):
+        self.indicators = indicators
+        self.require_volume = require_volume
+        self.count = 0  # İşlenen geçerli mum sayısı
+        self.last_open_time: Optional[int] = None
+        self.last_bar: Optional[Dict[str, float]] = None  # Son işlenen (atlanmamış) mum
+        self.reseed_count = 0
+        self.rollback_count = 0
+        # Tampondaki son mum (o, h, l, c, v) ve o mum uygulanmadan önceki durum
+        self._last_values: Optional[tuple] = None
+        self._snapshot: Optional[tuple] = None
+
+    def __getitem__(self, name: str) -> Indicator:
+        return self.indicators[name]
+
+    def value(self, name: str) -> Optional[float]:
+        return self.indicators[name].value
+
+    def reset(self):
+        for indicator in self.indicators.values():
+            indicator.reset()
+        self.count = 0
+        self.last_open_time = None
+        self.last_bar = None
+        self._last_values = None
+        self._snapshot = None
+
+    def _save_state(self):
+        """İndikatör durumlarının kopyası (deque'lar kopyalanır, sayılar değişmez nesne)"""
+        self._snapshot = (
+            {name: {key: value.copy() if isinstance(value, deque) else value
+                    for key, value in indicator.__dict__.items()}
+             for name, indicator in self.indicators.items()},
+            self.count, self.last_bar
+        )
+
+    def _restore_state(self):
+        states, self.count, self.last_bar = self._snapshot
+        for name, state in states.items():
+            self.indicators[name].__dict__ = state
+        self._snapshot = None
+        self.rollback_count += 1
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float):
+        """Tek mum işle"""
+        if close <= 0 or not math.isfinite(close):
+            return
+        if self.require_volume and volume <= 0:
+            return
+
+        bar = {'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume}
+        for indicator in self.indicators.values():
+            indicator.push(bar)
+        self.last_bar = bar
+        self.count += 1
+
+    def sync(self, buffer: KlineRingBuffer) -> int:
+        """Tampondaki yeni (veya yerinde güncellenmiş son) mumları işle, işlenen mum sayısını döndür"""
+        size = len(buffer)
+        if size == 0:
+            return 0
+
+        open_times = buffer.open_time
+        opens, highs, lows = buffer.open, buffer.high, buffer.low
+        closes, volumes = buffer.close, buffer.volume
+        last_time = int(open_times[-1])
+
+        def values(i: int) -> tuple:
+            return (float(opens[i]), float(highs[i]), float(lows[i]), float(closes[i]), float(volumes[i]))
+
+        # Son işlenen mumun tampondaki yeri
+        index = size - 1
+        if self.last_open_time is not None:
+            while index > 0 and int(open_times[index]) > self.last_open_time:
+                index -= 1
+
+        if self.last_open_time is None or int(open_times[index]) != self.last_open_time:
+            self.reset()
+            self.reseed_count += 1
+            start = 0
+        else:
+            if values(index) != self._last_values and self._snapshot is not None:
+                self._restore_state()  # Mum yerinde güncellendi - eski katkısını geri al
+                start = index
+            else:
+                start = index + 1
+            if start == size:
+                return 0
+
+        for i in range(start, size - 1):
+            self.update(*values(i))
+        self._save_state()
+        self._last_values = values(size - 1)
+        self.update(*self._last_values)
+
+        self.last_open_time = last_time
+        return size - start
@@ -0,0 +1,200 @@
+# app/kline_buffer.py - KOLONSAL NUMPY HALKA TAMPON (KLINE)
+"""
+⚡ Sabit kapasiteli, sembol başına kolonsal kline tamponu
+
+- open/high/low/close/volume float64, open_time/close_time int64 dizileri
+- Her değer iki kez yazılır (i ve i+capacity) → son N mum her zaman
+  tek parça, zaman sıralı ve kopyasız bir view olarak okunur
+- Mum ekleme hiçbir bellek ayırmaz, maliyet kapasiteden bağımsızdır
+"""
+
+import numpy as np
+from typing import Dict, List, Optional, Union
+
+
+class KlineRingBuffer:
+    """
+    📊 Kolonsal Kline Halka Tamponu
+
+    Dönen view'lar salt okunurdur ve bir sonraki append'e kadar geçerlidir.
+    """
+
+    FLOAT_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+    INT_FIELDS = ('open_time', 'close_time')
+
+    def __init__(self, capacity: int = 1000):
+        if capacity < 1:
+            raise ValueError("Kapasite en az 1 olmalı")
+
+        self._capacity = int(capacity)
+        self._columns: Dict[str, np.ndarray] = {}
+        for field in self.FLOAT_FIELDS:
+            self._columns[field] = np.zeros(2 * self._capacity, dtype=np.float64)
+        for field in self.INT_FIELDS:
+            self._columns[field] = np.zeros(2 * self._capacity, dtype=np.int64)
+
+        self._next = 0   # Sıradaki yazma pozisyonu (0..capacity-1)
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def last_open_time(self) -> Optional[int]:
+        """Son mumun açılış zamanı"""
+        if self._count == 0:
+            return None
+        return int(self._columns['open_time'][self._last_index()])
+
+    def _last_index(self) -> int:
+        return (self._next - 1) % self._capacity
+
+    def _write(self, index: int, open_time: int, open_: float, high: float,
+               low: float, close: float, volume: float, close_time: int):
+        mirror = index + self._capacity
+        cols = self._columns
+        for pos in (index, mirror):
+            cols['open_time'][pos] = open_time
+            cols['open'][pos] = open_
+            cols['high'][pos] = high
+            cols['low'][pos] = low
+            cols['close'][pos] = close
+            cols['volume'][pos] = volume
+            cols['close_time'][pos] = close_time
+
+    def append(self, open_time: int, open_: float, high: float, low: float,
+               close: float, volume: float, close_time: int) -> bool:
+        """
+        Yeni mum ekle
+
+        Aynı open_time tekrar gelirse son mum yerinde güncellenir,
+        daha eski bir mum gelirse yok sayılır.
+        """
+        last_open_time = self.last_open_time
+        if last_open_time is not None:
+            if open_time == last_open_time:
+                self._write(self._last_index(), open_time, open_, high, low,
+                            close, volume, close_time)
+                return True
+            if open_time < last_open_time:
+                return False
+
+        self._write(self._next, open_time, open_, high, low, close, volume, close_time)
+        self._next = (self._next + 1) % self._capacity
+        if self._count < self._capacity:
+            self._count += 1
+        return True
+
+    def append_kline(self, kline: list) -> bool:
+        """REST formatındaki kline satırını ekle"""
+        return self.append(
+            int(kline[0]), float(kline[1]), float(kline[2]), float(kline[3]),
+            float(kline[4]), float(kline[5]), int(kline[6])
+        )
+
+    def append_ws_kline(self, kline_data: dict) -> bool:
+        """WebSocket 'k' payload'unu ekle"""
+        return self.append(
+            int(kline_data['t']), float(kline_data['o']), float(kline_data['h']),
+            float(kline_data['l']), float(kline_data['c']), float(kline_data['v']),
+            int(kline_data['T'])
+        )
+
+    def extend(self, klines: list) -> int:
+        """Geçmiş veriyi toplu yükle"""
+        added = 0
+        for kline in klines:
+            try:
+                if self.append_kline(kline):
+                    added += 1
+            except (TypeError, ValueError, IndexError):
+                continue
+        return added
+
+    def clear(self):
+        """Tamponu boşalt (bellek korunur)"""
+        self._next = 0
+        self._count = 0
+
+    def view(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Son n değerin kopyasız, zaman sıralı view'u"""
+        if n is None or n > self._count:
+            n = self._count
+        end = self._next + self._capacity
+        result = self._columns[field][end - n:end]
+        result.flags.writeable = False
+        return result
+
+    @property
+    def open_time(self) -> np.ndarray:
+        return self.view('open_time')
+
+    @property
+    def open(self) -> np.ndarray:
+        return self.view('open')
+
+    @property
+    def high(self) -> np.ndarray:
+        return self.view('high')
+
+    @property
+    def low(self) -> np.ndarray:
+        return self.view('low')
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.view('close')
+
+    @property
+    def volume(self) -> np.ndarray:
+        return self.view('volume')
+
+    @property
+    def close_time(self) -> np.ndarray:
+        return self.view('close_time')
+
+    def to_klines(self, n: Optional[int] = None) -> List[list]:
+        """Eski liste formatına çevir (AI analizi gibi tüketiciler için)"""
+        columns = [self.view(field, n) for field in
+                   ('open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time')]
+        return [
+            [int(ot), float(o), float(h), float(l), float(c), float(v), int(ct)]
+            for ot, o, h, l, c, v, ct in zip(*columns)
+        ]
+
+
+class KlineBufferStore:
+    """Sembol başına KlineRingBuffer deposu"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._buffers: Dict[str, KlineRingBuffer] = {}
+
+    def get(self, symbol: str) -> KlineRingBuffer:
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            buffer = KlineRingBuffer(self.capacity)
+            self._buffers[symbol] = buffer
+        return buffer
+
+    def remove(self, symbol: str):
+        self._buffers.pop(symbol, None)
+
+    def symbols(self) -> List[str]:
+        return list(self._buffers.keys())
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._buffers
+
+
+def as_kline_buffer(klines: Union[KlineRingBuffer, list]) -> KlineRingBuffer:
+    """Liste formatındaki kline'ları tampona çevir (tampon ise aynen döner)"""
+    if isinstance(klines, KlineRingBuffer):
+        return klines
+    buffer = KlineRingBuffer(max(len(klines), 1))
+    buffer.extend(klines)
+    return buffer
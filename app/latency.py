@@ -0,0 +1,52 @@
+# app/latency.py - GECİKME ÖLÇÜMÜ
+"""
+⏱️ Anahtar bazlı gecikme takibi
+
+- Her anahtar (strateji, sembol, ...) için son N ölçüm tutulur
+- p50 / p99 / max milisaniye olarak raporlanır
+"""
+
+from collections import deque
+from typing import Deque, Dict
+
+
+class LatencyTracker:
+    """
+    ⏱️ Kayan pencereli gecikme istatistiği
+
+    Kullanım:
+        tracker.record("symbol:BTCUSDT", 0.0123)
+        tracker.get_status()  # {'symbol:BTCUSDT': {'count': 1, 'p50_ms': 12.3, ...}}
+    """
+
+    def __init__(self, window: int = 500):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._counts: Dict[str, int] = {}
+
+    def record(self, key: str, seconds: float):
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(seconds)
+        self._counts[key] = self._counts.get(key, 0) + 1
+
+    @staticmethod
+    def _percentile(ordered: list, percent: float) -> float:
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def summary(self, key: str) -> dict:
+        samples = self._samples.get(key)
+        if not samples:
+            return {"count": 0, "p50_ms": None, "p99_ms": None, "max_ms": None}
+        ordered = sorted(samples)
+        return {
+            "count": self._counts[key],
+            "p50_ms": round(self._percentile(ordered, 50) * 1000, 2),
+            "p99_ms": round(self._percentile(ordered, 99) * 1000, 2),
+            "max_ms": round(ordered[-1] * 1000, 2)
+        }
+
+    def get_status(self) -> dict:
+        return {key: self.summary(key) for key in self._samples}
@@ -5,14 +5,21 @@ from fastapi.security import HTTPBearer
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, JSONResponse
 from pydantic import BaseModel
+from typing import List
 import time
 
 from .config import settings
 from .firebase_manager import firebase_manager
 from .binance_client import create_binance_client
+from .rate_limiter import PRIORITY_BACKGROUND
 from .fast_scalping_strategy import FastScalpingStrategy
 from .professional_scalping_strategy import ProfessionalScalpingStrategy
 from .fast_scalping_bot import create_bot
+from .market_data import create_market_data_feed
+from .orchestrator import create_orchestrator
+from .sharding import create_sharded_gateway
+from .gemini_analyzer import gemini_analyzer
+from .gemini_trading_manager import gemini_trading_manager
 
 bearer_scheme = HTTPBearer()
 
@@ -24,6 +31,7 @@ app = FastAPI(
 
 # Instance'ları global olarak oluştur
 binance_client = create_binance_client(settings)
+market_data_feed = create_market_data_feed(settings)
 
 # Strateji seçimi - config'e göre
 if settings.USE_PROFESSIONAL_STRATEGY:
@@ -33,7 +41,13 @@ else:
     strategy = FastScalpingStrategy()
     print("✅ Fast Scalping Strategy aktif")
 
-fast_scalping_bot = create_bot(settings, binance_client, strategy, firebase_manager)
+fast_scalping_bot = create_bot(settings, binance_client, strategy, firebase_manager, market_data_feed)
+
+# Çoklu sembol: tek süreç orkestratör veya süreç bazlı shard'lar (aynı arayüz)
+if settings.USE_SHARDED_WORKERS:
+    orchestrator = create_sharded_gateway(settings, binance_client, strategy, firebase_manager, market_data_feed)
+else:
+    orchestrator = create_orchestrator(settings, binance_client, strategy, firebase_manager, market_data_feed)
 
 
 # ===================== STARTUP =====================
@@ -75,6 +89,12 @@ async def shutdown_event():
     try:
         if fast_scalping_bot and fast_scalping_bot.status["is_running"]:
             await fast_scalping_bot.stop()
+        if orchestrator.workers:
+            await orchestrator.stop()
+        if gemini_trading_manager.is_running:
+            await gemini_trading_manager.stop_autonomous_trading()
+        await market_data_feed.stop()
+        await gemini_analyzer.flush_cache()
         await binance_client.close()
         print("✅ Bot güvenli kapatıldı")
     except Exception as e:
@@ -86,6 +106,10 @@ class StartRequest(BaseModel):
     symbol: str
 
 
+class MultiStartRequest(BaseModel):
+    symbols: List[str]
+
+
 # ===================== KİMLİK DOĞRULAMA =====================
 async def authenticate(token: str = Depends(bearer_scheme)):
     """Firebase authentication"""
@@ -107,7 +131,7 @@ async def start_bot(
 ):
     """⚡ Hızlı Scalping Bot başlatma"""
     try:
-        if fast_scalping_bot.status["is_running"]:
+        if fast_scalping_bot.status["is_running"] or orchestrator.workers:
             raise HTTPException(status_code=400, detail="Bot zaten çalışıyor")
         
         symbol = request.symbol.upper().strip()
@@ -148,11 +172,13 @@ async def start_bot(
 async def stop_bot(user: dict = Depends(authenticate)):
     """🛑 Bot durdurma"""
     try:
-        if not fast_scalping_bot.status["is_running"]:
+        if orchestrator.workers:
+            await orchestrator.stop()
+        elif fast_scalping_bot.status["is_running"]:
+            await fast_scalping_bot.stop()
+        else:
             raise HTTPException(status_code=400, detail="Bot zaten durdurulmuş")
         
-        await fast_scalping_bot.stop()
-        
         return JSONResponse({
             "success": True,
             "message": "Bot durduruldu",
@@ -179,6 +205,64 @@ async def get_status(user: dict = Depends(authenticate)):
         })
 
 
+@app.post("/api/multi-start")
+async def multi_start(request: MultiStartRequest, user: dict = Depends(authenticate)):
+    """🧩 Çoklu sembol başlatma (paylaşılan istemci + portföy limitleri)"""
+    try:
+        if fast_scalping_bot.status["is_running"]:
+            raise HTTPException(status_code=400, detail="Tek sembol bot çalışıyor, önce durdurun")
+        
+        symbols = [s.upper().strip() for s in request.symbols if s.strip()]
+        if not symbols:
+            raise HTTPException(status_code=400, detail="En az bir symbol gerekli")
+        if len(symbols) > settings.MULTI_MAX_SYMBOLS:
+            raise HTTPException(status_code=400, detail=f"Maksimum {settings.MULTI_MAX_SYMBOLS} symbol")
+        
+        user_email = user.get('email', 'anonymous')
+        print(f"👤 {user_email} çoklu bot başlatıyor: {', '.join(symbols)}")
+        
+        started = await orchestrator.start(symbols)
+        
+        return JSONResponse({
+            "success": bool(started),
+            "message": f"{len(started)} sembol için bot başlatılıyor...",
+            "started": started,
+            "user": user_email,
+            "status": orchestrator.get_status()
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/multi-status")
+async def multi_status(user: dict = Depends(authenticate)):
+    """🧩 Tüm sembollerin özeti (REST çağrısı yok)"""
+    try:
+        if orchestrator.workers or not fast_scalping_bot.status["is_running"]:
+            return JSONResponse(orchestrator.get_status())
+        
+        # Tek sembol modu - aynı formatta döndür
+        status = fast_scalping_bot.get_status()
+        symbol = status["symbol"]
+        return JSONResponse({
+            **status,
+            "mode": "single",
+            "symbols": [symbol] if symbol else [],
+            "active_symbol": symbol,
+            "order_size": fast_scalping_bot.order_builder.position_size,
+            "last_signals": {symbol: status["last_signal"]} if symbol else {}
+        })
+    except Exception as e:
+        return JSONResponse({
+            "is_running": False,
+            "status_message": f"Status hatası: {str(e)}",
+            "timestamp": time.time()
+        })
+
+
 @app.get("/api/health")
 async def health_check():
     """🏥 Sağlık kontrolü"""
@@ -186,10 +270,12 @@ async def health_check():
         status = fast_scalping_bot.get_status()
         return JSONResponse({
             "status": "healthy",
-            "bot_running": status["is_running"],
+            "bot_running": status["is_running"] or orchestrator.is_running,
+            "multi_symbols": list(orchestrator.workers),
             "strategy": "Optimized Scalping v2.0",
             "version": "2.0.0",
             "timestamp": time.time(),
+            "rate_limiter": binance_client.rate_limiter.get_status(),
             "config": {
                 "environment": settings.ENVIRONMENT,
                 "timeframe": "1m",
@@ -219,9 +305,12 @@ async def get_account_info(user: dict = Depends(authenticate)):
         
         balance = await binance_client.get_account_balance()
         
-        await binance_client._rate_limit_delay()
-        all_positions = await binance_client.client.futures_position_information()
-        open_positions = [p for p in all_positions if float(p['positionAmt']) != 0]
+        if binance_client.order_book.is_live:
+            open_positions = binance_client.order_book.get_open_positions()
+        else:
+            all_positions = await binance_client._call(binance_client.client.futures_position_information,
+                                                      weight=5, priority=PRIORITY_BACKGROUND)
+            open_positions = [p for p in all_positions if float(p['positionAmt']) != 0]
         
         position_summary = []
         total_pnl = 0.0
@@ -253,6 +342,67 @@ async def get_account_info(user: dict = Depends(authenticate)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ===================== GEMINI AI =====================
+@app.get("/api/gemini-status")
+async def gemini_status(user: dict = Depends(authenticate)):
+    """🤖 Gemini AI durumu + cache istatistikleri"""
+    return JSONResponse({
+        "success": True,
+        "status": gemini_analyzer.get_status(),
+        "timestamp": time.time()
+    })
+
+
+@app.post("/api/gemini-clear-cache")
+async def gemini_clear_cache(user: dict = Depends(authenticate)):
+    """🧹 Gemini cache temizleme"""
+    try:
+        cleared = len(gemini_analyzer.cache)
+        await gemini_analyzer.clear_cache()
+        return JSONResponse({
+            "success": True,
+            "message": f"Gemini cache temizlendi ({cleared} kayıt)",
+            "cache": gemini_analyzer.cache.get_stats()
+        })
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/ai-trading/start")
+async def ai_trading_start(background_tasks: BackgroundTasks, user: dict = Depends(authenticate)):
+    """🤖 Otonom AI trading başlatma (screener adayları + Gemini onayı)"""
+    if not gemini_trading_manager.enabled:
+        raise HTTPException(status_code=400, detail="GEMINI_API_KEY tanımlı değil")
+    if gemini_trading_manager.is_running:
+        raise HTTPException(status_code=400, detail="AI trading zaten çalışıyor")
+    
+    background_tasks.add_task(gemini_trading_manager.start_autonomous_trading)
+    return JSONResponse({
+        "success": True,
+        "message": "Otonom AI trading başlatılıyor...",
+        "user": user.get('email', 'anonymous')
+    })
+
+
+@app.post("/api/ai-trading/stop")
+async def ai_trading_stop(user: dict = Depends(authenticate)):
+    """🛑 Otonom AI trading durdurma"""
+    if not gemini_trading_manager.is_running:
+        raise HTTPException(status_code=400, detail="AI trading zaten durdurulmuş")
+    await gemini_trading_manager.stop_autonomous_trading()
+    return JSONResponse({"success": True, "message": "Otonom AI trading durduruldu"})
+
+
+@app.get("/api/ai-trading/status")
+async def ai_trading_status(user: dict = Depends(authenticate)):
+    """📊 Otonom AI trading + screener durumu"""
+    return JSONResponse({
+        "success": True,
+        "status": gemini_trading_manager.get_status(),
+        "timestamp": time.time()
+    })
+
+
 # ===================== STATIC FILES =====================
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
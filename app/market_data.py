@@ -0,0 +1,294 @@
+# app/market_data.py - ÇOKLU SEMBOL COMBINED STREAM MARKET DATA
+"""
+🌐 Binance combined stream tabanlı market data servisi
+
+- /stream?streams=a@kline_1m/b@kline_1m/... ile tek bağlantıda çok sembol
+- Bağlantı başına stream limiti kadar doldur, gerekirse yeni bağlantı aç
+- Mesajları sembol bazlı handler'lara yönlendir
+- SUBSCRIBE/UNSUBSCRIBE ile yeniden bağlanmadan canlı abonelik
+"""
+
+import asyncio
+import json
+import websockets
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+StreamHandler = Callable[[str, dict], Awaitable[None]]
+
+
+class _StreamConnection:
+    """Tek bir combined stream bağlantısı (shard)"""
+
+    CONTROL_MESSAGE_INTERVAL = 0.11  # Binance: bağlantı başına max 10 mesaj/sn
+
+    def __init__(self, feed: "MarketDataFeed", shard_id: int):
+        self.feed = feed
+        self.shard_id = shard_id
+        self.streams: Set[str] = set()
+        self.ws = None
+        self.task: Optional[asyncio.Task] = None
+        self.reconnects = 0
+        self.messages = 0
+
+        self._active: Set[str] = set()  # Sunucuya bildirilmiş stream'ler
+        self._request_id = 0
+        self._control_lock = asyncio.Lock()
+        self._closing = False
+
+    @property
+    def is_connected(self) -> bool:
+        return self.ws is not None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self._closing = False
+            self.task = asyncio.create_task(self._run())
+
+    async def close(self):
+        self._closing = True
+        if self.ws:
+            try:
+                await self.ws.close()
+            except:
+                pass
+        if self.task and self.task is not asyncio.current_task():
+            self.task.cancel()
+            try:
+                await self.task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self.ws = None
+
+    async def _run(self):
+        settings = self.feed.settings
+        attempts = 0
+
+        while not self._closing and self.streams:
+            streams = set(self.streams)
+            url = f"{settings.WEBSOCKET_URL}/stream?streams={'/'.join(sorted(streams))}"
+
+            try:
+                async with websockets.connect(
+                    url,
+                    ping_interval=settings.WEBSOCKET_PING_INTERVAL,
+                    ping_timeout=settings.WEBSOCKET_PING_TIMEOUT,
+                    close_timeout=settings.WEBSOCKET_CLOSE_TIMEOUT
+                ) as ws:
+                    self.ws = ws
+                    self._active = streams
+                    attempts = 0
+                    print(f"✅ Market data shard #{self.shard_id} bağlandı ({len(streams)} stream)")
+
+                    # Bağlanırken değişen abonelikleri eşitle
+                    await self._sync_subscriptions()
+
+                    async for message in ws:
+                        self.messages += 1
+                        await self.feed._dispatch_raw(message)
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._closing:
+                    print(f"⚠️ Market data shard #{self.shard_id} hatası: {e}")
+            finally:
+                self.ws = None
+                self._active = set()
+
+            if self._closing or not self.streams:
+                break
+
+            attempts += 1
+            self.reconnects += 1
+            backoff = min(5 * attempts, 30)
+            print(f"⏳ Shard #{self.shard_id} yeniden bağlanıyor... ({backoff}s)")
+            await asyncio.sleep(backoff)
+
+        print(f"🛑 Market data shard #{self.shard_id} kapatıldı")
+
+    async def _send_control(self, method: str, params: List[str]):
+        async with self._control_lock:
+            if not self.ws or not params:
+                return
+            self._request_id += 1
+            await self.ws.send(json.dumps({
+                "method": method,
+                "params": params,
+                "id": self._request_id
+            }))
+            await asyncio.sleep(self.CONTROL_MESSAGE_INTERVAL)
+
+    async def _sync_subscriptions(self):
+        """Hedef stream kümesi ile sunucudaki kümeyi eşitle"""
+        to_add = sorted(self.streams - self._active)
+        to_remove = sorted(self._active - self.streams)
+
+        if to_add:
+            await self._send_control("SUBSCRIBE", to_add)
+            self._active |= set(to_add)
+        if to_remove:
+            await self._send_control("UNSUBSCRIBE", to_remove)
+            self._active -= set(to_remove)
+
+    async def add(self, streams: List[str]):
+        self.streams |= set(streams)
+        if self.ws:
+            await self._sync_subscriptions()
+        else:
+            self.start()
+
+    async def remove(self, streams: List[str]):
+        self.streams -= set(streams)
+        if not self.streams:
+            await self.close()
+        elif self.ws:
+            await self._sync_subscriptions()
+
+
+class MarketDataFeed:
+    """
+    📡 Paylaşılan Market Data Servisi
+
+    Kullanım:
+        await feed.subscribe("BTCUSDT", handler)            # btcusdt@kline_1m
+        await feed.subscribe("ETHUSDT", handler, "aggTrade")
+        await feed.unsubscribe("BTCUSDT", handler)
+
+    handler(symbol, data) → data, combined stream'in 'data' alanıdır.
+    """
+
+    def __init__(self, settings):
+        self.settings = settings
+        self.max_streams_per_connection = settings.WEBSOCKET_MAX_STREAMS_PER_CONNECTION
+        self._connections: List[_StreamConnection] = []
+        self._stream_owner: Dict[str, _StreamConnection] = {}
+        self._handlers: Dict[str, List[StreamHandler]] = {}
+        self._next_shard_id = 0
+        self._lock = asyncio.Lock()
+        self.dispatch_errors = 0
+
+        print(f"📡 Market Data Feed hazır (bağlantı başına max {self.max_streams_per_connection} stream)")
+
+    @staticmethod
+    def stream_name(symbol: str, stream_type: str = "kline_1m") -> str:
+        if symbol.startswith('!'):
+            return f"{symbol}@{stream_type}"  # Tüm piyasa stream'leri (!miniTicker@arr) büyük/küçük harf duyarlı
+        return f"{symbol.lower()}@{stream_type}"
+
+    @property
+    def connection_count(self) -> int:
+        return sum(1 for conn in self._connections if conn.is_connected)
+
+    @property
+    def stream_count(self) -> int:
+        return len(self._stream_owner)
+
+    def _pick_connection(self) -> _StreamConnection:
+        """Yeri olan en dolu bağlantıyı seç (bağlantı sayısını minimumda tut)"""
+        candidates = [c for c in self._connections
+                      if len(c.streams) < self.max_streams_per_connection]
+        if candidates:
+            return max(candidates, key=lambda c: len(c.streams))
+
+        connection = _StreamConnection(self, self._next_shard_id)
+        self._next_shard_id += 1
+        self._connections.append(connection)
+        return connection
+
+    async def subscribe(self, symbol: str, handler: StreamHandler, stream_type: str = "kline_1m"):
+        """Sembol stream'ine handler ekle"""
+        stream = self.stream_name(symbol, stream_type)
+
+        async with self._lock:
+            handlers = self._handlers.setdefault(stream, [])
+            if handler not in handlers:
+                handlers.append(handler)
+
+            if stream in self._stream_owner:
+                return
+
+            connection = self._pick_connection()
+            self._stream_owner[stream] = connection
+            await connection.add([stream])
+            print(f"➕ {stream} abone olundu (shard #{connection.shard_id})")
+
+    async def unsubscribe(self, symbol: str, handler: Optional[StreamHandler] = None,
+                          stream_type: str = "kline_1m"):
+        """Handler'ı kaldır, stream'i dinleyen kalmadıysa abonelikten çık"""
+        stream = self.stream_name(symbol, stream_type)
+
+        async with self._lock:
+            handlers = self._handlers.get(stream, [])
+            if handler is not None and handler in handlers:
+                handlers.remove(handler)
+            if handler is not None and handlers:
+                return
+
+            self._handlers.pop(stream, None)
+            connection = self._stream_owner.pop(stream, None)
+            if connection is None:
+                return
+
+            await connection.remove([stream])
+            if not connection.streams:
+                self._connections.remove(connection)
+            print(f"➖ {stream} abonelikten çıkıldı")
+
+    async def _dispatch_raw(self, message: str):
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            return
+
+        stream = payload.get('stream')
+        if not stream:
+            return  # SUBSCRIBE/UNSUBSCRIBE yanıtları
+
+        data = payload.get('data', {})
+        symbol = (data.get('s') if isinstance(data, dict) else None) or stream.split('@', 1)[0].upper()
+
+        for handler in list(self._handlers.get(stream, [])):
+            try:
+                await handler(symbol, data)
+            except Exception as e:
+                self.dispatch_errors += 1
+                print(f"❌ {stream} handler hatası: {e}")
+
+    async def stop(self):
+        """Tüm bağlantıları kapat"""
+        async with self._lock:
+            for connection in self._connections:
+                await connection.close()
+            self._connections.clear()
+            self._stream_owner.clear()
+            self._handlers.clear()
+        print("🛑 Market Data Feed durduruldu")
+
+    def get_status(self) -> dict:
+        return {
+            "connections": self.connection_count,
+            "streams": self.stream_count,
+            "max_streams_per_connection": self.max_streams_per_connection,
+            "shards": [
+                {
+                    "id": conn.shard_id,
+                    "connected": conn.is_connected,
+                    "streams": len(conn.streams),
+                    "messages": conn.messages,
+                    "reconnects": conn.reconnects
+                }
+                for conn in self._connections
+            ],
+            "dispatch_errors": self.dispatch_errors
+        }
+
+
+# main.py'nin import edebilmesi için global instance
+market_data_feed = None
+
+
+def create_market_data_feed(settings):
+    """Market data feed instance'ı oluştur"""
+    global market_data_feed
+    market_data_feed = MarketDataFeed(settings)
+    return market_data_feed
@@ -0,0 +1,273 @@
+# app/orchestrator.py - ÇOKLU SEMBOL ORKESTRATÖRÜ
+"""
+🧩 Tek süreçte çok sembollü trading
+
+- Her sembol için bir OptimizedScalpingBot işçisi
+- Tüm işçiler tek FixedBinanceClient, tek market data feed, tek rate limiter
+  ve tek emir şablonu (OrderBuilder) paylaşır
+- Portföy limitleri: eşzamanlı pozisyon, toplam marjin, ortak günlük trade bütçesi
+- Durum özeti REST çağrısı yapmadan bellekten üretilir
+"""
+
+import asyncio
+import time
+from datetime import date, datetime, timezone
+from typing import Dict, List
+
+from .fast_scalping_bot import OptimizedScalpingBot
+from .order_builder import OrderBuilder
+
+
+class PortfolioLimits:
+    """
+    🛡️ Portföy genelinde risk limitleri
+
+    Kullanım:
+        if await limits.reserve("BTCUSDT", margin, balance):
+            try:
+                ...  # emri gönder
+            finally:
+                limits.release("BTCUSDT", filled)  # Dolmayan giriş günlük bütçeden düşülmez
+    """
+
+    def __init__(self, settings, binance_client):
+        self.binance_client = binance_client
+        self.max_positions = settings.MULTI_MAX_OPEN_POSITIONS
+        self.max_margin_percent = settings.MULTI_MAX_MARGIN_PERCENT
+        self.daily_budget = settings.MULTI_MAX_DAILY_TRADES
+
+        self.daily_trades = 0
+        self._day = datetime.now(timezone.utc).date()
+        self._reserved: Dict[str, float] = {}  # Gönderilmekte olan girişlerin marjini
+        self._reserved_day: Dict[str, date] = {}  # Girişin günlük bütçeden düştüğü gün
+        self._lock = asyncio.Lock()
+        self._releases = 0  # release sayacı - okunan pozisyon listesinin hâlâ geçerli olup olmadığı
+        self.rejections = {"positions": 0, "margin": 0, "daily": 0}
+
+    def _check_daily_reset(self):
+        today = datetime.now(timezone.utc).date()
+        if today != self._day:
+            self.daily_trades = 0
+            self._day = today
+
+    def can_trade(self) -> bool:
+        """Ucuz ön kontrol - ortak günlük bütçe"""
+        self._check_daily_reset()
+        return self.daily_trades < self.daily_budget
+
+    @staticmethod
+    def _position_margin(position: dict) -> float:
+        leverage = max(float(position.get('leverage') or 1), 1.0)
+        return abs(float(position['positionAmt'])) * float(position['entryPrice']) / leverage
+
+    async def reserve(self, symbol: str, margin: float, balance: float) -> bool:
+        """Giriş için yer ayır - limit aşılırsa False"""
+        while True:
+            if not self._reject_daily(symbol):
+                return False
+
+            # REST çağrısı kilit dışında - kilit altında sadece hesap yapılır
+            releases = self._releases
+            positions = await self.binance_client.get_open_positions()
+
+            async with self._lock:
+                if releases != self._releases:
+                    continue  # Arada biten giriş listede olmayabilir - pozisyonları yeniden oku
+                if not self._reject_daily(symbol):
+                    return False
+
+                open_symbols = {p['symbol'] for p in positions} | set(self._reserved)
+                if symbol not in open_symbols and len(open_symbols) >= self.max_positions:
+                    self.rejections["positions"] += 1
+                    print(f"⚠️ {symbol}: Max eşzamanlı pozisyon ({len(open_symbols)}/{self.max_positions})")
+                    return False
+
+                used_margin = sum(self._position_margin(p) for p in positions) + sum(self._reserved.values())
+                margin_limit = balance * self.max_margin_percent
+                if used_margin + margin > margin_limit:
+                    self.rejections["margin"] += 1
+                    print(f"⚠️ {symbol}: Marjin limiti ({used_margin + margin:.2f} > {margin_limit:.2f} USDT)")
+                    return False
+
+                # Eşzamanlı girişler bütçeyi aşmasın diye hemen sayılır, dolmazsa release iade eder
+                self._reserved[symbol] = margin
+                self._reserved_day[symbol] = self._day
+                self.daily_trades += 1
+                return True
+
+    def _reject_daily(self, symbol: str) -> bool:
+        """Günlük bütçe kontrolü - doluysa reddi say ve False dön"""
+        if self.can_trade():
+            return True
+        self.rejections["daily"] += 1
+        print(f"⚠️ {symbol}: Portföy günlük bütçesi doldu ({self.daily_trades}/{self.daily_budget})")
+        return False
+
+    def release(self, symbol: str, filled: bool = True):
+        """Emir sonuçlandı - pozisyon artık emir defterinden sayılır; dolmadıysa günlük hak iade edilir"""
+        self._reserved.pop(symbol, None)
+        reserved_day = self._reserved_day.pop(symbol, None)
+        self._releases += 1
+        if not filled and reserved_day == self._day and self.daily_trades > 0:
+            self.daily_trades -= 1
+
+    def get_status(self) -> dict:
+        return {
+            "daily_trades": self.daily_trades,
+            "daily_budget": self.daily_budget,
+            "max_open_positions": self.max_positions,
+            "max_margin_percent": self.max_margin_percent,
+            "pending_entries": list(self._reserved),
+            "rejections": dict(self.rejections)
+        }
+
+
+class TradingOrchestrator:
+    """
+    🧩 Sembol başına işçi yöneten orkestratör
+
+    Kullanım:
+        await orchestrator.start(["BTCUSDT", "ETHUSDT"])
+        status = orchestrator.get_status()
+        await orchestrator.stop()
+    """
+
+    def __init__(self, settings, binance_client, strategy, firebase_manager, market_data):
+        self.settings = settings
+        self.binance_client = binance_client
+        self.strategy = strategy
+        self.firebase = firebase_manager
+        self.market_data = market_data
+
+        self.portfolio = PortfolioLimits(settings, binance_client)
+        self.order_builder = OrderBuilder(settings, binance_client)
+        self.workers: Dict[str, OptimizedScalpingBot] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.started_at = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return any(worker.status["is_running"] for worker in self.workers.values())
+
+    @staticmethod
+    def _normalize(symbol: str) -> str:
+        symbol = symbol.upper().strip()
+        return symbol if symbol.endswith('USDT') else symbol + 'USDT'
+
+    # ===================== YAŞAM DÖNGÜSÜ =====================
+    async def start(self, symbols: List[str]) -> List[str]:
+        """Paylaşılan istemciyi bir kez başlat, her sembol için işçi aç"""
+        await self.binance_client.initialize()
+        if not self.started_at:
+            self.started_at = time.time()
+
+        started = []
+        for symbol in symbols:
+            if await self.add_symbol(symbol):
+                started.append(self._normalize(symbol))
+        return started
+
+    async def add_symbol(self, symbol: str) -> bool:
+        symbol = self._normalize(symbol)
+        if symbol in self.workers:
+            print(f"⚠️ {symbol} zaten çalışıyor")
+            return False
+        if len(self.workers) >= self.settings.MULTI_MAX_SYMBOLS:
+            print(f"⚠️ Max sembol sayısı: {self.settings.MULTI_MAX_SYMBOLS}")
+            return False
+
+        worker = OptimizedScalpingBot(
+            self.settings, self.binance_client, self.strategy, self.firebase,
+            self.market_data, order_builder=self.order_builder, portfolio=self.portfolio
+        )
+        self.workers[symbol] = worker
+        self._tasks[symbol] = asyncio.create_task(self._run_worker(symbol, worker))
+        print(f"🧩 {symbol} işçisi başlatıldı ({len(self.workers)} sembol)")
+        return True
+
+    async def _run_worker(self, symbol: str, worker: OptimizedScalpingBot):
+        try:
+            await worker.start(symbol)
+        finally:
+            # Başlatma hatası veya durdurma - işçiyi listeden çıkar
+            if self.workers.get(symbol) is worker:
+                self.workers.pop(symbol, None)
+                self._tasks.pop(symbol, None)
+
+    async def remove_symbol(self, symbol: str) -> bool:
+        symbol = self._normalize(symbol)
+        worker = self.workers.pop(symbol, None)
+        task = self._tasks.pop(symbol, None)
+        if worker is None:
+            return False
+        await worker.stop()
+        if task:
+            try:
+                await asyncio.wait_for(task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                task.cancel()
+        print(f"🛑 {symbol} işçisi durduruldu")
+        return True
+
+    async def stop(self):
+        await asyncio.gather(
+            *(self.remove_symbol(symbol) for symbol in list(self.workers)),
+            return_exceptions=True
+        )
+        await self.order_builder.stop()
+        self.started_at = 0.0
+        print("🛑 Orkestratör durduruldu")
+
+    # ===================== DURUM =====================
+    def get_status(self) -> dict:
+        """Tüm işçilerin özeti (REST çağrısı yok)"""
+        book = self.binance_client.order_book
+        positions = {p['symbol']: p for p in book.get_open_positions()} if book.is_live else {}
+
+        workers = {}
+        for symbol, worker in self.workers.items():
+            status = worker.status
+            workers[symbol] = {
+                "is_running": status["is_running"],
+                "status_message": status["status_message"],
+                "last_signal": status["last_signal"],
+                "daily_trades": status["daily_trades"],
+                "successful_trades": status["successful_trades"],
+                "failed_trades": status["failed_trades"],
+                "has_position": symbol in positions,
+                "analysis_p99_ms": worker.analysis_latency.summary(f"symbol:{symbol}")["p99_ms"],
+                "late_analyses": worker.late_analyses
+            }
+
+        active = next((symbol for symbol in self.workers if symbol in positions), None)
+        position_amt = float(positions[active]['positionAmt']) if active else 0.0
+        running = self.is_running
+
+        return {
+            "is_running": running,
+            "mode": "multi",
+            "symbols": list(self.workers),
+            "active_symbol": active,
+            "position_side": ("LONG" if position_amt > 0 else "SHORT") if active else None,
+            "status_message": f"🧩 {len(self.workers)} sembol aktif" if running else "⚡ Orkestratör durduruldu",
+            "account_balance": self.order_builder.balance,
+            "position_pnl": sum(float(positions[s].get('unRealizedProfit', 0)) for s in self.workers if s in positions),
+            "order_size": self.order_builder.position_size,
+            "last_signals": {symbol: worker["last_signal"] for symbol, worker in workers.items()},
+            "websocket_connections": self.market_data.connection_count,
+            "uptime_seconds": int(time.time() - self.started_at) if self.started_at else 0,
+            "workers": workers,
+            "portfolio": self.portfolio.get_status(),
+            "timestamp": time.time()
+        }
+
+
+# Global instance
+orchestrator = None
+
+
+def create_orchestrator(settings, binance_client, strategy, firebase_manager, market_data):
+    """Orkestratör instance'ı oluştur"""
+    global orchestrator
+    orchestrator = TradingOrchestrator(settings, binance_client, strategy, firebase_manager, market_data)
+    return orchestrator
@@ -0,0 +1,373 @@
+# app/order_book.py - YEREL EMİR / POZİSYON DEFTERİ
+"""
+📒 Süreç içi emir ve pozisyon defteri
+
+- Başlangıçta tek REST snapshot (tüm pozisyonlar + tüm açık emirler)
+- Sonrasında ORDER_TRADE_UPDATE / ACCOUNT_UPDATE olayları ile güncellenir
+- Kayıtlar REST yanıtlarıyla aynı şekildedir (positionAmt, entryPrice, origQty...),
+  mevcut tüketiciler değişmeden O(1) okur
+- TP/SL bacakları kardeş olarak bağlanır; biri dolunca diğeri iptal edilir
+- Periyodik uzlaştırma ile kayma yakalanır
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
+
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_CRITICAL, PRIORITY_NORMAL
+from .user_data_stream import FINAL_ORDER_STATUSES, STREAM_CONNECTED, STREAM_DISCONNECTED
+
+# Kapanan emir ID'leri bu süre boyunca hatırlanır (uçuştaki snapshot geri eklemesin)
+CLOSED_ORDER_TTL_SECONDS = 600
+
+
+class OrderBook:
+    """
+    📒 Hesap geneli emir / pozisyon defteri
+
+    Kullanım:
+        if book.is_live:
+            position = book.get_position("BTCUSDT")   # REST positionRisk kaydı gibi
+            orders = book.get_open_orders("BTCUSDT")  # REST openOrders kaydı gibi
+    """
+
+    def __init__(self, settings, binance_client):
+        self.settings = settings
+        self.binance_client = binance_client
+
+        self._positions: Dict[str, Dict[str, dict]] = {}  # symbol → positionSide → kayıt
+        self._orders: Dict[int, dict] = {}                 # orderId → açık emir
+        self._orders_by_symbol: Dict[str, Set[int]] = {}
+        self._closed_orders: Dict[int, float] = {}        # orderId → kapanış zamanı
+        self._resync_pending = False
+        self._disconnected_at = 0.0
+        self._listening = False
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._background_tasks: set = set()
+
+        self.snapshot_time = 0.0
+        self.events_applied = 0
+        self.reconciliations = 0
+        self.drift_corrections = 0
+        self.orders_closed = 0
+        self.resyncs = 0
+
+    # ===================== DURUM =====================
+    @property
+    def is_live(self) -> bool:
+        """Snapshot alındı ve olaylar akıyor mu?"""
+        stream = self.binance_client.user_stream
+        return bool(self.snapshot_time and self._listening and stream and stream.is_connected)
+
+    def get_position(self, symbol: str) -> Optional[dict]:
+        """Sembolün açık pozisyonu (yoksa None)"""
+        for position in self._positions.get(symbol, {}).values():
+            if float(position['positionAmt']) != 0:
+                return position
+        return None
+
+    def has_position(self, symbol: str) -> bool:
+        return self.get_position(symbol) is not None
+
+    def get_open_positions(self) -> List[dict]:
+        return [
+            position
+            for sides in self._positions.values()
+            for position in sides.values()
+            if float(position['positionAmt']) != 0
+        ]
+
+    def get_open_orders(self, symbol: str) -> List[dict]:
+        return [self._orders[order_id] for order_id in self._orders_by_symbol.get(symbol, ())]
+
+    def get_order(self, order_id: int) -> Optional[dict]:
+        return self._orders.get(order_id)
+
+    # ===================== YAŞAM DÖNGÜSÜ =====================
+    async def start(self):
+        """Olay dinleyicilerini bağla, snapshot al, uzlaştırmayı başlat"""
+        stream = self.binance_client.user_stream
+        if stream and not self._listening:
+            stream.add_listener('ORDER_TRADE_UPDATE', self._on_order_update)
+            stream.add_listener('ACCOUNT_UPDATE', self._on_account_update)
+            stream.add_listener(STREAM_DISCONNECTED, self._on_stream_disconnected)
+            stream.add_listener(STREAM_CONNECTED, self._on_stream_connected)
+            self._listening = True
+
+        await self.load_snapshot(priority=PRIORITY_NORMAL)
+
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop())
+
+    async def stop(self):
+        stream = self.binance_client.user_stream
+        if stream and self._listening:
+            stream.remove_listener('ORDER_TRADE_UPDATE', self._on_order_update)
+            stream.remove_listener('ACCOUNT_UPDATE', self._on_account_update)
+            stream.remove_listener(STREAM_DISCONNECTED, self._on_stream_disconnected)
+            stream.remove_listener(STREAM_CONNECTED, self._on_stream_connected)
+            self._listening = False
+        for task in [self._reconcile_task, *self._background_tasks]:
+            if task and not task.done():
+                task.cancel()
+        self._reconcile_task = None
+        self._background_tasks.clear()
+
+    async def _reconcile_loop(self):
+        while True:
+            await asyncio.sleep(self.settings.ORDER_BOOK_RECONCILE_SECONDS)
+            try:
+                await self.load_snapshot()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Emir defteri uzlaştırma hatası: {e}")
+
+    # ===================== SNAPSHOT =====================
+    async def load_snapshot(self, priority: int = PRIORITY_BACKGROUND) -> bool:
+        """Tüm pozisyonlar + tüm açık emirler (2 istek) ile defteri eşitle"""
+        try:
+            requested_time = time.time()
+            requested_at = int(requested_time * 1000)
+            client = self.binance_client.client
+            positions = await self.binance_client._call(
+                client.futures_position_information, weight=5, priority=priority)
+            open_orders = await self.binance_client._call(
+                client.futures_get_open_orders, weight=40, priority=priority)
+        except Exception as e:
+            print(f"⚠️ Emir defteri snapshot hatası: {e}")
+            return False
+
+        first_load = not self.snapshot_time
+        drift = 0
+
+        for position in positions or []:
+            if self._apply_position(position, int(position.get('updateTime', 0))):
+                drift += 1
+
+        # Snapshot'ta olmayan ve istekten önce güncellenmiş emirler kapanmıştır.
+        # İstek uçuştayken olayla kapanan emirler geri eklenmez (_store_order atlar)
+        self._prune_closed()
+        snapshot_ids = set()
+        for order in open_orders or []:
+            snapshot_ids.add(order['orderId'])
+            is_new = order['orderId'] not in self._orders
+            if self._store_order(dict(order)) and is_new:
+                drift += 1
+        for order_id, order in list(self._orders.items()):
+            if order_id not in snapshot_ids and int(order.get('updateTime', 0)) < requested_at:
+                self._remove_order(order_id)
+                drift += 1
+
+        # İstek uçuştayken stream koptuysa snapshot canlılık için yetmez (yeniden eşitleme bekler)
+        if self._disconnected_at < requested_time:
+            self.snapshot_time = time.time()
+        if first_load:
+            print(f"📒 Emir defteri yüklendi: {len(self.get_open_positions())} pozisyon, {len(self._orders)} açık emir")
+        else:
+            self.reconciliations += 1
+            if drift:
+                self.drift_corrections += drift
+                print(f"📒 Emir defteri uzlaştırıldı ({drift} düzeltme)")
+        return True
+
+    def _apply_position(self, position: dict, update_time: int) -> bool:
+        """REST kaydını uygula, değişiklik olduysa True"""
+        symbol = position['symbol']
+        side = position.get('positionSide', 'BOTH')
+        current = self._positions.get(symbol, {}).get(side)
+        if current and int(current.get('updateTime', 0)) > update_time:
+            return False  # Olay snapshot'tan daha yeni
+
+        changed = current is not None and float(current['positionAmt']) != float(position['positionAmt'])
+        if float(position['positionAmt']) == 0 and current is None:
+            return False  # Boş sembolleri tutma
+        self._positions.setdefault(symbol, {})[side] = dict(position)
+        return changed
+
+    # ===================== EMİRLER =====================
+    def _store_order(self, order: dict) -> bool:
+        """Emri kaydet - kapanmış veya daha eski bir kopyaysa False"""
+        if order['orderId'] in self._closed_orders:
+            return False
+        previous = self._orders.get(order['orderId'])
+        if previous and int(previous.get('updateTime', 0)) > int(order.get('updateTime', 0)):
+            return False  # Defterdeki kayıt daha yeni
+        if previous and previous.get('siblingOrderId') and not order.get('siblingOrderId'):
+            order['siblingOrderId'] = previous['siblingOrderId']
+        self._orders[order['orderId']] = order
+        self._orders_by_symbol.setdefault(order['symbol'], set()).add(order['orderId'])
+        return True
+
+    def _prune_closed(self):
+        cutoff = time.time() - CLOSED_ORDER_TTL_SECONDS
+        for order_id in [i for i, closed_at in self._closed_orders.items() if closed_at < cutoff]:
+            del self._closed_orders[order_id]
+
+    def _remove_order(self, order_id: int) -> Optional[dict]:
+        self._closed_orders[order_id] = time.time()
+        order = self._orders.pop(order_id, None)
+        if order:
+            ids = self._orders_by_symbol.get(order['symbol'])
+            if ids:
+                ids.discard(order_id)
+                if not ids:
+                    self._orders_by_symbol.pop(order['symbol'], None)
+            self.orders_closed += 1
+        return order
+
+    def clear_order(self, order_id: int):
+        """İptal edilen emri düşür (CANCELED olayı da aynı sonucu verir)"""
+        self._remove_order(order_id)
+
+    def clear_orders(self, symbol: str):
+        """Sembolün tüm emirleri iptal edildi"""
+        for order_id in list(self._orders_by_symbol.get(symbol, ())):
+            self._remove_order(order_id)
+
+    def record_order(self, order: dict, sibling_order_id: Optional[int] = None):
+        """Kendi gönderdiğimiz emri olay beklemeden deftere ekle"""
+        if not order or 'orderId' not in order:
+            return
+        if order.get('status') in FINAL_ORDER_STATUSES:
+            return
+        record = dict(order)
+        record.setdefault('updateTime', int(time.time() * 1000))
+        if sibling_order_id is not None:
+            record['siblingOrderId'] = sibling_order_id
+        self._store_order(record)
+
+    def link_siblings(self, first_order: dict, second_order: dict):
+        """TP ve SL bacaklarını kardeş olarak bağla"""
+        self.record_order(first_order, second_order['orderId'])
+        self.record_order(second_order, first_order['orderId'])
+
+    def record_fill(self, symbol: str, side: str, quantity: float, entry_price: float):
+        """Giriş doldu - ACCOUNT_UPDATE gelmeden pozisyonu işaretle (çift girişi önler)"""
+        if self.has_position(symbol):
+            return
+        amount = quantity if side == 'BUY' else -quantity
+        self._positions.setdefault(symbol, {})['BOTH'] = {
+            'symbol': symbol,
+            'positionSide': 'BOTH',
+            'positionAmt': str(amount),
+            'entryPrice': str(entry_price),
+            'unRealizedProfit': '0',
+            'markPrice': str(entry_price),
+            'leverage': str(self.binance_client.get_leverage(symbol)),
+            'updateTime': 0  # İlk olay/snapshot üzerine yazar
+        }
+
+    # ===================== OLAYLAR =====================
+    async def _on_order_update(self, event: dict):
+        o = event.get('o', {})
+        order_id = o.get('i')
+        if order_id is None:
+            return
+
+        order = {
+            'orderId': order_id,
+            'clientOrderId': o.get('c'),
+            'symbol': o.get('s'),
+            'side': o.get('S'),
+            'type': o.get('ot') or o.get('o'),
+            'status': o.get('X'),
+            'origQty': o.get('q'),
+            'executedQty': o.get('z'),
+            'avgPrice': o.get('ap'),
+            'stopPrice': o.get('sp'),
+            'reduceOnly': o.get('R', False),
+            'closePosition': o.get('cp', False),
+            'positionSide': o.get('ps', 'BOTH'),
+            'updateTime': o.get('T', event.get('E', 0)),
+        }
+        self.events_applied += 1
+
+        if order['status'] not in FINAL_ORDER_STATUSES:
+            self._store_order(order)
+            return
+
+        closed = self._remove_order(order_id)
+        sibling_id = closed.get('siblingOrderId') if closed else None
+        if order['status'] == 'FILLED' and sibling_id in self._orders:
+            # TP doldu → SL gereksiz (veya tersi)
+            self._spawn(self._cancel_order(order['symbol'], sibling_id))
+
+    async def _on_account_update(self, event: dict):
+        update_time = event.get('T', event.get('E', 0))
+        for p in event.get('a', {}).get('P', []):
+            symbol = p.get('s')
+            side = p.get('ps', 'BOTH')
+            current = self._positions.get(symbol, {}).get(side, {})
+            was_open = self.has_position(symbol)
+
+            record = dict(current)
+            record.update({
+                'symbol': symbol,
+                'positionSide': side,
+                'positionAmt': p.get('pa', '0'),
+                'entryPrice': p.get('ep', current.get('entryPrice', '0')),
+                'unRealizedProfit': p.get('up', current.get('unRealizedProfit', '0')),
+                'marginType': p.get('mt', current.get('marginType')),
+                'updateTime': update_time,
+            })
+            record.setdefault('markPrice', record['entryPrice'])
+            record.setdefault('leverage', str(self.binance_client.get_leverage(symbol)))
+            self._positions.setdefault(symbol, {})[side] = record
+            self.events_applied += 1
+
+            if was_open and not self.has_position(symbol):
+                self._on_position_closed(symbol)
+
+    async def _on_stream_disconnected(self, event: dict):
+        """Kopuklukta olay kaçabilir - defter yeniden eşitlenene kadar canlı sayılmaz"""
+        self.snapshot_time = 0.0
+        self._disconnected_at = time.time()
+        self._resync_pending = True
+        print("📒 User stream koptu - emir defteri yeniden eşitlenecek")
+
+    async def _on_stream_connected(self, event: dict):
+        if self._resync_pending:
+            self._resync_pending = False
+            self.resyncs += 1
+            self._spawn(self._resync())
+
+    async def _resync(self):
+        """Yeniden bağlantı sonrası snapshot - başarana kadar (bağlantı sürdükçe) dene"""
+        stream = self.binance_client.user_stream
+        while not await self.load_snapshot(priority=PRIORITY_CRITICAL):
+            await asyncio.sleep(5)
+            if not (stream and stream.is_connected):
+                return  # Tekrar koptu - sonraki bağlantı yeniden tetikler
+
+    def _on_position_closed(self, symbol: str):
+        """Pozisyon kapandı → kalan reduce-only emirleri temizle"""
+        leftovers = [o for o in self.get_open_orders(symbol)
+                     if o.get('reduceOnly') or o.get('closePosition')]
+        if leftovers:
+            self._spawn(self.binance_client.cancel_all_orders_safe(symbol))
+
+    # ===================== ARKA PLAN =====================
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _cancel_order(self, symbol: str, order_id: int):
+        try:
+            await self.binance_client.cancel_order(symbol, order_id)
+        except Exception as e:
+            print(f"⚠️ {symbol} kardeş emir iptali ({order_id}): {e}")
+
+    def get_status(self) -> dict:
+        return {
+            "live": self.is_live,
+            "open_positions": len(self.get_open_positions()),
+            "open_orders": len(self._orders),
+            "snapshot_age_seconds": int(time.time() - self.snapshot_time) if self.snapshot_time else None,
+            "events_applied": self.events_applied,
+            "reconciliations": self.reconciliations,
+            "drift_corrections": self.drift_corrections,
+            "orders_closed": self.orders_closed,
+            "resyncs": self.resyncs
+        }
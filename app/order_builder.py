@@ -0,0 +1,220 @@
+# app/order_builder.py - SİNYAL → EMİR HIZLI YOL
+"""
+⚡ Önceden hazırlanmış emir şablonları
+
+- Bakiye, sembol filtreleri ve kaldıraç arka planda güncel tutulur
+  (ACCOUNT_UPDATE olayları + seyrek REST yenileme)
+- Sinyal geldiğinde REST çağrısı yapmadan, stepSize/tickSize'a yuvarlanmış
+  giriş / SL / TP planı mikrosaniyeler içinde üretilir
+- Pozisyon / açık emir durumu emir defterinden okunur; sembolde emir yoksa
+  giriş öncesi iptal çağrısı atlanır
+"""
+
+import asyncio
+import math
+import time
+from typing import Dict, Optional
+
+
+def build_order_plan(
+    symbol: str,
+    side: str,
+    quantity,
+    entry_price: float,
+    price_precision: int,
+    tp_percent: float,
+    sl_percent: float,
+    tick_size: float = 0.0
+) -> dict:
+    """Giriş + TP/SL emir planı (fiyatlar gönderilmeye hazır string)"""
+    if side == 'BUY':  # Long
+        tp_price = entry_price * (1 + tp_percent)
+        sl_price = entry_price * (1 - sl_percent)
+    else:  # Short
+        tp_price = entry_price * (1 - tp_percent)
+        sl_price = entry_price * (1 + sl_percent)
+
+    if tick_size > 0:
+        tp_price = round(tp_price / tick_size) * tick_size
+        sl_price = round(sl_price / tick_size) * tick_size
+
+    return {
+        'symbol': symbol,
+        'side': side,
+        'opposite_side': 'SELL' if side == 'BUY' else 'BUY',
+        'quantity': quantity,
+        'entry_price': entry_price,
+        'tp_percent': tp_percent,
+        'sl_percent': sl_percent,
+        'tp_price': f"{tp_price:.{price_precision}f}",
+        'sl_price': f"{sl_price:.{price_precision}f}",
+    }
+
+
+class OrderBuilder:
+    """
+    ⚡ Sıcak yol emir üreticisi
+
+    Kullanım:
+        await builder.prepare("BTCUSDT")          # bot başlangıcında bir kez
+        plan = builder.build("BTCUSDT", "LONG", 65000.0, 0.004, 0.002)
+        if plan:
+            await binance_client.execute_order_plan(plan)
+    """
+
+    def __init__(self, settings, binance_client):
+        self.settings = settings
+        self.binance_client = binance_client
+
+        self.balance = 0.0
+        self.position_size = 0.0
+        self.balance_updated_at = 0.0
+        self._templates: Dict[str, dict] = {}
+        self._orders_clean: Dict[str, bool] = {}  # Defter canlı değilken: sembolde artık emir yok
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._listening = False
+
+        self.builds = 0
+        self.last_build_us = 0.0
+
+    # ===================== HAZIRLIK =====================
+    async def prepare(self, symbol: str) -> bool:
+        """Sembol şablonunu ve bakiyeyi yükle, artık emirleri temizle"""
+        meta = await self.binance_client.get_symbol_metadata(symbol)
+        if not meta:
+            return False
+
+        self._templates[symbol] = {
+            'step_size': meta['step_size'],
+            'tick_size': meta['tick_size'],
+            'quantity_precision': meta['quantity_precision'],
+            'price_precision': meta['price_precision'],
+            'min_qty': meta['min_qty'],
+            'max_qty': meta['market_max_qty'] or meta['max_qty'],
+            'min_notional': meta['min_notional'],
+            'leverage': self.binance_client.get_leverage(symbol),
+        }
+
+        book = self.binance_client.order_book
+        if book.is_live:
+            if not book.has_position(symbol) and book.get_open_orders(symbol):
+                # Eski TP/SL kalıntılarını şimdi temizle, giriş anında değil
+                await self.binance_client.cancel_all_orders_safe(symbol)
+        elif not await self.binance_client.get_open_positions(symbol):
+            self._orders_clean[symbol] = await self.binance_client.cancel_all_orders_safe(symbol)
+
+        await self.refresh_balance()
+        self.start()
+        return True
+
+    def forget(self, symbol: str):
+        self._templates.pop(symbol, None)
+        self._orders_clean.pop(symbol, None)
+
+    def _set_balance(self, balance: float):
+        self.balance = balance
+        self.position_size = self.settings.calculate_position_size(balance)
+        self.balance_updated_at = time.time()
+
+    async def refresh_balance(self):
+        self._set_balance(await self.binance_client.get_account_balance())
+
+    # ===================== CANLI DURUM =====================
+    def start(self):
+        stream = self.binance_client.user_stream
+        if stream and not self._listening:
+            stream.add_listener('ACCOUNT_UPDATE', self._on_account_update)
+            self._listening = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        stream = self.binance_client.user_stream
+        if stream and self._listening:
+            stream.remove_listener('ACCOUNT_UPDATE', self._on_account_update)
+            self._listening = False
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None
+
+    async def _refresh_loop(self):
+        """Olay kaçırılırsa diye seyrek yenileme (sıcak yolun dışında)"""
+        while True:
+            await asyncio.sleep(self.settings.ORDER_BUILDER_REFRESH_SECONDS)
+            try:
+                await self.refresh_balance()
+                for symbol, template in self._templates.items():
+                    template['leverage'] = self.binance_client.get_leverage(symbol)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Order builder yenileme hatası: {e}")
+
+    async def _on_account_update(self, event: dict):
+        account = event.get('a', {})
+        for balance in account.get('B', []):
+            if balance.get('a') == 'USDT':
+                self._set_balance(float(balance['wb']))
+
+    def _needs_cancel(self, symbol: str) -> bool:
+        """Giriş öncesi iptal gerekli mi? (defter canlıysa açık emre bakılır)"""
+        book = self.binance_client.order_book
+        if book.is_live:
+            return bool(book.get_open_orders(symbol))
+        return not self._orders_clean.get(symbol, False)
+
+    def mark_open(self, symbol: str):
+        """Giriş yapıldı - sembolde artık TP/SL emirleri var"""
+        self._orders_clean[symbol] = False
+
+    # ===================== SICAK YOL =====================
+    def build(self, symbol: str, signal: str, entry_price: float,
+              tp_percent: float, sl_percent: float) -> Optional[dict]:
+        """Sinyali gönderilmeye hazır emir planına çevir (REST çağrısı yok)"""
+        started = time.perf_counter()
+        template = self._templates.get(symbol)
+        if template is None:
+            print(f"❌ {symbol} için emir şablonu hazır değil")
+            return None
+
+        if self.position_size <= 0:
+            print(f"❌ Yetersiz bakiye: {self.balance} USDT")
+            return None
+
+        notional = self.position_size * template['leverage']
+        quantity = notional / entry_price
+        step = template['step_size']
+        if step > 0:
+            quantity = math.floor(quantity / step + 1e-9) * step
+        if template['max_qty'] > 0:
+            quantity = min(quantity, template['max_qty'])
+
+        if quantity <= 0 or quantity < template['min_qty']:
+            print(f"❌ Quantity çok düşük: {quantity}")
+            return None
+        if quantity * entry_price < template['min_notional']:
+            print(f"❌ Notional çok düşük: {quantity * entry_price:.2f} < {template['min_notional']}")
+            return None
+
+        side = 'BUY' if signal == 'LONG' else 'SELL'
+        plan = build_order_plan(
+            symbol, side, f"{quantity:.{template['quantity_precision']}f}", entry_price,
+            template['price_precision'], tp_percent, sl_percent, template['tick_size']
+        )
+        plan['position_size'] = self.position_size
+        plan['leverage'] = template['leverage']
+        plan['cancel_existing'] = self._needs_cancel(symbol)
+
+        self.builds += 1
+        self.last_build_us = (time.perf_counter() - started) * 1e6
+        return plan
+
+    def get_status(self) -> dict:
+        return {
+            "balance": self.balance,
+            "position_size": self.position_size,
+            "balance_age_seconds": int(time.time() - self.balance_updated_at) if self.balance_updated_at else None,
+            "symbols": list(self._templates),
+            "builds": self.builds,
+            "last_build_us": round(self.last_build_us, 1)
+        }
@@ -0,0 +1,180 @@
+# app/pipeline.py - MARKET DATA → ANALİZ → EMİR HATTI
+"""
+🚦 Aşamalı işlem hattı yardımcıları
+
+- Alıcı (websocket) sadece decode + kuyruğa ekle yapar
+- Sembol başına sınırlı kuyruk, analiz her seferinde sadece en son mumu değerlendirir
+- Emir yürütme ayrı bir aşamadadır; yavaş emir market datayı geciktiremez
+- Strateji analizi event loop dışında (thread executor) çalışır; strateji
+  durumu (artımlı indikatör motorları) süreç içinde kalır
+"""
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, List, Optional, Tuple
+
+
+class CoalescingCandleQueue:
+    """
+    📥 Sembol başına sınırlı mum kuyruğu
+
+    Tüketici her get_batch() çağrısında bekleyen tüm mumları alır (tampon
+    sürekliliği için) ama analizi sadece en sonuncusu için yapar.
+    Kuyruk dolarsa en eski mum düşürülür.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._items: deque = deque()
+        self._event = asyncio.Event()
+
+        self.received = 0
+        self.coalesced = 0  # Analiz edilmeden geçilen mumlar
+        self.dropped = 0    # Kuyruk taşmasında düşürülen mumlar
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put_nowait(self, item: Any):
+        """Asla beklemez - alıcı döngüsünden çağrılır"""
+        if len(self._items) >= self.maxsize:
+            self._items.popleft()
+            self.dropped += 1
+        self._items.append(item)
+        self.received += 1
+        self._event.set()
+
+    async def get_batch(self) -> List[Any]:
+        """Bekleyen tüm mumları al (en az bir tane gelene kadar bekler)"""
+        while not self._items:
+            self._event.clear()
+            await self._event.wait()
+
+        batch = list(self._items)
+        self._items.clear()
+        self._event.clear()
+        self.coalesced += len(batch) - 1
+        return batch
+
+    def get_stats(self) -> dict:
+        return {
+            "depth": len(self._items),
+            "received": self.received,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped
+        }
+
+
+class SignalQueue:
+    """
+    📤 Analiz → yürütme kuyruğu
+
+    Sembol başına tek bekleyen sinyal tutulur, eskimiş sinyaller yürütülmez.
+    """
+
+    def __init__(self, maxsize: int = 16, max_age_seconds: float = 20.0):
+        self.max_age_seconds = max_age_seconds
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._pending: set = set()
+
+        self.enqueued = 0
+        self.rejected = 0  # Kuyruk dolu veya sembolün bekleyen sinyali var
+        self.expired = 0
+
+    def __len__(self) -> int:
+        return self._queue.qsize()
+
+    def put_nowait(self, symbol: str, analysis: dict, created_at: Optional[float] = None) -> bool:
+        """
+        created_at: sinyalin üretildiği time.time() (ör. shard sürecinde) -
+        verilirse yaş, kuyruğa girişten değil üretimden itibaren sayılır
+        """
+        if symbol in self._pending:
+            self.rejected += 1
+            return False
+        enqueued_at = time.monotonic()
+        if created_at is not None:
+            enqueued_at -= max(0.0, time.time() - created_at)
+        try:
+            self._queue.put_nowait((symbol, analysis, enqueued_at))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self._pending.add(symbol)
+        self.enqueued += 1
+        return True
+
+    async def get(self) -> Tuple[str, dict, float]:
+        """Taze bir sinyal gelene kadar bekle → (symbol, analysis, bekleme süresi)"""
+        while True:
+            symbol, analysis, enqueued_at = await self._queue.get()
+            age = time.monotonic() - enqueued_at
+            if age > self.max_age_seconds:
+                self._pending.discard(symbol)
+                self.expired += 1
+                print(f"⌛ {symbol} sinyali eskidi ({age:.1f}s), yürütülmedi")
+                continue
+            return symbol, analysis, age
+
+    def done(self, symbol: str):
+        """Sembolün yürütmesi bitti, yeni sinyal kabul edilebilir"""
+        self._pending.discard(symbol)
+
+    def get_stats(self) -> dict:
+        return {
+            "depth": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "rejected": self.rejected,
+            "expired": self.expired
+        }
+
+
+_strategy_executor: Optional[Executor] = None
+
+
+def get_strategy_executor(settings) -> Optional[Executor]:
+    """
+    Tüm botların paylaştığı strateji yürütücüsü (inline modda None)
+
+    Process modu yok: her mumda strateji + tampon pickle'lanıp kopyası güncellenir,
+    ana süreçteki artımlı motorlar hiç ilerlemez. CPU ayrımı gerekiyorsa
+    USE_SHARDED_WORKERS (sembol başına kalıcı süreç) kullanılır.
+    """
+    global _strategy_executor
+    if settings.STRATEGY_EXECUTOR == "inline":
+        return None
+    if settings.STRATEGY_EXECUTOR != "thread":
+        print(f"⚠️ STRATEGY_EXECUTOR={settings.STRATEGY_EXECUTOR!r} desteklenmiyor, thread kullanılıyor "
+              f"(ayrı süreç için USE_SHARDED_WORKERS)")
+    if _strategy_executor is None:
+        _strategy_executor = ThreadPoolExecutor(
+            max_workers=settings.STRATEGY_EXECUTOR_WORKERS, thread_name_prefix="strategy"
+        )
+    return _strategy_executor
+
+
+def _analyze(strategy, buffer, symbol: str) -> Optional[dict]:
+    return strategy.analyze_and_calculate_levels(buffer, symbol)
+
+
+async def run_strategy(executor: Optional[Executor], strategy, buffer, symbol: str) -> Optional[dict]:
+    """Strateji analizini yürütücüde çalıştır - event loop bloklanmaz"""
+    if executor is None:
+        return _analyze(strategy, buffer, symbol)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, _analyze, strategy, buffer, symbol)
+
+
+async def cancel_tasks(tasks: List[Optional[asyncio.Task]]):
+    """Aşama task'larını iptal et ve bitmelerini bekle"""
+    for task in tasks:
+        if task and not task.done():
+            task.cancel()
+    for task in tasks:
+        if task:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
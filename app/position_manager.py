@@ -4,23 +4,30 @@ import asyncio
 import time
 from typing import List, Dict, Optional
 from .binance_client import binance_client
+from .rate_limiter import PRIORITY_BACKGROUND
 from .config import settings
+from .user_data_stream import FINAL_ORDER_STATUSES
 
 class SimplePositionManager:
     """
     🛡️ Basit Pozisyon Yöneticisi
-    - Açık pozisyonları kontrol eder
-    - Eksik TP/SL ekler
-    - Sadece temel koruma
+    - Pozisyon / emir olaylarında ilgili sembolü hemen kontrol eder
+    - Eksik TP/SL ekler (kardeş bacak iptali emir defterinde)
+    - Tam tarama seyrek ve eşzamanlılık sınırlı uzlaştırmadır
     """
     
     def __init__(self):
         self.is_running = False
-        self.scan_interval = 30  # 30 saniyede bir tara
+        self.scan_interval = settings.PROTECTION_SWEEP_SECONDS
         self.last_scan_time = 0
+        self.last_scan_duration_ms = 0.0
+        self.last_scan_rest_calls = 0
+        self._pending_checks: Dict[str, asyncio.Task] = {}
+        self._listening = False
+        self.event_checks = 0
         
         print("🛡️ Basit Pozisyon Yöneticisi başlatıldı")
-        print(f"⚡ Tarama aralığı: {self.scan_interval} saniye")
+        print(f"⚡ Tam tarama aralığı: {self.scan_interval} saniye (olaylar anında işlenir)")
         
     async def start_monitoring(self):
         """Otomatik TP/SL monitoring başlat"""
@@ -30,6 +37,7 @@ class SimplePositionManager:
             
         self.is_running = True
         print("🔍 Pozisyon tarayıcısı başlatıldı...")
+        self._attach_events()
         
         while self.is_running:
             try:
@@ -42,8 +50,61 @@ class SimplePositionManager:
     async def stop_monitoring(self):
         """Monitoring'i durdur"""
         self.is_running = False
+        self._detach_events()
+        for task in self._pending_checks.values():
+            task.cancel()
+        self._pending_checks.clear()
         print("🛑 Pozisyon monitoring durduruldu")
         
+    # ===================== OLAY TABANLI KORUMA =====================
+    def _attach_events(self):
+        stream = binance_client.user_stream
+        if stream and not self._listening:
+            stream.add_listener('ACCOUNT_UPDATE', self._on_account_update)
+            stream.add_listener('ORDER_TRADE_UPDATE', self._on_order_update)
+            self._listening = True
+            
+    def _detach_events(self):
+        stream = binance_client.user_stream
+        if stream and self._listening:
+            stream.remove_listener('ACCOUNT_UPDATE', self._on_account_update)
+            stream.remove_listener('ORDER_TRADE_UPDATE', self._on_order_update)
+            self._listening = False
+            
+    async def _on_account_update(self, event: dict):
+        """Pozisyon açıldı / değişti → korumayı kontrol et"""
+        for pos in event.get('a', {}).get('P', []):
+            if float(pos.get('pa', 0)) != 0:
+                self._schedule_check(pos['s'])
+                
+    async def _on_order_update(self, event: dict):
+        """Koruma emri iptal edildi / süresi doldu → korumayı kontrol et"""
+        order = event.get('o', {})
+        if order.get('R') and order.get('X') in FINAL_ORDER_STATUSES and order.get('X') != 'FILLED':
+            self._schedule_check(order['s'])
+            
+    def _schedule_check(self, symbol: str):
+        """Sembol kontrolünü planla (aynı sembol için tek bekleyen kontrol)"""
+        task = self._pending_checks.get(symbol)
+        if task and not task.done():
+            return
+        self._pending_checks[symbol] = asyncio.create_task(self._delayed_check(symbol))
+        
+    async def _delayed_check(self, symbol: str):
+        try:
+            # Kendi girişimizin TP/SL'si gönderilirken çift koruma eklememek için kısa bekle
+            await asyncio.sleep(settings.PROTECTION_GRACE_SECONDS)
+            self.event_checks += 1
+            positions = await binance_client.get_open_positions(symbol)
+            if positions:
+                await self._check_and_protect(positions[0])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"❌ {symbol} olay kontrolü hatası: {e}")
+        finally:
+            self._pending_checks.pop(symbol, None)
+        
     async def _scan_and_protect(self):
         """Pozisyon tarama ve koruma"""
         try:
@@ -54,28 +115,65 @@ class SimplePositionManager:
                 return
             
             print("🔍 Açık pozisyonlar taranıyor...")
+            started = time.perf_counter()
+            rest_calls = 0
             
-            # Tüm açık pozisyonları al
-            await binance_client._rate_limit_delay()
-            all_positions = await binance_client.client.futures_position_information()
-            
-            # Sadece açık pozisyonları filtrele
-            open_positions = [p for p in all_positions if float(p['positionAmt']) != 0]
+            # Tüm açık pozisyonları ve emirleri al (emir defteri canlıysa REST çağrısı yok)
+            book = binance_client.order_book
+            if book.is_live:
+                open_positions = book.get_open_positions()
+            else:
+                all_positions = await binance_client._call(binance_client.client.futures_position_information,
+                                                          weight=5, priority=PRIORITY_BACKGROUND)
+                rest_calls += 1
+                
+                # Sadece açık pozisyonları filtrele
+                open_positions = [p for p in all_positions if float(p['positionAmt']) != 0]
             
             if not open_positions:
                 print("✅ Açık pozisyon bulunamadı")
                 self.last_scan_time = current_time
+                self.last_scan_duration_ms = (time.perf_counter() - started) * 1000
+                self.last_scan_rest_calls = rest_calls
                 return
                 
             print(f"📊 {len(open_positions)} açık pozisyon tespit edildi")
             
-            # Her pozisyon için TP/SL kontrolü
+            # Açık emirler: sembol başına çağrı yerine hesap genelinde tek çağrı
+            orders_by_symbol: Dict[str, list] = {}
+            if book.is_live:
+                for position in open_positions:
+                    orders_by_symbol[position['symbol']] = book.get_open_orders(position['symbol'])
+            else:
+                all_orders = await binance_client._call(binance_client.client.futures_get_open_orders,
+                                                        weight=40, priority=PRIORITY_BACKGROUND)
+                rest_calls += 1
+                for order in all_orders or []:
+                    orders_by_symbol.setdefault(order['symbol'], []).append(order)
+            
+            # TP/SL analizi bellekte, tüm pozisyonlar için bir kerede
+            unprotected = []
             for position in open_positions:
-                await self._check_and_protect(position)
-                await asyncio.sleep(0.5)
+                position_amt = float(position['positionAmt'])
+                has_sl, has_tp = self._analyze_orders(orders_by_symbol.get(position['symbol'], []), position_amt)
+                if not (has_sl and has_tp):
+                    unprotected.append((position, has_sl, has_tp))
+            
+            # Eksik korumaları paralel ekle (eşzamanlılık sınırlı)
+            semaphore = asyncio.Semaphore(settings.PROTECTION_SWEEP_CONCURRENCY)
+            
+            async def protect(position, has_sl, has_tp):
+                async with semaphore:
+                    return await self._protect_position(position, has_sl, has_tp)
+                    
+            results = await asyncio.gather(*(protect(*item) for item in unprotected))
+            rest_calls += sum(results)
                 
             self.last_scan_time = current_time
-            print(f"✅ Tarama tamamlandı - {len(open_positions)} pozisyon kontrol edildi")
+            self.last_scan_duration_ms = (time.perf_counter() - started) * 1000
+            self.last_scan_rest_calls = rest_calls
+            print(f"✅ Tarama tamamlandı - {len(open_positions)} pozisyon, {len(unprotected)} eksik koruma, "
+                  f"{rest_calls} REST çağrısı, {self.last_scan_duration_ms:.0f}ms")
             
         except Exception as e:
             print(f"❌ Pozisyon tarama hatası: {e}")
@@ -95,8 +193,11 @@ class SimplePositionManager:
             print(f"   Giriş Fiyatı: {entry_price}")
             
             # Bu sembol için açık emirleri kontrol et
-            await binance_client._rate_limit_delay()
-            open_orders = await binance_client.client.futures_get_open_orders(symbol=symbol)
+            if binance_client.order_book.is_live:
+                open_orders = binance_client.order_book.get_open_orders(symbol)
+            else:
+                open_orders = await binance_client._call(binance_client.client.futures_get_open_orders, symbol=symbol,
+                                                        weight=1, priority=PRIORITY_BACKGROUND)
             
             # TP/SL analizi
             has_sl, has_tp = self._analyze_orders(open_orders, position_amt)
@@ -118,26 +219,39 @@ class SimplePositionManager:
                 
             print(f"⚠️ {symbol} EKSİK KORUMA: {', '.join(protection_needed)}")
             
+            await self._protect_position(position, has_sl, has_tp)
+                
+        except Exception as e:
+            print(f"❌ {position.get('symbol', 'UNKNOWN')} pozisyon kontrolü hatası: {e}")
+            
+    async def _protect_position(self, position: dict, has_sl: bool, has_tp: bool) -> int:
+        """Eksik bacakları ekle - yapılan REST çağrısı sayısını döndür (batch + tekrar denemeler)"""
+        call_stats = {'rest_calls': 0}
+        try:
+            symbol = position['symbol']
+            
             # Symbol bilgilerini al
-            symbol_info = await binance_client.get_symbol_info(symbol)
-            if not symbol_info:
+            symbol_meta = await binance_client.get_symbol_metadata(symbol)
+            if not symbol_meta:
                 print(f"❌ {symbol} için sembol bilgisi alınamadı")
-                return
+                return call_stats['rest_calls']
                 
-            price_precision = self._get_price_precision(symbol_info)
+            price_precision = symbol_meta['price_precision']
             
             # Eksik TP/SL ekleme
             success = await self._add_missing_protection(
-                symbol, position_amt, entry_price, price_precision, has_sl, has_tp
+                symbol, float(position['positionAmt']), float(position['entryPrice']),
+                price_precision, has_sl, has_tp, call_stats
             )
             
             if success:
                 print(f"✅ {symbol} koruma başarıyla eklendi!")
             else:
                 print(f"❌ {symbol} koruma eklenemedi")
-                
+            
         except Exception as e:
-            print(f"❌ {position.get('symbol', 'UNKNOWN')} pozisyon kontrolü hatası: {e}")
+            print(f"❌ {position.get('symbol', 'UNKNOWN')} koruma hatası: {e}")
+        return call_stats['rest_calls']
             
     def _analyze_orders(self, open_orders: list, position_amt: float) -> tuple:
         """Açık emirleri analiz et"""
@@ -173,7 +287,8 @@ class SimplePositionManager:
             
     async def _add_missing_protection(self, symbol: str, position_amt: float, 
                                     entry_price: float, price_precision: int, 
-                                    has_sl: bool, has_tp: bool) -> bool:
+                                    has_sl: bool, has_tp: bool,
+                                    call_stats: Optional[Dict[str, int]] = None) -> bool:
         """Eksik TP/SL ekleme"""
         try:
             print(f"🛡️ {symbol} için eksik koruma ekleniyor...")
@@ -194,25 +309,14 @@ class SimplePositionManager:
             formatted_sl_price = f"{sl_price:.{price_precision}f}"
             formatted_tp_price = f"{tp_price:.{price_precision}f}"
             
-            success_count = 0
-            
-            # Stop Loss ekle (eksikse)
-            if not has_sl:
-                print(f"🛑 {symbol} Stop Loss ekleniyor: {formatted_sl_price}")
-                sl_success = await binance_client._create_stop_loss(
-                    symbol, opposite_side, quantity, formatted_sl_price
-                )
-                if sl_success:
-                    success_count += 1
-                    
-            # Take Profit ekle (eksikse)
-            if not has_tp:
-                print(f"🎯 {symbol} Take Profit ekleniyor: {formatted_tp_price}")
-                tp_success = await binance_client._create_take_profit(
-                    symbol, opposite_side, quantity, formatted_tp_price
-                )
-                if tp_success:
-                    success_count += 1
+            # Eksik bacakları tek batch isteğinde gönder
+            protection = await binance_client.place_protection_orders(
+                symbol, opposite_side, quantity,
+                sl_price=None if has_sl else formatted_sl_price,
+                tp_price=None if has_tp else formatted_tp_price,
+                call_stats=call_stats
+            )
+            success_count = sum(protection.values())
             
             # Başarı değerlendirmesi
             expected_orders = (0 if has_sl else 1) + (0 if has_tp else 1)
@@ -222,32 +326,14 @@ class SimplePositionManager:
             print(f"❌ {symbol} koruma ekleme hatası: {e}")
             return False
             
-    def _get_price_precision(self, symbol_info: dict) -> int:
-        """Symbol için fiyat precision'ını al"""
-        try:
-            for f in symbol_info['filters']:
-                if f['filterType'] == 'PRICE_FILTER':
-                    tick_size = f['tickSize']
-                    if '.' in tick_size:
-                        return len(tick_size.split('.')[1].rstrip('0'))
-            return 2  # Varsayılan
-        except:
-            return 2  # Hata durumunda varsayılan
-            
     async def manual_scan_symbol(self, symbol: str) -> bool:
         """Belirli bir symbol için manuel tarama"""
         try:
             print(f"🔍 {symbol} için manuel pozisyon taraması...")
             
-            # Bu symbol için pozisyonları al
-            await binance_client._rate_limit_delay()
-            positions = await binance_client.client.futures_position_information(symbol=symbol)
-            
-            open_position = None
-            for pos in positions:
-                if float(pos['positionAmt']) != 0:
-                    open_position = pos
-                    break
+            # Bu symbol için pozisyonları al (emir defteri canlıysa REST çağrısı yok)
+            positions = await binance_client.get_open_positions(symbol)
+            open_position = positions[0] if positions else None
                     
             if not open_position:
                 print(f"✅ {symbol} için açık pozisyon bulunamadı")
@@ -267,6 +353,11 @@ class SimplePositionManager:
             "is_running": self.is_running,
             "scan_interval": self.scan_interval,
             "last_scan_ago_seconds": int(time.time() - self.last_scan_time) if self.last_scan_time > 0 else None,
+            "last_scan_duration_ms": round(self.last_scan_duration_ms, 1),
+            "last_scan_rest_calls": self.last_scan_rest_calls,
+            "event_driven": self._listening,
+            "event_checks": self.event_checks,
+            "pending_checks": len(self._pending_checks),
             "features": {
                 "simple_tp_sl_protection": True,
                 "basic_position_monitoring": True
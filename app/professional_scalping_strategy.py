@@ -12,11 +12,13 @@
 Hedef: Günlük %5-10, Win Rate %75+
 """
 
-import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 from datetime import datetime
 
+from .indicators import EMA, VWAP, IndicatorEngine, Lag, RollingMax, RollingMean, RollingMin
+from .kline_buffer import as_kline_buffer
+
 class ProfessionalScalpingStrategy:
     """
     🎯 Profesyonel Scalping - Pullback Yakalama
@@ -53,6 +55,9 @@ class ProfessionalScalpingStrategy:
         self.signal_count = 0
         self.high_quality_signals = 0
         
+        # Sembol başına artımlı indikatör motorları
+        self._engines: Dict[str, IndicatorEngine] = {}
+        
         print("=" * 70)
         print("🔥 PROFESSIONAL SCALPING STRATEGY AKTIF 🔥")
         print("=" * 70)
@@ -65,7 +70,7 @@ class ProfessionalScalpingStrategy:
         print("🎯 HEDEF: Günlük %5-10, Win Rate %75+")
         print("=" * 70)
     
-    def analyze_and_calculate_levels(self, klines: list, symbol: str = "UNKNOWN") -> Optional[Dict]:
+    def analyze_and_calculate_levels(self, klines, symbol: str = "UNKNOWN") -> Optional[Dict]:
         """
         🔥 ULTRA PROFESSIONAL ANALIZ
         
@@ -96,46 +101,31 @@ class ProfessionalScalpingStrategy:
             return None
         
         try:
-            # DataFrame hazırla
-            df = self._prepare_advanced_dataframe(klines)
-            if df is None or len(df) < 25:
-                return None
-            
-            # 1. EMA'ları hesapla
-            df['ema_fast'] = df['close'].ewm(span=self.ema_fast, adjust=False).mean()
-            df['ema_medium'] = df['close'].ewm(span=self.ema_medium, adjust=False).mean()
-            df['ema_slow'] = df['close'].ewm(span=self.ema_slow, adjust=False).mean()
-            
-            # 2. VWAP hesapla
-            df['vwap'] = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
-            
-            # 3. Volume analizi
-            df['volume_ma'] = df['volume'].rolling(window=10).mean()
-            df['volume_ratio'] = df['volume'] / df['volume_ma']
+            # Artımlı indikatörler - sadece yeni mumlar işlenir
+            buffer = as_kline_buffer(klines)
+            engine = self._get_engine(symbol, buffer)
+            engine.sync(buffer)
             
-            # NaN temizle
-            df = df.dropna().copy()
-            if len(df) < 10:
+            # 9 mum volume MA ısınması sonrası en az 10 satır kalmalı
+            if engine.count < 25:
                 return None
             
-            # Son değerler
-            current = df.iloc[-1]
-            prev = df.iloc[-2]
-            prev_5 = df.iloc[-6] if len(df) >= 6 else prev
+            # Fiyat ve hacim, indikatörlerin işlediği son mumdan (atlanan 0 hacimli mum değil)
+            last_bar = engine.last_bar
+            current_price = last_bar['close']
             
-            current_price = float(current['close'])
-            current_high = float(current['high'])
-            current_low = float(current['low'])
+            ema_fast = engine.value('ema_fast')
+            ema_medium = engine.value('ema_medium')
+            ema_slow = engine.value('ema_slow')
+            vwap = engine.value('vwap')
             
-            ema_fast = float(current['ema_fast'])
-            ema_medium = float(current['ema_medium'])
-            ema_slow = float(current['ema_slow'])
-            vwap = float(current['vwap'])
-            
-            volume_ratio = float(current['volume_ratio'])
+            volume_ma = engine.value('volume_ma')
+            if not volume_ma or vwap is None:
+                return None
+            volume_ratio = last_bar['volume'] / volume_ma
             
             # 4. TREND ANALİZİ
-            trend_direction = self._analyze_trend(df)
+            trend_direction = self._analyze_trend(ema_fast, ema_medium, ema_slow)
             if trend_direction == "NONE":
                 return None  # Trend yok, işlem yapma
             
@@ -146,7 +136,13 @@ class ProfessionalScalpingStrategy:
                 return None  # Trend çok zayıf
             
             # 5. PULLBACK TESPİTİ
-            pullback_data = self._detect_pullback(df, trend_direction)
+            pullback_data = self._detect_pullback(
+                trend_direction,
+                current_price,
+                engine.value('prev_3_close'),
+                engine.value('high_6'),
+                engine.value('low_6')
+            )
             
             if not pullback_data['has_pullback']:
                 return None  # Pullback yok
@@ -236,51 +232,29 @@ class ProfessionalScalpingStrategy:
             print(f"❌ {symbol} analiz hatası: {e}")
             return None
     
-    def _prepare_advanced_dataframe(self, klines: list) -> Optional[pd.DataFrame]:
-        """Gelişmiş DataFrame hazırlama"""
-        try:
-            klines_data = []
-            for kline in klines:
-                try:
-                    close = float(kline[4])
-                    high = float(kline[2])
-                    low = float(kline[3])
-                    volume = float(kline[5])
-                    
-                    if close > 0 and volume > 0:
-                        klines_data.append({
-                            'close': close,
-                            'high': high,
-                            'low': low,
-                            'volume': volume
-                        })
-                except:
-                    continue
-            
-            if len(klines_data) < 20:
-                return None
-            
-            df = pd.DataFrame(klines_data)
-            df = df[(df['close'] > 0) & (df['volume'] > 0)].copy()
-            
-            return df if len(df) >= 20 else None
-            
-        except Exception as e:
-            print(f"❌ DataFrame hazırlama hatası: {e}")
-            return None
+    def _get_engine(self, symbol: str, buffer) -> IndicatorEngine:
+        """Sembol için indikatör motoru (ilk çağrıda geçmişten beslenir)"""
+        engine = self._engines.get(symbol)
+        if engine is None or engine['vwap'].window != buffer.capacity:
+            engine = IndicatorEngine({
+                'ema_fast': EMA(self.ema_fast),
+                'ema_medium': EMA(self.ema_medium),
+                'ema_slow': EMA(self.ema_slow),
+                'vwap': VWAP(window=buffer.capacity),
+                'volume_ma': RollingMean(10, source='volume'),
+                'high_6': RollingMax(6),
+                'low_6': RollingMin(6),
+                'prev_3_close': Lag(3),
+            }, require_volume=True)
+            self._engines[symbol] = engine
+        return engine
     
-    def _analyze_trend(self, df: pd.DataFrame) -> str:
+    def _analyze_trend(self, ema_fast: float, ema_medium: float, ema_slow: float) -> str:
         """
         Trend analizi
         Returns: "LONG" (yukarı trend) | "SHORT" (aşağı trend) | "NONE"
         """
         try:
-            current = df.iloc[-1]
-            
-            ema_fast = float(current['ema_fast'])
-            ema_medium = float(current['ema_medium'])
-            ema_slow = float(current['ema_slow'])
-            
             # EMA sıralaması
             if ema_fast > ema_medium > ema_slow:
                 # Güçlü yukarı trend
@@ -295,7 +269,8 @@ class ProfessionalScalpingStrategy:
         except:
             return "NONE"
     
-    def _detect_pullback(self, df: pd.DataFrame, trend: str) -> Dict:
+    def _detect_pullback(self, trend: str, current_price: float, prev_3_close: float,
+                         high_6: float, low_6: float) -> Dict:
         """
         Pullback (geri çekilme) tespiti
         
@@ -304,27 +279,22 @@ class ProfessionalScalpingStrategy:
         - SHORT trend: Son 3-5 mumda yükseliş oldu mu?
         """
         try:
-            current = df.iloc[-1]
-            prev_3 = df.iloc[-4] if len(df) >= 4 else current
-            prev_5 = df.iloc[-6] if len(df) >= 6 else current
-            
-            current_price = float(current['close'])
+            if prev_3_close is None:
+                prev_3_close = current_price
             
             if trend == "LONG":
                 # Yukarı trendde geri çekilme (düşüş)
-                high_5 = float(df['high'].iloc[-6:].max())
-                pullback = (high_5 - current_price) / high_5
+                pullback = (high_6 - current_price) / high_6
                 
                 # Geri çekilme oldu mu?
-                has_pullback = pullback > 0 and current_price < float(prev_3['close'])
+                has_pullback = pullback > 0 and current_price < prev_3_close
                 
             else:  # SHORT
                 # Aşağı trendde geri çekilme (yükseliş)
-                low_5 = float(df['low'].iloc[-6:].min())
-                pullback = (current_price - low_5) / current_price
+                pullback = (current_price - low_6) / current_price
                 
                 # Geri çekilme oldu mu?
-                has_pullback = pullback > 0 and current_price > float(prev_3['close'])
+                has_pullback = pullback > 0 and current_price > prev_3_close
             
             return {
                 'has_pullback': has_pullback,
@@ -0,0 +1,102 @@
+# app/prompt_compiler.py - KOMPAKT PROMPT DERLEYİCİ
+"""
+🗜️ Gemini prompt'ları için kompakt sayısal kodlama
+
+- Mumlar son kapanışa göre baz puan (bp) farkı olarak tablo halinde yazılır
+- Hacim, ortalamanın yüzdesi olarak tam sayıya yuvarlanır
+- Sabit kurallar ve çıktı tarifi system instruction'da durur, her istekte
+  sadece veri tablosu gönderilir
+"""
+
+from typing import Dict, List
+
+# Tablo açıklaması system instruction'da bir kez anlatılır
+TABLE_LEGEND = """VERİ BİÇİMİ:
+- "m" satırı: sym,px,chg_bp,vol_x,volat_bp,ema
+  px=son fiyat, chg_bp=periyot değişimi (baz puan), vol_x=son hacim/ortalama,
+  volat_bp=ortalama mum aralığı (baz puan), ema=EMA sinyali
+- "c" satırları (eskiden yeniye): o,h,l,c,v
+  o/h/l/c = son kapanışa göre baz puan farkı (1bp=%0.01), v = hacim, ortalamanın yüzdesi
+"""
+
+SCALPING_SYSTEM_INSTRUCTION = """Sen profesyonel bir kripto scalping uzmanısın. 1 dakikalık mum verisinden hızlı alım-satım kararı verirsin.
+
+""" + TABLE_LEGEND + """
+KURALLAR:
+1. Trend net, volume yüksek olmalı (vol_x > 1.3)
+2. TP: %0.3-0.5, SL: %0.2-0.3
+3. Risk/Reward minimum 1:1.5
+4. volat_bp 10-30 ideal; 50 üstü HOLD
+5. vol_x < 1.2 ise HOLD
+6. Trend belirsizse confidence < 60
+7. should_trade sadece confidence > 75 ise true
+
+ÇIKTI: Her sembol için şemadaki karar nesnesi. Birden çok sembol varsa her biri için "symbol" alanlı nesnelerden oluşan dizi.
+stop_loss_percent / take_profit_percent yüzde cinsindendir (0.3 = %0.3). reasoning en fazla 100 karakter.
+"""
+
+POSITION_SYSTEM_INSTRUCTION = """Sen profesyonel bir scalping trader'sın. Multi-timeframe (1m + 15m) analiz yaparsın.
+
+""" + TABLE_LEGEND + """- "c15" satırları 15 dakikalık mumlardır, aynı biçimde
+- "b" satırı: balance_usdt,position_usdt
+
+KURALLAR:
+1. Multi-timeframe uyum zorunlu (1m ve 15m aynı yönde)
+2. vol_x > 1.3 olmalı; volat_bp 10-50 ideal
+3. TP: %0.5-1.5, SL: %0.3-0.8
+4. Risk/Reward minimum 1:2
+5. confidence > 80 değilse should_trade=false
+6. Volume veya volatilite uygun değilse should_trade=false
+
+ÇIKTI: Şemadaki karar nesnesi. position_size_usdt = position_usdt.
+reasoning en fazla 150 karakter.
+"""
+
+
+def _bp(value: float, reference: float) -> int:
+    return int(round((value - reference) / reference * 10000)) if reference else 0
+
+
+def encode_candles(candles: List[Dict], tag: str = "c") -> List[str]:
+    """Mumları son kapanışa göre bp tablosuna çevir"""
+    if not candles:
+        return []
+    reference = candles[-1]['close']
+    avg_volume = sum(c['volume'] for c in candles) / len(candles)
+    return [
+        f"{tag}:{_bp(c['open'], reference)},{_bp(c['high'], reference)},{_bp(c['low'], reference)},"
+        f"{_bp(c['close'], reference)},{int(round(c['volume'] / avg_volume * 100)) if avg_volume else 0}"
+        for c in candles
+    ]
+
+
+def encode_metrics(symbol: str, price: float, change_percent: float, volume_ratio: float,
+                   volatility_percent: float, ema_signal: str) -> str:
+    """Özet metrik satırı (yüzdeler bp olarak)"""
+    return (f"m:{symbol},{price:.8g},{int(round(change_percent * 100))},{volume_ratio:.2f},"
+            f"{int(round(volatility_percent * 100))},{ema_signal}")
+
+
+def compile_scalping_prompt(contexts: List[Dict]) -> str:
+    """GeminiAnalyzer market context'lerini kompakt tabloya çevir (tekil veya batch)"""
+    lines = []
+    for context in contexts:
+        lines.append(encode_metrics(
+            context['symbol'], context['current_price'], context['price_change_1m'],
+            context['volume_ratio'], context['volatility_percent'], context['ema_signal']
+        ))
+        lines.extend(encode_candles(context['latest_candles']))
+    return "\n".join(lines)
+
+
+def compile_position_prompt(symbol: str, price: float, candles_1m: List[Dict], candles_15m: List[Dict],
+                            volume_ratio: float, volatility_percent: float, balance: float,
+                            position_size: float) -> str:
+    """GeminiTradingManager multi-timeframe analizi için kompakt tablo"""
+    change_percent = ((candles_1m[-1]['close'] - candles_1m[0]['open']) / candles_1m[0]['open'] * 100
+                      if candles_1m and candles_1m[0]['open'] else 0.0)
+    lines = [encode_metrics(symbol, price, change_percent, volume_ratio, volatility_percent, "-")]
+    lines.extend(encode_candles(candles_1m[-5:]))
+    lines.extend(encode_candles(candles_15m[-3:], tag="c15"))
+    lines.append(f"b:{balance:.2f},{position_size:.2f}")
+    return "\n".join(lines)
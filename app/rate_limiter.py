@@ -0,0 +1,247 @@
+# app/rate_limiter.py - AĞIRLIK BAZLI TOKEN BUCKET RATE LIMITER
+"""
+🚦 Binance Futures REST rate limiter
+
+- Request weight (1 dk) ve order count (10 sn / 1 dk) bütçeleri
+- X-MBX-USED-WEIGHT-* / X-MBX-ORDER-COUNT-* header'larından senkron (hata yanıtları)
+- 429/418'de Retry-After kadar global geri çekilme
+- Bütçe varken sıfır bekleme
+- Öncelik sınıfları: critical (emirler) > normal (okumalar) > background
+  (bakiye, tarama); critical için ayrılmış bütçe, baskı altında background düşürülür
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional, Set, Tuple
+
+PRIORITY_CRITICAL = 0    # Giriş / SL / TP / acil kapatma
+PRIORITY_NORMAL = 1      # Pozisyon / emir okumaları
+PRIORITY_BACKGROUND = 2  # Bakiye, dashboard, periyodik taramalar
+
+PRIORITY_NAMES = {
+    PRIORITY_CRITICAL: 'critical',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_BACKGROUND: 'background',
+}
+
+
+class RequestShedError(Exception):
+    """Background istek bütçe baskısı nedeniyle gönderilmedi"""
+
+
+class _Window:
+    """Sabit zaman penceresi (Binance pencereleri saat başına hizalıdır)"""
+
+    def __init__(self, name: str, limit: int, seconds: int):
+        self.name = name
+        self.limit = limit
+        self.seconds = seconds
+        self.used = 0
+        self._window_id = self._current_id()
+
+    def _current_id(self) -> int:
+        return int(time.time() // self.seconds)
+
+    def refresh(self):
+        window_id = self._current_id()
+        if window_id != self._window_id:
+            self._window_id = window_id
+            self.used = 0
+
+    def remaining(self, share: float = 1.0) -> int:
+        """Limitin share kadarı kullanılabiliyorsa kalan bütçe"""
+        self.refresh()
+        return int(self.limit * share) - self.used
+
+    def seconds_until_reset(self) -> float:
+        return (self._window_id + 1) * self.seconds - time.time()
+
+    def sync(self, used: int):
+        """Sunucunun bildirdiği kullanımı uygula (yerel sayaç daha büyükse koru)"""
+        self.refresh()
+        self.used = max(self.used, used)
+
+
+class BinanceRateLimiter:
+    """
+    🚦 Paylaşılan async rate limiter
+
+    Kullanım:
+        await limiter.acquire(weight=5)            # okuma
+        await limiter.acquire(weight=0, orders=1)  # emir
+        limiter.update_from_headers(response.headers)
+    """
+
+    HEADER_WINDOWS = {
+        'x-mbx-used-weight-1m': 'weight_1m',
+        'x-mbx-order-count-10s': 'orders_10s',
+        'x-mbx-order-count-1m': 'orders_1m',
+    }
+
+    def __init__(self, settings):
+        margin = settings.RATE_LIMIT_SAFETY_MARGIN
+        self.windows: Dict[str, _Window] = {
+            'weight_1m': _Window('weight_1m', int(settings.RATE_LIMIT_WEIGHT_PER_MINUTE * margin), 60),
+            'orders_10s': _Window('orders_10s', int(settings.RATE_LIMIT_ORDERS_PER_10S * margin), 10),
+            'orders_1m': _Window('orders_1m', int(settings.RATE_LIMIT_ORDERS_PER_MINUTE * margin), 60),
+        }
+        self._blocked_until = 0.0
+
+        # Sınıfın kullanabileceği limit oranı (geri kalanı üst sınıflara ayrılır)
+        self.shares = {
+            PRIORITY_CRITICAL: 1.0,
+            PRIORITY_NORMAL: 1.0 - settings.RATE_LIMIT_CRITICAL_RESERVE,
+            PRIORITY_BACKGROUND: 1.0 - settings.RATE_LIMIT_BACKGROUND_RESERVE,
+        }
+        self.background_max_wait = settings.RATE_LIMIT_BACKGROUND_MAX_WAIT
+        # Sınıf → pencere → o pencerede bütçe bekleyen istek sayısı
+        self._short_waiters = {priority: {name: 0 for name in self.windows} for priority in PRIORITY_NAMES}
+        self._class_stats = {
+            priority: {"waiting": 0, "requests": 0, "delayed": 0, "shed": 0,
+                       "total_wait": 0.0, "max_wait": 0.0}
+            for priority in PRIORITY_NAMES
+        }
+
+        self.total_requests = 0
+        self.throttled_requests = 0
+        self.total_wait_seconds = 0.0
+        self.rate_limit_hits = 0
+
+    @staticmethod
+    def _needs(weight: int, orders: int) -> Dict[str, int]:
+        """İsteğin harcayacağı pencereler"""
+        needs = {'weight_1m': weight, 'orders_10s': orders, 'orders_1m': orders}
+        return {name: amount for name, amount in needs.items() if amount > 0}
+
+    def _wait_time(self, needs: Dict[str, int], priority: int) -> Tuple[float, Set[str]]:
+        """Bu istek için gereken bekleme (0 → hemen gönderilebilir) ve bütçesi yetmeyen pencereler"""
+        now = time.time()
+        if now < self._blocked_until:
+            return self._blocked_until - now, set()
+
+        wait = 0.0
+        short = set()
+        for name, amount in needs.items():
+            window = self.windows[name]
+            if window.remaining(self.shares[priority]) < amount:
+                wait = max(wait, window.seconds_until_reset())
+                short.add(name)
+        return wait, short
+
+    def _commit(self, weight: int, orders: int):
+        self.windows['weight_1m'].used += weight
+        if orders:
+            self.windows['orders_10s'].used += orders
+            self.windows['orders_1m'].used += orders
+
+    def _has_higher_waiters(self, priority: int, needs: Dict[str, int]) -> bool:
+        """Üst sınıfta, bu isteğin harcayacağı pencerede bütçe bekleyen var mı"""
+        return any(self._short_waiters[p][name] for p in PRIORITY_NAMES if p < priority for name in needs)
+
+    def _mark_short(self, priority: int, old: Set[str], new: Set[str]):
+        counts = self._short_waiters[priority]
+        for name in old - new:
+            counts[name] -= 1
+        for name in new - old:
+            counts[name] += 1
+
+    async def acquire(self, weight: int = 1, orders: int = 0, priority: int = PRIORITY_NORMAL):
+        """
+        Bütçe ayır - bütçe varsa hiç beklemez
+
+        Üst sınıfta aynı pencere için bekleyen varsa alt sınıf sırasını bekler
+        (başka pencerede bekleyen üst sınıf isteği engellemez). Background istek
+        background_max_wait'ten uzun bekleyecekse RequestShedError fırlatılır.
+        """
+        stats = self._class_stats[priority]
+        stats["requests"] += 1
+        self.total_requests += 1
+        started = None
+        needs = self._needs(weight, orders)
+        short: Set[str] = set()
+
+        try:
+            while True:
+                wait, now_short = self._wait_time(needs, priority)
+                self._mark_short(priority, short, now_short)
+                short = now_short
+                if wait <= 0 and not self._has_higher_waiters(priority, needs):
+                    self._commit(weight, orders)
+                    if started is not None:
+                        waited = time.monotonic() - started
+                        stats["delayed"] += 1
+                        stats["total_wait"] += waited
+                        stats["max_wait"] = max(stats["max_wait"], waited)
+                        self.total_wait_seconds += waited
+                    return
+
+                if priority == PRIORITY_BACKGROUND:
+                    elapsed = time.monotonic() - started if started is not None else 0.0
+                    if elapsed + wait > self.background_max_wait:
+                        stats["shed"] += 1
+                        raise RequestShedError(f"Rate limit baskısı: background istek düşürüldü ({wait:.1f}s)")
+
+                if started is None:
+                    started = time.monotonic()
+                    stats["waiting"] += 1
+                    self.throttled_requests += 1
+                    if wait > 0:
+                        print(f"🚦 Rate limit ({PRIORITY_NAMES[priority]}): {wait:.2f}s bekleniyor")
+                await asyncio.sleep(min(wait, 1.0) + 0.01 if wait > 0 else 0.05)
+        finally:
+            self._mark_short(priority, short, set())
+            if started is not None:
+                stats["waiting"] -= 1
+
+    def update_from_headers(self, headers):
+        """Yanıt header'larından kullanılan bütçeyi senkronla"""
+        if not headers:
+            return
+        for header, name in self.HEADER_WINDOWS.items():
+            value = headers.get(header)
+            if value is None:
+                continue
+            try:
+                self.windows[name].sync(int(value))
+            except (TypeError, ValueError):
+                continue
+
+    def on_rate_limited(self, status_code: int, headers=None):
+        """429/418 alındı → Retry-After kadar tüm istekleri durdur"""
+        retry_after: Optional[float] = None
+        if headers:
+            try:
+                retry_after = float(headers.get('Retry-After'))
+            except (TypeError, ValueError):
+                retry_after = None
+        if retry_after is None:
+            retry_after = 120.0 if status_code == 418 else 60.0
+
+        self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+        self.rate_limit_hits += 1
+        print(f"🚨 Binance rate limit ({status_code}) - {retry_after:.0f}s geri çekiliniyor")
+
+    def get_status(self) -> dict:
+        blocked_for = max(0.0, self._blocked_until - time.time())
+        return {
+            "windows": {
+                name: {"used": w.limit - w.remaining(), "limit": w.limit}
+                for name, w in self.windows.items()
+            },
+            "blocked_for_seconds": round(blocked_for, 1),
+            "total_requests": self.total_requests,
+            "throttled_requests": self.throttled_requests,
+            "total_wait_seconds": round(self.total_wait_seconds, 3),
+            "rate_limit_hits": self.rate_limit_hits,
+            "classes": {
+                PRIORITY_NAMES[priority]: {
+                    "queue_depth": stats["waiting"],
+                    "requests": stats["requests"],
+                    "delayed": stats["delayed"],
+                    "shed": stats["shed"],
+                    "avg_wait_ms": round(stats["total_wait"] / stats["delayed"] * 1000, 1) if stats["delayed"] else 0.0,
+                    "max_wait_ms": round(stats["max_wait"] * 1000, 1)
+                }
+                for priority, stats in self._class_stats.items()
+            }
+        }
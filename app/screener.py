@@ -0,0 +1,249 @@
+# app/screener.py - YEREL SEMBOL TARAYICI
+"""
+🔭 USDT perpetual evreninin yerel, sayısal taranması
+
+- Tüm 24s ticker'lar tek toplu REST çağrısıyla (weight 40) ya da canlı
+  !miniTicker@arr stream'inden alınır
+- Likidite (quote hacim), volatilite (24s aralık) ve hacim ivmesi
+  NumPy ile vektörel z-skoruna çevrilip ağırlıklı toplanır
+- Hacim ivmesi: son N dakikanın 1m mum hacmi / 24s ortalama dakika hacmi
+  (sadece ön elemeyi geçen adaylar için; yerel mum varsa REST yok)
+- Sadece ilk K aday AI onayına gönderilir
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .rate_limiter import PRIORITY_BACKGROUND
+from .timeframe_aggregator import timeframe_store
+
+MINI_TICKER_STREAM = "!miniTicker"
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    """NaN (ölçüm yok) → 0, yani nötr skor"""
+    result = np.zeros_like(values)
+    valid = ~np.isnan(values)
+    if valid.sum() < 2:
+        return result
+    std = values[valid].std()
+    if std > 0:
+        result[valid] = np.clip((values[valid] - values[valid].mean()) / std, -3.0, 3.0)
+    return result
+
+
+class SymbolScreener:
+    """
+    🔭 Likidite / volatilite / hacim ivmesi sıralaması
+
+    Kullanım:
+        await screener.start(market_data)      # market_data None ise sadece REST
+        candidates = screener.top(3, exclude={"BTCUSDT"})
+        # [{'symbol': 'SOLUSDT', 'score': 2.41, 'price': ..., ...}, ...]
+    """
+
+    def __init__(self, settings, binance_client):
+        self.binance_client = binance_client
+        self.refresh_seconds = settings.SCREENER_REFRESH_SECONDS
+        self.top_k = settings.SCREENER_TOP_K
+        self.min_quote_volume = settings.SCREENER_MIN_QUOTE_VOLUME
+        self.max_range_percent = settings.SCREENER_MAX_RANGE_PERCENT
+        self.accel_minutes = settings.SCREENER_ACCEL_WINDOW_MINUTES
+        self.accel_candidates = settings.SCREENER_ACCEL_CANDIDATES
+        self.weights = np.array([
+            settings.SCREENER_WEIGHT_LIQUIDITY,
+            settings.SCREENER_WEIGHT_VOLATILITY,
+            settings.SCREENER_WEIGHT_ACCELERATION
+        ])
+        self.use_stream = settings.SCREENER_USE_STREAM
+
+        # symbol → (son fiyat, 24s yüksek, 24s düşük, 24s quote hacim, 24s base hacim)
+        self._tickers: Dict[str, tuple] = {}
+        self.updated_at = 0.0
+
+        # symbol → (ölçüm zamanı, son N dakikanın dakika başı base hacmi)
+        self._window_volume: Dict[str, tuple] = {}
+        self.kline_fetches = 0
+
+        self.market_data = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.rest_refreshes = 0
+        self.stream_updates = 0
+        self.last_rank_ms = 0.0
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at if self.updated_at else float('inf')
+
+    # ===================== EVREN =====================
+    def _is_tradable(self, symbol: str) -> bool:
+        """USDT margined, TRADING durumdaki perpetual kontrat"""
+        if not symbol.endswith('USDT'):
+            return False
+        raw = self.binance_client.symbols.get_raw(symbol)
+        if raw is None:
+            return not len(self.binance_client.symbols)  # Metadata yoksa sadece isimle karar ver
+        return (raw.get('contractType') == 'PERPETUAL' and raw.get('quoteAsset') == 'USDT'
+                and raw.get('status') == 'TRADING')
+
+    # ===================== VERİ =====================
+    async def refresh(self) -> bool:
+        """Tüm 24s ticker'ları tek çağrıda indir"""
+        try:
+            tickers = await self.binance_client._call(
+                self.binance_client.client.futures_ticker, weight=40, priority=PRIORITY_BACKGROUND)
+            if not tickers:
+                return False
+
+            updated = {}
+            for ticker in tickers:
+                symbol = ticker.get('symbol', '')
+                if not self._is_tradable(symbol):
+                    continue
+                try:
+                    updated[symbol] = (float(ticker['lastPrice']), float(ticker['highPrice']),
+                                       float(ticker['lowPrice']), float(ticker['quoteVolume']),
+                                       float(ticker['volume']))
+                except (KeyError, TypeError, ValueError):
+                    continue
+
+            self._tickers = updated
+            self.updated_at = time.time()
+            self.rest_refreshes += 1
+            return True
+        except Exception as e:
+            print(f"⚠️ Screener ticker yenileme hatası: {e}")
+            return False
+
+    async def _on_mini_tickers(self, symbol: str, data):
+        """!miniTicker@arr - sadece değişen semboller gelir, mevcut tabloya işlenir"""
+        if not isinstance(data, list):
+            return
+        for ticker in data:
+            ticker_symbol = ticker.get('s', '')
+            if ticker_symbol not in self._tickers and not self._is_tradable(ticker_symbol):
+                continue
+            try:
+                self._tickers[ticker_symbol] = (float(ticker['c']), float(ticker['h']),
+                                                float(ticker['l']), float(ticker['q']), float(ticker['v']))
+            except (KeyError, TypeError, ValueError):
+                continue
+        self.updated_at = time.time()
+        self.stream_updates += 1
+
+    async def _measure_window_volume(self, symbol: str):
+        """Son N kapanmış 1m mumun dakika başı hacmi (yerel tampon, yoksa REST)"""
+        klines = timeframe_store.get_klines(symbol, "1m", limit=self.accel_minutes, include_partial=False)
+        if klines is None:
+            klines = await self.binance_client.get_historical_klines(symbol, "1m", limit=self.accel_minutes + 1)
+            self.kline_fetches += 1
+            now_ms = time.time() * 1000
+            klines = [k for k in klines or [] if int(k[6]) < now_ms][-self.accel_minutes:]  # Açık mum hariç
+        if klines:
+            per_minute = sum(float(k[5]) for k in klines) / len(klines)
+            self._window_volume[symbol] = (time.time(), per_minute)
+
+    async def refresh_acceleration(self):
+        """Ön elemeyi (likidite + volatilite) geçen adayların pencere hacmini ölç"""
+        symbols = [c["symbol"] for c in self.rank(use_acceleration=False)[:self.accel_candidates]]
+        await asyncio.gather(*(self._measure_window_volume(symbol) for symbol in symbols),
+                             return_exceptions=True)
+        cutoff = time.time() - 3 * self.refresh_seconds
+        for symbol in [s for s, (measured_at, _) in self._window_volume.items() if measured_at < cutoff]:
+            del self._window_volume[symbol]
+
+    # ===================== SIRALAMA =====================
+    def rank(self, exclude: Optional[set] = None, use_acceleration: bool = True) -> List[Dict]:
+        """Tüm evreni puanla, yüksekten düşüğe sırala"""
+        started = time.perf_counter()
+        exclude = exclude or set()
+        symbols = [s for s in self._tickers if s not in exclude]
+        if not symbols:
+            return []
+
+        data = np.array([self._tickers[s] for s in symbols], dtype=float)
+        last, high, low, quote_volume, base_volume = data.T
+        range_percent = np.where(last > 0, (high - low) / np.where(last > 0, last, 1.0) * 100, 0.0)
+
+        # Hacim ivmesi: pencere dakika hacmi / 24s ortalama dakika hacmi (1.0 = normal, ölçüm yoksa NaN)
+        window = np.array([self._window_volume.get(s, (0.0, np.nan))[1] for s in symbols], dtype=float)
+        average = base_volume / 1440
+        acceleration = np.where(average > 0, window / np.where(average > 0, average, 1.0), np.nan)
+
+        eligible = (quote_volume >= self.min_quote_volume) & (range_percent > 0) & \
+                   (range_percent <= self.max_range_percent)
+        if not eligible.any():
+            self.last_rank_ms = (time.perf_counter() - started) * 1000
+            return []
+
+        components = np.column_stack([
+            _zscore(np.log10(np.maximum(quote_volume[eligible], 1.0))),
+            _zscore(np.log(range_percent[eligible])),
+            _zscore(np.log1p(acceleration[eligible])) if use_acceleration else np.zeros(int(eligible.sum()))
+        ])
+        scores = components @ self.weights
+
+        indices = np.flatnonzero(eligible)
+        order = np.argsort(-scores)
+        ranked = [{
+            "symbol": symbols[indices[i]],
+            "score": round(float(scores[i]), 3),
+            "price": float(last[indices[i]]),
+            "quote_volume": float(quote_volume[indices[i]]),
+            "range_percent": round(float(range_percent[indices[i]]), 2),
+            "acceleration": None if np.isnan(acceleration[indices[i]]) else round(float(acceleration[indices[i]]), 2)
+        } for i in order]
+        self.last_rank_ms = (time.perf_counter() - started) * 1000
+        return ranked
+
+    def top(self, k: Optional[int] = None, exclude: Optional[set] = None) -> List[Dict]:
+        """AI onayına gidecek ilk K aday"""
+        return self.rank(exclude)[:k or self.top_k]
+
+    # ===================== YAŞAM DÖNGÜSÜ =====================
+    async def start(self, market_data=None):
+        """İlk toplu çekim + canlı stream (varsa) + REST yedek yenileme"""
+        if not self.updated_at:
+            await self.refresh()
+            await self.refresh_acceleration()
+        if market_data is not None and self.use_stream and self.market_data is None:
+            self.market_data = market_data
+            await market_data.subscribe(MINI_TICKER_STREAM, self._on_mini_tickers, stream_type="arr")
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            # Stream canlıysa REST'e gerek yok
+            if self.age >= self.refresh_seconds:
+                await self.refresh()
+            await self.refresh_acceleration()
+
+    async def stop(self):
+        if self.market_data is not None:
+            await self.market_data.unsubscribe(MINI_TICKER_STREAM, self._on_mini_tickers, stream_type="arr")
+            self.market_data = None
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    def get_status(self) -> dict:
+        return {
+            "universe": len(self._tickers),
+            "age_seconds": int(self.age) if self.updated_at else None,
+            "source": "stream" if self.market_data is not None else "rest",
+            "rest_refreshes": self.rest_refreshes,
+            "stream_updates": self.stream_updates,
+            "acceleration_measured": len(self._window_volume),
+            "kline_fetches": self.kline_fetches,
+            "last_rank_ms": round(self.last_rank_ms, 2),
+            "top": [c["symbol"] for c in self.top()]
+        }
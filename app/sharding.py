@@ -0,0 +1,382 @@
+# app/sharding.py - SÜREÇ BAZLI SEMBOL SHARDING
+"""
+🧮 Sembol evrenini CPU çekirdeklerine dağıt
+
+- Semboller N işçi sürece bölünür; her süreç kendi market data bağlantısını
+  ve strateji değerlendirmesini yürütür (ana event loop'u bloklamaz)
+- İşçiler sadece küçük sinyal mesajları gönderir, API anahtarı taşımaz
+- Ana süreç tek emir geçididir: istemci, rate limiter, emir şablonu ve
+  portföy limitleri burada kalır
+- Kapanan 1m mumlar ana sürece iletilir; timeframe_store shard modunda da
+  güncel kalır (diğer bileşenler REST'siz okumaya devam eder)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .fast_scalping_bot import OptimizedScalpingBot
+from .kline_buffer import KlineRingBuffer
+from .market_data import MarketDataFeed
+from .orchestrator import PortfolioLimits
+from .order_builder import OrderBuilder
+from .pipeline import CoalescingCandleQueue, SignalQueue, cancel_tasks
+from .timeframe_aggregator import timeframe_store
+
+# İşçi → geçit mesajlarında taşınan analiz alanları
+SIGNAL_FIELDS = ('signal', 'entry_price', 'tp_price', 'sl_price', 'tp_percent',
+                 'sl_percent', 'momentum', 'confidence', 'strategy')
+
+# İşçi → geçit mesajlarında taşınan 1m mum alanları (WebSocket 'k' payload'u)
+KLINE_FIELDS = ('t', 'o', 'h', 'l', 'c', 'v', 'x')
+
+SHARD_STATUS_INTERVAL = 5.0
+
+
+def shard_symbols(symbols: List[str], shard_count: int) -> List[List[str]]:
+    """Sembolleri süreçlere sırayla dağıt"""
+    shard_count = max(1, min(shard_count, len(symbols)))
+    shards = [[] for _ in range(shard_count)]
+    for i, symbol in enumerate(symbols):
+        shards[i % shard_count].append(symbol)
+    return shards
+
+
+def compact_signal(analysis: dict) -> dict:
+    """Süreçler arası gönderilecek küçük sinyal"""
+    return {
+        field: (float(analysis[field]) if isinstance(analysis[field], (int, float)) else analysis[field])
+        for field in SIGNAL_FIELDS if field in analysis
+    }
+
+
+# ===================== İŞÇİ SÜREÇ =====================
+class _ShardWorker:
+    """Tek süreçte çalışan sembol grubu: market data + strateji"""
+
+    def __init__(self, settings, shard_id: int, histories: Dict[str, list], strategy_cls,
+                 signals, stop_event):
+        self.settings = settings
+        self.shard_id = shard_id
+        self.strategy = strategy_cls()
+        self.signals = signals
+        self.stop_event = stop_event
+
+        self.market_data = MarketDataFeed(settings)
+        self.buffers: Dict[str, KlineRingBuffer] = {}
+        self.queues: Dict[str, CoalescingCandleQueue] = {}
+        self.last_trade_time: Dict[str, float] = {}
+        for symbol, history in histories.items():
+            buffer = KlineRingBuffer(settings.MAX_KLINES_PER_SYMBOL)
+            buffer.extend(history)
+            self.buffers[symbol] = buffer
+            self.queues[symbol] = CoalescingCandleQueue(settings.CANDLE_QUEUE_SIZE)
+
+        self.evaluations = 0
+        self.signals_sent = 0
+
+    async def run(self):
+        tasks = [asyncio.create_task(self._evaluation_loop(symbol)) for symbol in self.buffers]
+        for symbol in self.buffers:
+            await self.market_data.subscribe(symbol, self._handle_message)
+        print(f"🧮 Shard {self.shard_id} (pid {os.getpid()}): {', '.join(self.buffers)}")
+
+        try:
+            while not self.stop_event.is_set():
+                self._send('status', self.shard_id, {
+                    "pid": os.getpid(),
+                    "symbols": list(self.buffers),
+                    "connections": self.market_data.connection_count,
+                    "evaluations": self.evaluations,
+                    "signals": self.signals_sent
+                })
+                await asyncio.sleep(SHARD_STATUS_INTERVAL)
+        finally:
+            await cancel_tasks(tasks)
+            await self.market_data.stop()
+
+    def _send(self, kind: str, key, payload: dict):
+        try:
+            self.signals.put_nowait((kind, key, payload, time.time()))
+        except queue.Full:
+            print(f"⚠️ Shard {self.shard_id}: sinyal kanalı dolu, mesaj atlandı")
+
+    async def _handle_message(self, symbol: str, data: dict):
+        kline_data = data.get('k', {})
+        if kline_data.get('x', False):
+            self.queues[symbol].put_nowait(kline_data)
+            # Ana süreçteki timeframe_store için (dakikada sembol başına bir küçük mesaj)
+            self._send('kline', symbol, {field: kline_data[field] for field in KLINE_FIELDS if field in kline_data})
+
+    async def _evaluation_loop(self, symbol: str):
+        buffer = self.buffers[symbol]
+        candles = self.queues[symbol]
+        while True:
+            try:
+                for kline_data in await candles.get_batch():
+                    buffer.append_ws_kline(kline_data)
+                self._evaluate(symbol, buffer)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Shard {self.shard_id} {symbol} analiz hatası: {e}")
+
+    def _evaluate(self, symbol: str, buffer: KlineRingBuffer):
+        """Cooldown + strateji + momentum - geçen sinyal geçide gönderilir"""
+        now = time.time()
+        if now - self.last_trade_time.get(symbol, 0) < self.settings.TRADE_COOLDOWN_SECONDS:
+            return
+
+        self.evaluations += 1
+        analysis = self.strategy.analyze_and_calculate_levels(buffer, symbol)
+        if not analysis or not analysis.get('should_trade', False):
+            return
+        if analysis.get('momentum', 0) < self.settings.MIN_MOMENTUM_PERCENT:
+            return
+
+        self.last_trade_time[symbol] = now
+        self.signals_sent += 1
+        self._send('signal', symbol, compact_signal(analysis))
+
+
+def _shard_main(shard_id: int, histories: Dict[str, list], strategy_cls, signals, stop_event):
+    """İşçi süreç giriş noktası (spawn)"""
+    from .config import settings
+    try:
+        asyncio.run(_ShardWorker(settings, shard_id, histories, strategy_cls, signals, stop_event).run())
+    except KeyboardInterrupt:
+        pass
+
+
+# ===================== EMİR GEÇİDİ =====================
+class ShardedTradingGateway:
+    """
+    🧮 Çok süreçli sembol işçileri + tek emir geçidi
+
+    TradingOrchestrator ile aynı arayüz:
+        await gateway.start(["BTCUSDT", "ETHUSDT", ...])
+        status = gateway.get_status()
+        await gateway.stop()
+    """
+
+    def __init__(self, settings, binance_client, strategy, firebase_manager, market_data):
+        self.settings = settings
+        self.binance_client = binance_client
+        self.strategy = strategy
+        self.market_data = market_data
+
+        self.portfolio = PortfolioLimits(settings, binance_client)
+        self.order_builder = OrderBuilder(settings, binance_client)
+        # Sinyalleri pozisyona çeviren tek yürütücü (market data'ya abone olmaz)
+        self.executor = OptimizedScalpingBot(
+            settings, binance_client, strategy, firebase_manager, market_data,
+            order_builder=self.order_builder, portfolio=self.portfolio
+        )
+
+        self.workers: Dict[str, int] = {}  # symbol → shard id
+        self.last_signals: Dict[str, str] = {}
+        self.shard_status: Dict[int, dict] = {}
+        self._processes: List[multiprocessing.Process] = []
+        self._signals = None
+        self._stop_event = None
+        self._signal_queue: Optional[SignalQueue] = None
+        # Bloklayan kanal okuması için ayrılmış tek thread (varsayılan executor REST istemcisiyle paylaşılır)
+        self._reader: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self.started_at = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return any(process.is_alive() for process in self._processes)
+
+    @property
+    def shard_count(self) -> int:
+        return self.settings.SHARD_PROCESSES or max(1, (os.cpu_count() or 2) - 1)
+
+    # ===================== YAŞAM DÖNGÜSÜ =====================
+    async def _prepare_symbol(self, symbol: str) -> Optional[list]:
+        """Geçit tarafı hazırlık: filtreler, kaldıraç, şablon, geçmiş veri"""
+        try:
+            if not await self.binance_client.get_symbol_metadata(symbol):
+                return None
+            history = await self.binance_client.get_historical_klines(symbol, "1m", limit=50)
+            if len(history) < 15:
+                print(f"⚠️ {symbol}: Yetersiz geçmiş veri")
+                return None
+            await self.binance_client.set_leverage(symbol, self.settings.LEVERAGE)
+            if not await self.order_builder.prepare(symbol):
+                return None
+            return history
+        except Exception as e:
+            print(f"❌ {symbol} hazırlık hatası: {e}")
+            return None
+
+    async def start(self, symbols: List[str]) -> List[str]:
+        if self._processes:
+            print("⚠️ Shard'lar zaten çalışıyor")
+            return []
+
+        await self.binance_client.initialize()
+        symbols = [s if s.endswith('USDT') else s + 'USDT' for s in (s.upper().strip() for s in symbols)]
+        symbols = list(dict.fromkeys(symbols))[:self.settings.MULTI_MAX_SYMBOLS]
+
+        histories = {}
+        for symbol in symbols:
+            history = await self._prepare_symbol(symbol)
+            if history is not None:
+                histories[symbol] = history
+        if not histories:
+            return []
+
+        # 1m geçmişi + yerel üst zaman dilimleri ana süreçte de tutulur
+        for symbol, history in histories.items():
+            aggregator = timeframe_store.get(symbol)
+            aggregator.clear()
+            aggregator.extend(history)
+
+        context = multiprocessing.get_context('spawn')
+        self._signals = context.Queue(maxsize=self.settings.EXECUTION_QUEUE_SIZE * 8)
+        self._stop_event = context.Event()
+        self._signal_queue = SignalQueue(
+            self.settings.EXECUTION_QUEUE_SIZE, self.settings.SIGNAL_MAX_AGE_SECONDS
+        )
+        self._stopping = False
+
+        for shard_id, shard in enumerate(shard_symbols(list(histories), self.shard_count)):
+            process = context.Process(
+                target=_shard_main,
+                args=(shard_id, {s: histories[s] for s in shard}, type(self.strategy),
+                      self._signals, self._stop_event),
+                name=f"shard-{shard_id}",
+                daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+            for symbol in shard:
+                self.workers[symbol] = shard_id
+
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shard-signals")
+        self._tasks = [
+            asyncio.create_task(self._receive_loop()),
+            asyncio.create_task(self._execution_loop())
+        ]
+        self.started_at = time.time()
+        self.executor.status.update({"is_running": True, "status_message": f"🧮 {len(self._processes)} shard aktif"})
+        print(f"🧮 {len(self.workers)} sembol {len(self._processes)} sürece dağıtıldı")
+        return list(self.workers)
+
+    async def stop(self):
+        self._stopping = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, 5)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        await cancel_tasks(self._tasks)
+        self._tasks = []
+        if self._reader is not None:
+            self._reader.shutdown(wait=False)  # Bekleyen get en fazla 0.5s sonra döner
+            self._reader = None
+        for symbol in self.workers:
+            self.order_builder.forget(symbol)
+        self.workers.clear()
+        self.shard_status.clear()
+        await self.order_builder.stop()
+        self.executor.status.update({"is_running": False, "status_message": "⚡ Shard'lar durduruldu"})
+        self.started_at = 0.0
+        print("🛑 Shard geçidi durduruldu")
+
+    # ===================== SİNYAL AKIŞI =====================
+    async def _receive_loop(self):
+        """Süreçler arası kanaldan mesajları al (bloklayan get thread'de)"""
+        loop = asyncio.get_running_loop()
+        while not self._stopping:
+            try:
+                kind, key, payload, sent_at = await loop.run_in_executor(self._reader, self._signals.get, True, 0.5)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+
+            if kind == 'kline':
+                timeframe_store.get(key).add_ws_kline(payload)
+            elif kind == 'status':
+                self.shard_status[key] = payload
+            elif kind == 'signal':
+                self.last_signals[key] = payload['signal']
+                # Yaş shard'da üretildiği andan sayılır (süreçler arası kuyruk + pickle dahil)
+                if not self._signal_queue.put_nowait(key, payload, created_at=sent_at):
+                    print(f"⚠️ {key}: Bekleyen emir var, sinyal atlandı")
+
+    async def _execution_loop(self):
+        while not self._stopping:
+            symbol, analysis, waited = await self._signal_queue.get()
+            try:
+                await self.executor.execute_signal(symbol, analysis)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ {symbol} yürütme hatası: {e}")
+            finally:
+                self._signal_queue.done(symbol)
+
+    # ===================== DURUM =====================
+    def get_status(self) -> dict:
+        """TradingOrchestrator.get_status ile aynı biçim (REST çağrısı yok)"""
+        book = self.binance_client.order_book
+        positions = {p['symbol']: p for p in book.get_open_positions()} if book.is_live else {}
+        active = next((symbol for symbol in self.workers if symbol in positions), None)
+        position_amt = float(positions[active]['positionAmt']) if active else 0.0
+        running = self.is_running
+        status = self.executor.status
+
+        return {
+            "is_running": running,
+            "mode": "sharded",
+            "symbols": list(self.workers),
+            "active_symbol": active,
+            "position_side": ("LONG" if position_amt > 0 else "SHORT") if active else None,
+            "status_message": status["status_message"],
+            "account_balance": self.order_builder.balance,
+            "position_pnl": sum(float(positions[s].get('unRealizedProfit', 0)) for s in self.workers if s in positions),
+            "order_size": self.order_builder.position_size,
+            "last_signals": {symbol: self.last_signals.get(symbol, "HOLD") for symbol in self.workers},
+            "websocket_connections": sum(s.get("connections", 0) for s in self.shard_status.values()),
+            "uptime_seconds": int(time.time() - self.started_at) if self.started_at else 0,
+            "shards": {
+                f"shard-{i}": {
+                    "alive": process.is_alive(),
+                    **self.shard_status.get(i, {})
+                }
+                for i, process in enumerate(self._processes)
+            },
+            "trades": {
+                "successful": status["successful_trades"],
+                "failed": status["failed_trades"],
+                "total": status["total_trades"]
+            },
+            "signals": self._signal_queue.get_stats() if self._signal_queue is not None else None,
+            "portfolio": self.portfolio.get_status(),
+            "timestamp": time.time()
+        }
+
+
+# Global instance
+sharded_gateway = None
+
+
+def create_sharded_gateway(settings, binance_client, strategy, firebase_manager, market_data):
+    """Shard geçidi instance'ı oluştur"""
+    global sharded_gateway
+    sharded_gateway = ShardedTradingGateway(settings, binance_client, strategy, firebase_manager, market_data)
+    return sharded_gateway
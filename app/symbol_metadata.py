@@ -0,0 +1,220 @@
+# app/symbol_metadata.py - EXCHANGE INFO İNDEKSİ
+"""
+📇 Sembol metadata indeksi
+
+- futures exchangeInfo bir kez indirilir, sembol → metadata dict'i olarak tutulur
+- tickSize / stepSize / precision / min notional / max qty önceden sayıya çevrilir
+- TTL dolunca arka planda yenilenir
+- Yerel dosyaya yazılır, yeniden başlatmada tekrar indirilmez
+  (dosya ortam başına ayrıdır; TEST kaydı LIVE'da kullanılmaz)
+"""
+
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Dict, Optional
+
+from .rate_limiter import PRIORITY_BACKGROUND, PRIORITY_NORMAL
+
+
+def _decimals(value: str) -> int:
+    """'0.00100000' → 3"""
+    value = str(value)
+    if '.' not in value:
+        return 0
+    return len(value.split('.')[1].rstrip('0'))
+
+
+def build_symbol_metadata(symbol_info: dict) -> dict:
+    """Ham exchangeInfo sembol kaydından sayısal metadata üret"""
+    filters = {f.get('filterType'): f for f in symbol_info.get('filters', [])}
+    price_filter = filters.get('PRICE_FILTER', {})
+    lot_size = filters.get('LOT_SIZE', {})
+    market_lot_size = filters.get('MARKET_LOT_SIZE', {})
+    min_notional = filters.get('MIN_NOTIONAL', {})
+
+    tick_size = price_filter.get('tickSize', '0')
+    step_size = lot_size.get('stepSize', '0')
+
+    return {
+        'symbol': symbol_info['symbol'],
+        'status': symbol_info.get('status'),
+        'tick_size': float(tick_size),
+        'step_size': float(step_size),
+        'price_precision': _decimals(tick_size),
+        'quantity_precision': _decimals(step_size),
+        'min_qty': float(lot_size.get('minQty', 0)),
+        'max_qty': float(lot_size.get('maxQty', 0)),
+        'market_max_qty': float(market_lot_size.get('maxQty', lot_size.get('maxQty', 0))),
+        # Futures 'notional', spot 'minNotional' kullanır
+        'min_notional': float(min_notional.get('notional', min_notional.get('minNotional', 0))),
+    }
+
+
+def _environment_file(cache_file: Optional[str], environment: str) -> Optional[str]:
+    """exchange_info_cache.json → exchange_info_cache_test.json"""
+    if not cache_file:
+        return cache_file
+    root, ext = os.path.splitext(cache_file)
+    return f"{root}_{environment.lower()}{ext}"
+
+
+class SymbolMetadataIndex:
+    """
+    📇 Sembol bazlı O(1) exchange info erişimi
+
+    Kullanım:
+        await index.load()
+        meta = index.get("BTCUSDT")      # {'tick_size': 0.1, 'quantity_precision': 3, ...}
+        qty = index.round_quantity("BTCUSDT", 0.01234)
+    """
+
+    def __init__(self, settings, binance_client):
+        self.binance_client = binance_client
+        self.ttl = settings.EXCHANGE_INFO_TTL_SECONDS
+        self.environment = settings.ENVIRONMENT
+        self.cache_file = _environment_file(settings.EXCHANGE_INFO_CACHE_FILE, self.environment)
+
+        self._metadata: Dict[str, dict] = {}
+        self._raw: Dict[str, dict] = {}
+        self.updated_at = 0.0
+        self.refresh_count = 0
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._metadata)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._metadata
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at if self.updated_at else float('inf')
+
+    # ===================== ERİŞİM =====================
+    def get(self, symbol: str) -> Optional[dict]:
+        """Önceden hesaplanmış metadata"""
+        return self._metadata.get(symbol)
+
+    def get_raw(self, symbol: str) -> Optional[dict]:
+        """Ham exchangeInfo sembol kaydı"""
+        return self._raw.get(symbol)
+
+    def round_quantity(self, symbol: str, quantity: float) -> float:
+        """Miktarı stepSize'a aşağı yuvarla"""
+        meta = self._metadata.get(symbol)
+        if not meta or meta['step_size'] <= 0:
+            return quantity
+        steps = math.floor(quantity / meta['step_size'] + 1e-9)
+        return round(steps * meta['step_size'], meta['quantity_precision'])
+
+    def round_price(self, symbol: str, price: float) -> float:
+        """Fiyatı tickSize'a yuvarla"""
+        meta = self._metadata.get(symbol)
+        if not meta or meta['tick_size'] <= 0:
+            return price
+        ticks = round(price / meta['tick_size'])
+        return round(ticks * meta['tick_size'], meta['price_precision'])
+
+    # ===================== YÜKLEME =====================
+    def _apply(self, symbols: list, updated_at: float):
+        raw = {}
+        metadata = {}
+        for symbol_info in symbols:
+            try:
+                metadata[symbol_info['symbol']] = build_symbol_metadata(symbol_info)
+                raw[symbol_info['symbol']] = symbol_info
+            except (KeyError, TypeError, ValueError):
+                continue
+        # Tek atamayla değiştir - okuyucular yarım indeks görmez
+        self._raw = raw
+        self._metadata = metadata
+        self.updated_at = updated_at
+
+    def _load_file(self) -> bool:
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            if cached.get('environment') != self.environment:
+                print(f"⚠️ Exchange info cache farklı ortama ait ({cached.get('environment')}), yok sayıldı")
+                return False
+            self._apply(cached['symbols'], float(cached['updated_at']))
+            return bool(self._metadata)
+        except Exception as e:
+            print(f"⚠️ Exchange info cache okunamadı: {e}")
+            return False
+
+    def _save_file(self, payload: dict):
+        """Thread'de çalışır - event loop'u tam sembol listesinin yazımıyla bekletmez"""
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(payload, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"⚠️ Exchange info cache yazılamadı: {e}")
+
+    async def refresh(self, priority: int = PRIORITY_BACKGROUND) -> bool:
+        """Exchange info'yu indir ve indeksi yenile"""
+        try:
+            exchange_info = await self.binance_client._call(
+                self.binance_client.client.futures_exchange_info, weight=1, priority=priority)
+            if not exchange_info or 'symbols' not in exchange_info:
+                return False
+
+            self._apply(exchange_info['symbols'], time.time())
+            self.refresh_count += 1
+            if self.cache_file:
+                await asyncio.to_thread(self._save_file, {
+                    'environment': self.environment, 'updated_at': self.updated_at,
+                    'symbols': exchange_info['symbols']
+                })
+            print(f"📇 Exchange info yenilendi ({len(self._metadata)} sembol)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Exchange info yenileme hatası: {e}")
+            return False
+
+    async def load(self) -> bool:
+        """Dosyadan yükle, yoksa indir; arka plan yenilemeyi başlat"""
+        if self._load_file():
+            print(f"📇 Exchange info dosyadan yüklendi ({len(self._metadata)} sembol, {self.age:.0f}s önce)")
+        elif not await self.refresh(priority=PRIORITY_NORMAL):
+            return False
+
+        self.start()
+        return True
+
+    # ===================== ARKA PLAN YENİLEME =====================
+    def start(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresh_task and not self._refresh_task.done():
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+        self._refresh_task = None
+
+    async def _refresh_loop(self):
+        while True:
+            wait = self.ttl - self.age
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if not await self.refresh():
+                await asyncio.sleep(60)  # Hata: kısa süre sonra tekrar dene
+
+    def get_status(self) -> dict:
+        return {
+            "symbols": len(self._metadata),
+            "age_seconds": int(self.age) if self.updated_at else None,
+            "ttl_seconds": self.ttl,
+            "refresh_count": self.refresh_count
+        }
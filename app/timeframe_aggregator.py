@@ -0,0 +1,230 @@
+# app/timeframe_aggregator.py - ÇOKLU ZAMAN DİLİMİ MUM ÜRETİCİ
+"""
+🕰️ 1 dakikalık mumlardan yerel 3m / 5m / 15m / 1h mumları
+
+- Her 1m mum geldiğinde tüm üst zaman dilimleri artımlı güncellenir
+  (O(zaman dilimi sayısı), bellek ayırmaz)
+- Devam eden (yarım) üst mum ayrıca işaretlenir, istenirse dışarıda bırakılır
+- Aynı 1m mumun güncellemesi (REST'teki açık mum, tekrar gelen mesaj)
+  çift sayılmaz, katkısı yeniden hesaplanır
+- Herhangi bir bileşen REST çağrısı yapmadan istediği aralığı okuyabilir
+"""
+
+import time
+from typing import Dict, List, Optional
+
+from .config import settings
+from .kline_buffer import KlineRingBuffer
+
+# Aralık → dakika
+SUPPORTED_INTERVALS = {"1m": 1, "3m": 3, "5m": 5, "15m": 15, "1h": 60}
+
+MINUTE_MS = 60_000
+
+
+class TimeframeAggregator:
+    """
+    🕰️ Tek sembol için çoklu zaman dilimi tamponları
+
+    Kullanım:
+        aggregator = TimeframeAggregator(capacity=100)
+        aggregator.extend(history_1m)          # REST 1m geçmişi
+        aggregator.add_ws_kline(kline_data)    # her websocket 1m mumu
+        klines_15m = aggregator.klines("15m", limit=50, include_partial=False)
+    """
+
+    def __init__(self, capacity: int = 1000, intervals: Optional[List[str]] = None):
+        intervals = intervals or list(SUPPORTED_INTERVALS)
+        unknown = [i for i in intervals if i not in SUPPORTED_INTERVALS]
+        if unknown:
+            raise ValueError(f"Desteklenmeyen aralık: {', '.join(unknown)}")
+        if "1m" not in intervals:
+            intervals = ["1m"] + intervals
+
+        self.capacity = capacity
+        self._minutes = {interval: SUPPORTED_INTERVALS[interval] for interval in intervals}
+        self._buffers = {interval: KlineRingBuffer(capacity) for interval in intervals}
+        # Aralık başına son üst mumun durumu:
+        # last_minute = son işlenen 1m open_time, base = son 1m eklenmeden önceki değerler,
+        # count = mumdaki 1m sayısı, closed = son 1m kapanmış mı
+        self._state: Dict[str, dict] = {}
+        self.updated_at = 0.0
+        self.clear()
+
+    @property
+    def intervals(self) -> List[str]:
+        return list(self._minutes)
+
+    def clear(self):
+        for buffer in self._buffers.values():
+            buffer.clear()
+        self._state = {
+            interval: {"last_minute": None, "base": None, "count": 0, "closed": True}
+            for interval in self._minutes
+        }
+        self.updated_at = 0.0
+
+    # ===================== GİRDİ =====================
+    @staticmethod
+    def _last_bar(buffer: KlineRingBuffer) -> tuple:
+        return tuple(float(buffer.view(field, 1)[0]) for field in KlineRingBuffer.FLOAT_FIELDS)
+
+    def _merge(self, interval: str, open_time: int, open_: float, high: float,
+               low: float, close: float, volume: float, closed: bool) -> bool:
+        state = self._state[interval]
+        buffer = self._buffers[interval]
+        span = self._minutes[interval] * MINUTE_MS
+        bucket = open_time - open_time % span
+
+        last_minute = state["last_minute"]
+        if last_minute is not None and open_time < last_minute:
+            return False  # Eski mum
+
+        if open_time != last_minute:
+            if len(buffer) and buffer.last_open_time == bucket:
+                state["base"] = self._last_bar(buffer)
+                state["count"] += 1
+            elif len(buffer) or open_time == bucket:
+                state["base"] = None
+                state["count"] = 1
+            else:
+                return False  # Geçmişin başındaki eksik parça - ilk tam sınırdan başla
+            state["last_minute"] = open_time
+        # open_time == last_minute: aynı 1m'nin güncellemesi, base üzerine yeniden uygula
+
+        base = state["base"]
+        if base is None:
+            bar = (open_, high, low, close, volume)
+        else:
+            bar = (base[0], max(base[1], high), min(base[2], low), close, base[4] + volume)
+        state["closed"] = closed
+        return buffer.append(bucket, *bar, bucket + span - 1)
+
+    def add(self, open_time: int, open_: float, high: float, low: float,
+            close: float, volume: float, closed: bool = True) -> bool:
+        """1m mumu tüm zaman dilimlerine işle"""
+        added = False
+        for interval in self._minutes:
+            added = self._merge(interval, open_time, open_, high, low, close, volume, closed) or added
+        if added:
+            self.updated_at = time.time()
+        return added
+
+    def add_kline(self, kline: list) -> bool:
+        """REST formatındaki 1m satırı (son satır açık mum olabilir)"""
+        closed = int(kline[6]) < time.time() * 1000
+        return self.add(int(kline[0]), float(kline[1]), float(kline[2]), float(kline[3]),
+                        float(kline[4]), float(kline[5]), closed)
+
+    def add_ws_kline(self, kline_data: dict) -> bool:
+        """WebSocket 'k' payload'u"""
+        return self.add(int(kline_data['t']), float(kline_data['o']), float(kline_data['h']),
+                        float(kline_data['l']), float(kline_data['c']), float(kline_data['v']),
+                        bool(kline_data.get('x', True)))
+
+    def extend(self, klines: list) -> int:
+        """1m geçmişini toplu yükle"""
+        added = 0
+        for kline in klines:
+            try:
+                if self.add_kline(kline):
+                    added += 1
+            except (TypeError, ValueError, IndexError):
+                continue
+        return added
+
+    def seed(self, interval: str, klines: list) -> int:
+        """
+        Üst zaman dilimini kendi REST geçmişiyle başlat (ör. 1h için 1m geçmişi yetmez)
+
+        Sadece kapanmış mumlar alınır; sonraki 1m mumlar yeni periyottan devam eder.
+        """
+        if interval == "1m":
+            return self.extend(klines)
+        buffer = self._buffers[interval]
+        state = self._state[interval]
+        minutes = self._minutes[interval]
+        now_ms = time.time() * 1000
+        added = 0
+        for kline in klines:
+            try:
+                if int(kline[6]) >= now_ms:
+                    continue  # Açık mum - 1m akışıyla yeniden kurulur
+                if buffer.append_kline(kline):
+                    added += 1
+            except (TypeError, ValueError, IndexError):
+                continue
+        if added:
+            state.update(last_minute=buffer.last_open_time + (minutes - 1) * MINUTE_MS,
+                         base=None, count=minutes, closed=True)
+        return added
+
+    # ===================== OKUMA =====================
+    def buffer(self, interval: str = "1m") -> KlineRingBuffer:
+        """Aralığın kolonsal tamponu (son mum yarım olabilir)"""
+        return self._buffers[interval]
+
+    def is_partial(self, interval: str) -> bool:
+        """Son üst mum henüz tamamlanmadı mı"""
+        state = self._state[interval]
+        return state["count"] < self._minutes[interval] or not state["closed"]
+
+    def klines(self, interval: str, limit: Optional[int] = None,
+               include_partial: bool = True) -> List[list]:
+        """REST formatında mumlar (eski → yeni)"""
+        buffer = self._buffers[interval]
+        count = len(buffer)
+        if not include_partial and count and self.is_partial(interval):
+            count -= 1
+        n = count if limit is None else min(limit, count)
+        if n <= 0:
+            return []
+        klines = buffer.to_klines(n + (len(buffer) - count))
+        return klines[:n]
+
+    def get_status(self) -> dict:
+        return {
+            interval: {"bars": len(self._buffers[interval]), "partial": self.is_partial(interval)}
+            for interval in self._minutes
+        }
+
+
+class TimeframeStore:
+    """Sembol başına TimeframeAggregator deposu (süreç içi paylaşılır)"""
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._aggregators: Dict[str, TimeframeAggregator] = {}
+
+    def get(self, symbol: str) -> TimeframeAggregator:
+        aggregator = self._aggregators.get(symbol)
+        if aggregator is None:
+            aggregator = TimeframeAggregator(self.capacity)
+            self._aggregators[symbol] = aggregator
+        return aggregator
+
+    def remove(self, symbol: str):
+        self._aggregators.pop(symbol, None)
+
+    def symbols(self) -> List[str]:
+        return list(self._aggregators.keys())
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._aggregators
+
+    def get_klines(self, symbol: str, interval: str, limit: Optional[int] = None,
+                   include_partial: bool = True, max_age_seconds: float = 120.0) -> Optional[List[list]]:
+        """Canlı beslenen sembol için yerel mumlar - yoksa / bayatsa None (çağıran REST'e düşer)"""
+        aggregator = self._aggregators.get(symbol)
+        if aggregator is None or time.time() - aggregator.updated_at > max_age_seconds:
+            return None
+        if interval not in aggregator.intervals:
+            return None
+        klines = aggregator.klines(interval, limit, include_partial)
+        if limit is not None and len(klines) < limit:
+            return None  # Yetersiz geçmiş
+        return klines
+
+
+# Global instance - bot (veya shard geçidi) websocket mumlarıyla besler, diğer bileşenler okur
+timeframe_store = TimeframeStore(settings.MAX_KLINES_PER_SYMBOL)
@@ -1,9 +1,10 @@
 # app/trading_strategy.py - BOLLİNGER BANDS STRATEJİSİ
 
-import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 from .config import settings
+from .indicators import IndicatorEngine, RollingMean, RollingVariance
+from .kline_buffer import as_kline_buffer
 
 class PureEMAStrategy:  # İsim aynı kaldı - uyumluluk için
     """
@@ -22,6 +23,9 @@ class PureEMAStrategy:  # İsim aynı kaldı - uyumluluk için
         self.analysis_count = 0
         self.successful_signals = 0
         
+        # Sembol başına artımlı indikatör motorları
+        self._engines: Dict[str, IndicatorEngine] = {}
+        
         print(f"📊 Bollinger Bands Stratejisi başlatıldı")
         print(f"   Period: {self.bb_period}")
         print(f"   Std Dev: {self.bb_std}")
@@ -38,7 +42,7 @@ class PureEMAStrategy:  # İsim aynı kaldı - uyumluluk için
             return "LONG"  # Her zaman pozisyon açmaya hazır
         return "HOLD"
     
-    def analyze_and_calculate_levels(self, klines: list, symbol: str = "UNKNOWN") -> Optional[Dict]:
+    def analyze_and_calculate_levels(self, klines, symbol: str = "UNKNOWN") -> Optional[Dict]:
         """
         📊 Bollinger Bands hesaplama ve giriş seviyelerini belirleme
         
@@ -67,30 +71,23 @@ class PureEMAStrategy:  # İsim aynı kaldı - uyumluluk için
             return None
 
         try:
-            # DataFrame hazırla
-            df = self._prepare_dataframe(klines)
+            # Artımlı Bollinger - rolling mean + Welford varyans
+            buffer = as_kline_buffer(klines)
+            engine = self._get_engine(symbol)
+            engine.sync(buffer)
             
-            if df is None or len(df) < min_required:
+            if engine.count < min_required:
                 return None
             
-            # Bollinger Bands hesapla
-            df['bb_middle'] = df['close'].rolling(window=self.bb_period).mean()
-            df['bb_std'] = df['close'].rolling(window=self.bb_period).std()
-            df['bb_upper'] = df['bb_middle'] + (self.bb_std * df['bb_std'])
-            df['bb_lower'] = df['bb_middle'] - (self.bb_std * df['bb_std'])
-            
-            # NaN temizle
-            df = df.dropna().copy()
-            
-            if len(df) < 1:
+            bb_middle = engine.value('bb_middle')
+            bb_variance = engine['bb_variance']
+            if bb_middle is None or bb_variance.value is None:
                 return None
             
             # Son değerler
-            last_row = df.iloc[-1]
-            current_price = float(last_row['close'])
-            bb_upper = float(last_row['bb_upper'])
-            bb_middle = float(last_row['bb_middle'])
-            bb_lower = float(last_row['bb_lower'])
+            current_price = engine.last_bar['close']  # İndikatörlerle aynı mum
+            bb_upper = bb_middle + (self.bb_std * bb_variance.std)
+            bb_lower = bb_middle - (self.bb_std * bb_variance.std)
             bb_width = bb_upper - bb_lower
             bb_width_percent = (bb_width / current_price) * 100
             
@@ -169,27 +166,16 @@ class PureEMAStrategy:  # İsim aynı kaldı - uyumluluk için
             print(f"❌ {symbol} Bollinger analiz hatası: {e}")
             return None
     
-    def _prepare_dataframe(self, klines: list) -> Optional[pd.DataFrame]:
-        """Kline verilerini DataFrame'e çevir"""
-        try:
-            klines_data = []
-            for kline in klines:
-                close_price = float(kline[4])
-                if close_price > 0 and not (np.isnan(close_price) or np.isinf(close_price)):
-                    klines_data.append({'close': close_price})
-                    
-            if not klines_data or len(klines_data) < 10:
-                return None
-                
-            df = pd.DataFrame(klines_data)
-            df = df[df['close'] > 0].copy()
-            df = df.dropna().copy()
-            
-            return df if len(df) >= 10 else None
-            
-        except Exception as e:
-            print(f"❌ DataFrame hatası: {e}")
-            return None
+    def _get_engine(self, symbol: str) -> IndicatorEngine:
+        """Sembol için indikatör motoru"""
+        engine = self._engines.get(symbol)
+        if engine is None:
+            engine = IndicatorEngine({
+                'bb_middle': RollingMean(self.bb_period),
+                'bb_variance': RollingVariance(self.bb_period),
+            })
+            self._engines[symbol] = engine
+        return engine
     
     def get_debug_info(self, klines: list, symbol: str) -> dict:
         """Debug bilgisi"""
@@ -0,0 +1,149 @@
+# app/ttl_cache.py - SINIRLI TTL / LRU CACHE
+"""
+🗃️ Boyutu sınırlı, süreli cache
+
+- Maksimum kayıt sayısı aşılınca en uzun süredir kullanılmayan kayıt atılır (LRU)
+- Her kaydın kendi son kullanma zamanı vardır (TTL)
+- hit / miss / eviction / expiration sayaçları
+- İsteğe bağlı dosyaya yazma: yeniden başlatmada geçerli kayıtlar korunur
+  (save_async ile disk yazımı event loop dışında yapılır)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+def context_hash(context: dict) -> str:
+    """Sözlüğün kararlı özeti (süreçler / yeniden başlatmalar arası aynı)"""
+    payload = json.dumps(context, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+
+class TTLCache:
+    """
+    🗃️ TTL + LRU cache
+
+    Kullanım:
+        cache = TTLCache(max_entries=512, ttl_seconds=60)
+        cache.set(key, value)
+        value = cache.get(key)  # süresi dolmuşsa None
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 60.0, cache_file: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.cache_file = cache_file
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key → (expires_at, value)
+        self.dirty = False  # Son yazımdan beri yeni kayıt var mı
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[0] > time.time()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        self.dirty = True
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def prune(self) -> int:
+        """Süresi dolmuş kayıtları at"""
+        now = time.time()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+        self.expirations += len(expired)
+        return len(expired)
+
+    async def clear(self):
+        self._entries.clear()
+        await self.save_async()
+
+    # ===================== DOSYA =====================
+    def load(self) -> int:
+        """Dosyadaki süresi dolmamış kayıtları yükle"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return 0
+        try:
+            with open(self.cache_file, 'r') as f:
+                entries = json.load(f)
+            now = time.time()
+            for key, expires_at, value in entries:
+                if expires_at > now:
+                    self._entries[key] = (expires_at, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return len(self._entries)
+        except Exception as e:
+            print(f"⚠️ Cache dosyası okunamadı: {e}")
+            return 0
+
+    def _snapshot(self) -> list:
+        """Yazılacak kayıtların kopyası (cache'in sahibi olan thread'de alınır)"""
+        self.prune()
+        self.dirty = False
+        return [[key, expires_at, value] for key, (expires_at, value) in self._entries.items()]
+
+    def _write(self, entries: list):
+        try:
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"⚠️ Cache dosyası yazılamadı: {e}")
+
+    def save(self):
+        if not self.cache_file:
+            return
+        self._write(self._snapshot())
+
+    async def save_async(self):
+        """Kopya event loop'ta alınır, disk yazımı thread'de yapılır"""
+        if not self.cache_file:
+            return
+        await asyncio.to_thread(self._write, self._snapshot())
+
+    def get_stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups * 100, 1) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
@@ -0,0 +1,255 @@
+# app/user_data_stream.py - FUTURES USER DATA STREAM
+"""
+📨 Binance Futures User Data Stream
+
+- listenKey oluşturma, keepalive ve yeniden bağlanma
+- ORDER_TRADE_UPDATE / ACCOUNT_UPDATE / ACCOUNT_CONFIG_UPDATE olayları
+- clientOrderId bazlı fill bekleyicileri (sabit sleep + REST poll yerine)
+- Diğer bileşenler için olay dinleyicileri (add_listener)
+"""
+
+import asyncio
+import json
+import time
+import websockets
+from typing import Awaitable, Callable, Dict, List, Optional
+
+EventListener = Callable[[dict], Awaitable[None]]
+
+FINAL_ORDER_STATUSES = ('FILLED', 'CANCELED', 'EXPIRED', 'REJECTED', 'EXPIRED_IN_MATCH')
+
+# Bağlantı durumu için yerel olaylar (Binance göndermez, dinleyicilere biz iletiriz)
+STREAM_CONNECTED = 'STREAM_CONNECTED'
+STREAM_DISCONNECTED = 'STREAM_DISCONNECTED'
+
+
+class UserDataStream:
+    """
+    📨 User Data Stream yöneticisi
+
+    Kullanım:
+        waiter = stream.expect_order(client_order_id)   # emirden ÖNCE
+        ... emir gönder ...
+        order = await stream.wait_for_order(client_order_id, waiter, timeout=3.0)
+    """
+
+    def __init__(self, settings, binance_client):
+        self.settings = settings
+        self.binance_client = binance_client
+
+        self.listen_key: Optional[str] = None
+        self.ws = None
+        self._listeners: Dict[str, List[EventListener]] = {}
+        self._order_waiters: Dict[str, asyncio.Future] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._stop_requested = False
+
+        self.last_event_time = 0.0
+        self.events_received = 0
+        self.reconnects = 0
+        self.fills_by_event = 0
+
+    @property
+    def is_connected(self) -> bool:
+        return self.ws is not None
+
+    # ===================== YAŞAM DÖNGÜSÜ =====================
+    async def start(self):
+        """Stream'i başlat (arka planda bağlanır)"""
+        if self._tasks:
+            return
+        self._stop_requested = False
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._keepalive_loop())
+        ]
+        print("📨 User data stream başlatılıyor...")
+
+    async def stop(self):
+        """Stream'i kapat"""
+        self._stop_requested = True
+        if self.ws:
+            try:
+                await self.ws.close()
+            except:
+                pass
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks = []
+
+        if self.listen_key and self.binance_client.client:
+            try:
+                await self.binance_client.client.futures_stream_close(listenKey=self.listen_key)
+            except Exception:
+                pass
+        self.listen_key = None
+
+        for waiter in self._order_waiters.values():
+            if not waiter.done():
+                waiter.cancel()
+        self._order_waiters.clear()
+        print("🛑 User data stream durduruldu")
+
+    async def _create_listen_key(self) -> str:
+        listen_key = await self.binance_client._call(
+            self.binance_client.client.futures_stream_get_listen_key, weight=1)
+        self.listen_key = listen_key
+        return listen_key
+
+    async def _run(self):
+        attempts = 0
+        while not self._stop_requested:
+            try:
+                listen_key = await self._create_listen_key()
+                url = f"{self.settings.WEBSOCKET_URL}/ws/{listen_key}"
+
+                async with websockets.connect(
+                    url,
+                    ping_interval=self.settings.WEBSOCKET_PING_INTERVAL,
+                    ping_timeout=self.settings.WEBSOCKET_PING_TIMEOUT,
+                    close_timeout=self.settings.WEBSOCKET_CLOSE_TIMEOUT
+                ) as ws:
+                    self.ws = ws
+                    attempts = 0
+                    print("✅ User data stream bağlandı")
+                    await self._notify(STREAM_CONNECTED)
+
+                    async for message in ws:
+                        expired = await self._handle_message(message)
+                        if expired:
+                            print("⚠️ listenKey süresi doldu, yenileniyor...")
+                            break
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if not self._stop_requested:
+                    print(f"⚠️ User data stream hatası: {e}")
+            finally:
+                was_connected = self.ws is not None
+                self.ws = None
+                if was_connected:
+                    # Kopukluk süresince olay kaçmış olabilir
+                    await self._notify(STREAM_DISCONNECTED)
+
+            if self._stop_requested:
+                break
+
+            attempts += 1
+            self.reconnects += 1
+            backoff = min(2 * attempts, 30)
+            print(f"⏳ User data stream yeniden bağlanıyor... ({backoff}s)")
+            await asyncio.sleep(backoff)
+
+    async def _keepalive_loop(self):
+        while not self._stop_requested:
+            await asyncio.sleep(self.settings.LISTEN_KEY_KEEPALIVE_SECONDS)
+            if not self.listen_key:
+                continue
+            try:
+                await self.binance_client._call(
+                    self.binance_client.client.futures_stream_keepalive,
+                    listenKey=self.listen_key, weight=1)
+            except Exception as e:
+                print(f"⚠️ listenKey keepalive hatası: {e}")
+                # Bağlantıyı kapat, _run yeni listenKey ile bağlanır
+                if self.ws:
+                    try:
+                        await self.ws.close()
+                    except:
+                        pass
+
+    # ===================== OLAYLAR =====================
+    def add_listener(self, event_type: str, callback: EventListener):
+        """Olay dinleyicisi ekle (ör. 'ORDER_TRADE_UPDATE')"""
+        self._listeners.setdefault(event_type, []).append(callback)
+
+    def remove_listener(self, event_type: str, callback: EventListener):
+        listeners = self._listeners.get(event_type, [])
+        if callback in listeners:
+            listeners.remove(callback)
+
+    async def _notify(self, event_type: str):
+        for callback in list(self._listeners.get(event_type, [])):
+            try:
+                await callback({'e': event_type, 'E': int(time.time() * 1000)})
+            except Exception as e:
+                print(f"❌ {event_type} dinleyici hatası: {e}")
+
+    async def _handle_message(self, message: str) -> bool:
+        """Olayı işle, listenKey süresi dolduysa True döndür"""
+        try:
+            event = json.loads(message)
+        except ValueError:
+            return False
+
+        event_type = event.get('e')
+        self.events_received += 1
+        self.last_event_time = time.time()
+
+        if event_type == 'listenKeyExpired':
+            return True
+
+        if event_type == 'ORDER_TRADE_UPDATE':
+            self._resolve_order_waiter(event.get('o', {}))
+
+        for callback in list(self._listeners.get(event_type, [])):
+            try:
+                await callback(event)
+            except Exception as e:
+                print(f"❌ {event_type} dinleyici hatası: {e}")
+
+        return False
+
+    # ===================== FILL BEKLEYİCİLERİ =====================
+    def expect_order(self, client_order_id: str) -> asyncio.Future:
+        """Emir göndermeden önce bekleyici kaydet (olay yanıttan önce gelebilir)"""
+        waiter = asyncio.get_running_loop().create_future()
+        self._order_waiters[client_order_id] = waiter
+        return waiter
+
+    def discard_order(self, client_order_id: str):
+        waiter = self._order_waiters.pop(client_order_id, None)
+        if waiter and not waiter.done():
+            waiter.cancel()
+
+    def _resolve_order_waiter(self, order: dict):
+        client_order_id = order.get('c')
+        status = order.get('X')
+        if not client_order_id or status not in FINAL_ORDER_STATUSES:
+            return
+
+        waiter = self._order_waiters.pop(client_order_id, None)
+        if waiter and not waiter.done():
+            if status == 'FILLED':
+                self.fills_by_event += 1
+            waiter.set_result(order)
+
+    async def wait_for_order(self, client_order_id: str, waiter: asyncio.Future,
+                             timeout: float) -> Optional[dict]:
+        """
+        Emrin son durumunu bekle
+
+        Returns: ORDER_TRADE_UPDATE 'o' alanı veya zaman aşımında None
+        """
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            return None
+        finally:
+            self.discard_order(client_order_id)
+
+    def get_status(self) -> dict:
+        return {
+            "connected": self.is_connected,
+            "events_received": self.events_received,
+            "last_event_ago_seconds": int(time.time() - self.last_event_time) if self.last_event_time else None,
+            "reconnects": self.reconnects,
+            "fills_by_event": self.fills_by_event,
+            "pending_waiters": len(self._order_waiters)
+        }
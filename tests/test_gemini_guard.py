@@ -0,0 +1,102 @@
+# tests/test_gemini_guard.py - GEMINI ÇAĞRI KORUMASI TESTLERİ
+"""
+🧪 Eşzamanlılık sınırı, süre sınırı ve devre kesici
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.gemini_guard import BREAKER_CLOSED, GeminiCallGuard
+
+
+class _Chunk:
+    def __init__(self, text, usage=None, finish_reason=0):
+        self.text = text
+        self.usage_metadata = usage
+        self.candidates = [SimpleNamespace(finish_reason=finish_reason)]
+
+
+class _Stream:
+    def __init__(self, parts, delay):
+        self._parts = list(parts)
+        self._delay = delay
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._parts:
+            raise StopAsyncIteration
+        await asyncio.sleep(self._delay)
+        part = self._parts.pop(0)
+        return part if isinstance(part, _Chunk) else _Chunk(part)
+
+
+class _Model:
+    def __init__(self, delay, parts=None):
+        self.delay = delay
+        self.parts = parts or ['{"ok": ', 'true}']
+
+    async def generate_content_async(self, prompt, **kwargs):
+        return _Stream(self.parts, self.delay / 2)
+
+
+def _guard(**overrides) -> GeminiCallGuard:
+    values = dict(
+        GEMINI_CALL_TIMEOUT_SECONDS=0.3,
+        GEMINI_SLOW_CALL_SECONDS=1.0,
+        GEMINI_BREAKER_FAILURES=1,
+        GEMINI_BREAKER_COOLDOWN_SECONDS=60,
+        GEMINI_MAX_CONCURRENCY=1,
+        LATENCY_WINDOW=50,
+    )
+    values.update(overrides)
+    return GeminiCallGuard(SimpleNamespace(**values))
+
+
+def test_queued_calls_do_not_count_slot_wait_as_timeout():
+    async def scenario():
+        guard = _guard()
+        model = _Model(delay=0.2)
+        # Tek slot: üçüncü çağrı ~0.4s sırada bekler ama kendi süresi 0.2s
+        results = await asyncio.gather(*(
+            guard.generate(model, f"prompt {i}", {}) for i in range(3)
+        ))
+        assert results == ['{"ok": true}'] * 3
+        assert guard.outcomes["timeout"] == 0
+        assert guard.state == BREAKER_CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_slow_gemini_call_times_out():
+    async def scenario():
+        guard = _guard()
+        try:
+            await guard.generate(_Model(delay=1.0), "prompt", {})
+        except asyncio.TimeoutError:
+            pass
+        assert guard.outcomes["timeout"] == 1
+        assert guard.state != BREAKER_CLOSED
+
+    asyncio.run(scenario())
+
+
+def test_token_usage_unknown_when_stream_cut_early():
+    usage = SimpleNamespace(prompt_token_count=120, candidates_token_count=8)
+
+    async def scenario():
+        guard = _guard()
+        # Kapanış parçası son parça: usage tam
+        final = _Model(0.0, ['{"ok": ', _Chunk('true}', usage, finish_reason=1)])
+        await guard.generate(final, "final", {}, name="a")
+        # JSON bitti ama usage'ı taşıyan parça henüz gelmedi: akış erken kesilir
+        cut = _Model(0.0, ['{"ok": true}', _Chunk('', usage, finish_reason=1)])
+        await guard.generate(cut, "cut", {}, name="a")
+        return guard
+
+    guard = asyncio.run(scenario())
+    assert guard.tokens["a"]["calls"] == 1
+    assert guard.tokens["a"]["input"] == 120
+    assert guard.tokens["a"]["unknown"] == 1
+    assert guard.early_stops == 1
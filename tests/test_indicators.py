@@ -0,0 +1,157 @@
+# tests/test_indicators.py - ARTIMLI İNDİKATÖR TESTLERİ
+"""
+🧪 IndicatorEngine pandas paritesi ve strateji / motor mum hizası
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.indicators import EMA, VWAP, IndicatorEngine, Lag, RollingMax, RollingMean, RollingMin, RollingVariance
+from app.kline_buffer import KlineRingBuffer
+from app.professional_scalping_strategy import ProfessionalScalpingStrategy
+
+CAPACITY = 100
+
+
+def _random_bars(n: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.cumprod(1 + rng.normal(0, 0.003, n))
+    highs = closes * (1 + np.abs(rng.normal(0, 0.001, n)))
+    lows = closes * (1 - np.abs(rng.normal(0, 0.001, n)))
+    volumes = np.abs(rng.normal(10, 3, n)) + 0.1
+    return closes, highs, lows, volumes
+
+
+def _engine() -> IndicatorEngine:
+    return IndicatorEngine({
+        'ema': EMA(21),
+        'vwap': VWAP(window=CAPACITY),
+        'vol_ma': RollingMean(10, source='volume'),
+        'var': RollingVariance(20),
+        'max': RollingMax(6),
+        'min': RollingMin(6),
+        'lag': Lag(3),
+    }, require_volume=True)
+
+
+def test_incremental_engine_matches_pandas():
+    closes, highs, lows, volumes = _random_bars(400)
+    buffer = KlineRingBuffer(CAPACITY)
+    engine = _engine()
+
+    # EMA pandas'ta pencere başından tohumlanır; fark (1-alpha)^kapasite ile söner
+    tolerance = {'ema': 1e-4}
+    for i in range(len(closes)):
+        buffer.append(i * 60000, closes[i], highs[i], lows[i], closes[i], volumes[i], i * 60000 + 59999)
+        engine.sync(buffer)
+        if i < CAPACITY:
+            continue
+
+        df = pd.DataFrame({'close': buffer.close, 'high': buffer.high,
+                           'low': buffer.low, 'volume': buffer.volume})
+        expected = {
+            'ema': df['close'].ewm(span=21, adjust=False).mean().iloc[-1],
+            'vwap': ((df['close'] * df['volume']).cumsum() / df['volume'].cumsum()).iloc[-1],
+            'vol_ma': df['volume'].rolling(10).mean().iloc[-1],
+            'var': df['close'].rolling(20).var().iloc[-1],
+            'max': df['high'].iloc[-6:].max(),
+            'min': df['low'].iloc[-6:].min(),
+            'lag': df['close'].iloc[-4],
+        }
+        for name, value in expected.items():
+            assert engine.value(name) == pytest.approx(value, rel=tolerance.get(name, 1e-9)), name
+
+    # Tampon sürekli ilerledi - ilk yükleme dışında yeniden tohumlama olmamalı
+    assert engine.reseed_count == 1
+
+
+def test_sync_is_incremental_and_idempotent():
+    closes, highs, lows, volumes = _random_bars(60)
+    buffer = KlineRingBuffer(CAPACITY)
+    for i in range(50):
+        buffer.append(i * 60000, closes[i], highs[i], lows[i], closes[i], volumes[i], i * 60000 + 59999)
+
+    engine = _engine()
+    assert engine.sync(buffer) == 50
+    assert engine.sync(buffer) == 0  # Yeni mum yok
+
+    buffer.append(50 * 60000, closes[50], highs[50], lows[50], closes[50], volumes[50], 50 * 60000 + 59999)
+    assert engine.sync(buffer) == 1
+
+    fresh = _engine()
+    fresh.sync(buffer)
+    for name in engine.indicators:
+        assert engine.value(name) == pytest.approx(fresh.value(name), rel=1e-12), name
+
+
+def test_last_bar_skips_zero_volume_bar():
+    engine = IndicatorEngine({'ema': EMA(5)}, require_volume=True)
+    engine.update(100.0, 101.0, 99.0, 100.5, 12.0)
+    engine.update(100.5, 100.5, 100.5, 100.5, 0.0)  # Hacimsiz mum atlanır
+
+    assert engine.count == 1
+    assert engine.last_bar['close'] == 100.5
+    assert engine.last_bar['volume'] == 12.0
+
+
+def test_strategy_prices_from_engine_bar_not_skipped_bar(monkeypatch):
+    strategy = ProfessionalScalpingStrategy()
+    buffer = KlineRingBuffer(CAPACITY)
+    price = 100.0
+    for i in range(40):
+        price *= 1.005  # Güçlü yükseliş trendi
+        buffer.append(i * 60000, price, price * 1.001, price * 0.999, price, 10.0 + i, i * 60000 + 59999)
+    engine_close = price
+    # Son mum hacimsiz: motor atlar, strateji de bu fiyatı kullanmamalı
+    buffer.append(40 * 60000, 1.0, 1.0, 1.0, 1.0, 0.0, 40 * 60000 + 59999)
+
+    seen = {}
+
+    def spy(trend_direction, current_price, *args):
+        seen['current_price'] = current_price
+        return {'has_pullback': False, 'pullback_size': 0.0}
+
+    monkeypatch.setattr(strategy, '_detect_pullback', spy)
+    strategy.analyze_and_calculate_levels(buffer, "TESTUSDT")
+
+    assert seen['current_price'] == pytest.approx(engine_close)
+
+
+def test_in_place_update_of_last_bar_is_reapplied():
+    closes, highs, lows, volumes = _random_bars(60)
+    buffer = KlineRingBuffer(CAPACITY)
+    for i in range(40):
+        buffer.append(i * 60000, closes[i], highs[i], lows[i], closes[i], volumes[i], i * 60000 + 59999)
+    engine = _engine()
+    engine.sync(buffer)
+
+    # Yeniden başlatmada REST'in açık mumu yarım uygulanmıştı; kapanmış hali aynı open_time ile gelir
+    last = 39 * 60000
+    buffer.append(last, closes[39], highs[39] * 1.01, lows[39], closes[39] * 1.005, volumes[39] * 3, last + 59999)
+    assert engine.sync(buffer) == 1
+    assert engine.rollback_count == 1
+
+    # Sonraki mumlarla birlikte gelen güncelleme de geri alınıp uygulanır
+    buffer.append(last, closes[39], highs[39] * 1.02, lows[39], closes[39] * 1.01, volumes[39] * 4, last + 59999)
+    for i in range(40, 45):
+        buffer.append(i * 60000, closes[i], highs[i], lows[i], closes[i], volumes[i], i * 60000 + 59999)
+    assert engine.sync(buffer) == 6
+
+    fresh = _engine()
+    fresh.sync(buffer)
+    for name in engine.indicators:
+        assert engine.value(name) == pytest.approx(fresh.value(name), rel=1e-12), name
+        assert engine[name].prev == pytest.approx(fresh[name].prev, rel=1e-12), name
+    assert engine.count == fresh.count
+    assert engine.reseed_count == 1
+
+
+def test_rolling_variance_resync_keeps_parity():
+    rng = np.random.default_rng(7)
+    values = 1e6 + rng.normal(0, 1, RollingVariance.RESYNC_EVERY * 3)
+    variance = RollingVariance(20)
+    for x in values:
+        variance.update(x)
+    expected = pd.Series(values).rolling(20).var().iloc[-1]
+    assert variance.value == pytest.approx(expected, rel=1e-9)
@@ -0,0 +1,54 @@
+# tests/test_rate_limiter.py - RATE LIMITER ÖNCELİK TESTLERİ
+"""
+🧪 Öncelik sınıfları: alt sınıf sadece aynı pencerede bekleyen üst sınıfa yol verir
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+from app.rate_limiter import PRIORITY_CRITICAL, PRIORITY_NORMAL, BinanceRateLimiter
+
+
+def _limiter() -> BinanceRateLimiter:
+    return BinanceRateLimiter(SimpleNamespace(
+        RATE_LIMIT_SAFETY_MARGIN=1.0,
+        RATE_LIMIT_WEIGHT_PER_MINUTE=1000,
+        RATE_LIMIT_ORDERS_PER_10S=2,
+        RATE_LIMIT_ORDERS_PER_MINUTE=100,
+        RATE_LIMIT_CRITICAL_RESERVE=0.2,
+        RATE_LIMIT_BACKGROUND_RESERVE=0.5,
+        RATE_LIMIT_BACKGROUND_MAX_WAIT=1.0,
+    ))
+
+
+async def _blocked_critical_order(limiter: BinanceRateLimiter) -> asyncio.Task:
+    limiter.windows['orders_10s'].used = limiter.windows['orders_10s'].limit
+    task = asyncio.create_task(limiter.acquire(weight=0, orders=1, priority=PRIORITY_CRITICAL))
+    await asyncio.sleep(0.01)
+    assert not task.done()
+    return task
+
+
+def test_weight_read_not_stalled_by_order_waiter():
+    async def scenario():
+        limiter = _limiter()
+        order = await _blocked_critical_order(limiter)
+        # Emir 10s penceresinde bekliyor; ağırlık bütçesi boş olan okuma beklememeli
+        await asyncio.wait_for(limiter.acquire(weight=5, priority=PRIORITY_NORMAL), 0.2)
+        order.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_higher_waiter_blocks_only_its_window():
+    async def scenario():
+        limiter = _limiter()
+        order = await _blocked_critical_order(limiter)
+        assert limiter._has_higher_waiters(PRIORITY_NORMAL, {'orders_10s': 1, 'orders_1m': 1})
+        assert not limiter._has_higher_waiters(PRIORITY_NORMAL, {'weight_1m': 5})
+
+        order.cancel()
+        await asyncio.sleep(0)
+        assert not limiter._has_higher_waiters(PRIORITY_NORMAL, {'orders_10s': 1, 'orders_1m': 1})
+
+    asyncio.run(scenario())
@@ -0,0 +1,35 @@
+# tests/test_ttl_cache.py - TTL CACHE DOSYA TESTLERİ
+"""
+🧪 TTLCache dosyaya yazma / geri yükleme
+"""
+
+import asyncio
+
+from app.ttl_cache import TTLCache
+
+
+def test_save_async_round_trip(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    cache = TTLCache(max_entries=4, ttl_seconds=60, cache_file=cache_file)
+    cache.set("a", {"signal": "LONG"})
+    cache.set("b", {"signal": "SHORT"}, ttl_seconds=-1)  # Süresi dolmuş, yazılmaz
+    assert cache.dirty
+
+    asyncio.run(cache.save_async())
+    assert not cache.dirty
+
+    restored = TTLCache(max_entries=4, ttl_seconds=60, cache_file=cache_file)
+    assert restored.load() == 1
+    assert restored.get("a") == {"signal": "LONG"}
+
+
+def test_clear_empties_cache_file(tmp_path):
+    cache_file = str(tmp_path / "cache.json")
+    cache = TTLCache(max_entries=4, ttl_seconds=60, cache_file=cache_file)
+    cache.set("a", 1)
+    cache.save()
+
+    asyncio.run(cache.clear())
+
+    restored = TTLCache(max_entries=4, ttl_seconds=60, cache_file=cache_file)
+    assert restored.load() == 0